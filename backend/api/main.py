@@ -10,18 +10,44 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # Now we can import using backend.* syntax
-from backend.core.database import Base, engine
+from backend.core.database import Base, SessionLocal, engine, ensure_indexes
+from backend.core.models import AnomalyEvent, Satellite, Telemetry
 from backend.core.logger import logger
+from backend.core.config import (
+    INGEST_WORKERS, SNAPSHOT_DIR, SNAPSHOT_INTERVAL_S,
+    RETENTION_TELEMETRY_DAYS, RETENTION_CRITICAL_DAYS, RETENTION_WARNING_DAYS,
+    RETENTION_OTHER_DAYS, RETENTION_INTERVAL_S, RETENTION_CHUNK_SIZE,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_AGE_S,
+    LIVENESS_TICK_S, PASS_INTERVAL_S, CONJUNCTION_INTERVAL_S, SATELLITE_FLUSH_S,
+)
+from backend.services.sharding import start_executor, stop_executor
+from backend.services.snapshot import SnapshotWriter, restore_snapshot
+from backend.services.retention import RetentionWorker, default_policies
+from backend.services.response_cache import ResponseCache, ResponseCacheMiddleware
+from backend.services.liveness import LIVENESS, LivenessWorker
+from backend.services.satellite_registry import SATELLITE_REGISTRY, SatelliteRegistryWorker
+from backend.services.passes import PASSES, PassWorker
+from backend.services.conjunction import CONJUNCTIONS, ConjunctionWorker
+from sqlalchemy import func
 
 # Import all route modules (relative import since we're in the same package)
-from .routes import telemetry, anomaly, alerts, satellites
+from .routes import telemetry, anomaly, alerts, satellites, thresholds
 
 # create tables
 Base.metadata.create_all(bind=engine)
+ensure_indexes()
 logger.info("Database tables ensured.")
 
 app = FastAPI(title="Satellite Anomaly Detector", version="0.1.0")
 
+# Cache dashboard reads until the next ingest (added before CORS so CORS wraps it)
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_AGE_S)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    paths=["/satellites", "/anomalies/history", "/anomalies/latest", "/telemetry/latest"],
+    cache=response_cache,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -34,6 +60,93 @@ app.include_router(telemetry.router, prefix="/telemetry", tags=["telemetry"])
 app.include_router(anomaly.router, prefix="/anomalies", tags=["anomalies"])
 app.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 app.include_router(satellites.router, prefix="/satellites", tags=["satellites"])
+app.include_router(thresholds.router, prefix="/thresholds", tags=["thresholds"])
+
+
+snapshot_writer = None
+retention_worker = None
+registry_worker = None
+liveness_worker = None
+pass_worker = None
+conjunction_worker = None
+
+
+@app.on_event("startup")
+def start_ingest_workers():
+    global snapshot_writer, retention_worker, registry_worker, liveness_worker, pass_worker, conjunction_worker
+    # restore in-memory state before accepting telemetry
+    if SNAPSHOT_DIR:
+        if restore_snapshot(SNAPSHOT_DIR):
+            logger.info(f"Restored state snapshot from {SNAPSHOT_DIR}")
+        snapshot_writer = SnapshotWriter(SNAPSHOT_DIR, SNAPSHOT_INTERVAL_S)
+        snapshot_writer.start()
+
+    # INGEST_WORKERS > 0 moves detector math onto satellite-sharded processes
+    if INGEST_WORKERS > 0:
+        start_executor(INGEST_WORKERS, SNAPSHOT_DIR or None, SNAPSHOT_INTERVAL_S)
+
+    # background TTL deletes + incremental vacuum
+    if RETENTION_INTERVAL_S > 0:
+        policies = default_policies(RETENTION_TELEMETRY_DAYS, RETENTION_CRITICAL_DAYS,
+                                    RETENTION_WARNING_DAYS, RETENTION_OTHER_DAYS)
+        retention_worker = RetentionWorker(engine, policies, RETENTION_INTERVAL_S, RETENTION_CHUNK_SIZE)
+        retention_worker.start()
+
+    # online/offline tracking, seeded with each satellite's newest sample
+    db = SessionLocal()
+    try:
+        last_seen = {}
+        # anomaly_events rows are episodes: their latest sample is last_seen
+        for model, ts_column in ((AnomalyEvent, func.coalesce(AnomalyEvent.last_seen, AnomalyEvent.timestamp)),
+                                 (Telemetry, Telemetry.timestamp)):
+            rows = (
+                db.query(model.satellite_id, func.max(ts_column))
+                .filter(model.satellite_id.isnot(None))
+                .group_by(model.satellite_id)
+                .all()
+            )
+            for sat_id, ts in rows:
+                if ts and (last_seen.get(sat_id) is None or ts > last_seen[sat_id]):
+                    last_seen[sat_id] = ts
+        LIVENESS.load(last_seen)
+        telemetry.EPISODES.load(db)
+        SATELLITE_REGISTRY.load(db, Satellite)
+    finally:
+        db.close()
+    # inserts satellites this app hasn't stored yet, so liveness UPDATEs find their rows
+    registry_worker = SatelliteRegistryWorker(SATELLITE_REGISTRY, SessionLocal, Satellite, SATELLITE_FLUSH_S)
+    registry_worker.start()
+    liveness_worker = LivenessWorker(LIVENESS, SessionLocal, Satellite, LIVENESS_TICK_S)
+    liveness_worker.start()
+
+    # ground-station pass tables, rebuilt in the background as orbits update
+    pass_worker = PassWorker(PASSES, PASS_INTERVAL_S)
+    pass_worker.start()
+
+    # fleet-wide close-approach screening on the same state vectors
+    if CONJUNCTION_INTERVAL_S > 0:
+        conjunction_worker = ConjunctionWorker(CONJUNCTIONS, CONJUNCTION_INTERVAL_S)
+        conjunction_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_ingest_workers():
+    stop_executor()
+    if snapshot_writer is not None:
+        snapshot_writer.stop()
+    if retention_worker is not None:
+        retention_worker.stop()
+    # satellites first, so liveness updates of new ones find their rows
+    if registry_worker is not None:
+        registry_worker.stop()
+    if liveness_worker is not None:
+        liveness_worker.stop()
+    if pass_worker is not None:
+        pass_worker.stop()
+    if conjunction_worker is not None:
+        conjunction_worker.stop()
+
+
 @app.get("/")
 def root():
     return {"message": "Satellite Anomaly Detector Backend is running"}
@@ -9,9 +9,13 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from backend.services.state import get_latest_anomalies
+from backend.services.fleet import FLEET
 from backend.core.database import SessionLocal
-from backend.core.models import AnomalyEvent
-from sqlalchemy import func, distinct
+from backend.core.models import AnomalyEvent, AnomalyEventIssue
+from backend.core.pagination import keyset_page
+from backend.utils.helpers import decode_cursor, encode_cursor, parse_fields, parse_list
+from datetime import datetime
+from typing import Optional
 
 router = APIRouter(tags=["Anomalies"])
 
@@ -35,25 +39,61 @@ def latest_anomalies():
         })
     return {"data": formatted}
 
+@router.get("/incidents")
+def fleet_incidents(
+    limit: int = Query(50, ge=1, le=200),
+    kind: Optional[str] = Query(None, description="issue or station: only incidents matched by that key"),
+):
+    """
+    Correlated fleet incidents, newest first: simultaneous anomaly onsets
+    on several satellites sharing an issue or the ground station in view,
+    one incident per cluster.
+    """
+    return {"data": FLEET.recent(limit, kind), "late_onsets": FLEET.late}
+
+HISTORY_FIELDS = ("id", "timestamp", "satellite_id", "severity", "issues", "score",
+                  "last_seen", "ended_at", "sample_count")
+
+
 @router.get("/history")
-def get_anomaly_history(limit: int = Query(50, ge=1, le=200)):
+def get_anomaly_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    satellite_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    since_ms: Optional[int] = Query(None, description="Epoch ms, instead of since"),
+    until_ms: Optional[int] = Query(None, description="Epoch ms, instead of until"),
+    issue: Optional[str] = Query(None, description="Comma separated issue codes (any of)"),
+    severity: Optional[str] = Query(None, description="Comma separated severities (any of)"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+):
+    """
+    Anomaly history, newest first. Each row is an episode of one issue:
+    timestamp is when it started, ended_at is null while it is still open.
+    Issue filters go through the issue index, so they don't scan the table.
+    Pass the returned next_cursor back as cursor= to get the following page.
+    """
+    selected = parse_fields(fields, HISTORY_FIELDS)
     db = SessionLocal()
     try:
-        rows = (
-            db.query(AnomalyEvent)
-            .order_by(AnomalyEvent.id.desc())
-            .limit(limit)
-            .all()
+        rows, next_cursor = keyset_page(
+            db, AnomalyEvent, selected, limit,
+            cursor=decode_cursor(cursor),
+            since=since_ms if since_ms is not None else since,
+            until=until_ms if until_ms is not None else until,
+            satellite_id=satellite_id, issues=parse_list(issue), severities=parse_list(severity),
+            issue_index=AnomalyEventIssue,
         )
-        result = [
-            {
-                "timestamp": r.timestamp.isoformat() if r.timestamp else None,
-                "satellite_id": r.satellite_id,
-                "severity": r.severity,
-                "issues": r.issues.split(",") if r.issues else [],
-                "score": r.score,
-            } for r in rows
-        ]
-        return {"data": result}
+        for r in rows:
+            for key in ("timestamp", "last_seen", "ended_at"):
+                if r.get(key) is not None:
+                    r[key] = r[key].isoformat()
+            if "issues" in r:
+                r["issues"] = r["issues"].split(",") if r["issues"] else []
+        return {
+            "data": rows,
+            "next_cursor": encode_cursor(*next_cursor) if next_cursor else None,
+        }
     finally:
         db.close()
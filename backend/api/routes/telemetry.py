@@ -1,9 +1,10 @@
 # backend/api/routes/telemetry.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+import asyncio
 import sys
 from pathlib import Path
 
@@ -12,11 +13,25 @@ project_root = Path(__file__).resolve().parent.parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from backend.services.preprocess import preprocess_telemetry
-from backend.services.anomaly_engine import compute_anomaly
+from backend.services.detection import detect_batch
+from backend.services.sharding import get_executor
 from backend.services.state import add_anomaly_record
+from backend.services.liveness import LIVENESS
+from backend.services.satellite_registry import SATELLITE_REGISTRY
+from backend.services.passes import to_epoch, track_orbit
+from backend.services.contact import CONTACTS
+from backend.services.response_cache import bump_data_version
+from backend.services.episodes import EpisodeTracker
+from backend.services.hot_window import HOT_WINDOW
+from backend.services.shard_state import ShardUnavailable, on_owner
+from backend.services.fleet import FLEET
+from backend.core.config import EPISODE_MAX_GAP_S, INGEST_TIMEOUT_S
+from backend.core.compact import intern_names
 from backend.core.database import SessionLocal
-from backend.core.models import AnomalyEvent, Telemetry
+# ORM row class; the name Telemetry is the request schema below
+from backend.core.models import AnomalyEvent, Telemetry as TelemetryRow
+from backend.core.pagination import keyset_page
+from backend.utils.helpers import decode_cursor, encode_cursor, parse_fields
 from backend.core.logger import logger
 from datetime import datetime
 
@@ -24,6 +39,9 @@ from datetime import datetime
 # Single router for telemetry
 router = APIRouter(tags=["Telemetry"])
 
+# open anomaly episodes of anomaly_events (loaded at startup, see api/main.py)
+EPISODES = EpisodeTracker(AnomalyEvent, "issues", EPISODE_MAX_GAP_S)
+
 
 # ----- Pydantic schema -----
 class Telemetry(BaseModel):
@@ -51,6 +69,78 @@ class Telemetry(BaseModel):
     comms_packet_loss: float
 
 
+def _parse_timestamp(value):
+    # Convert timestamp string to datetime if needed
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            return datetime.utcnow()
+    return value
+
+
+async def _detect(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run detection on the sharded workers when they are enabled,
+    otherwise in this process.
+    """
+    executor = get_executor()
+    if executor is not None:
+        try:
+            results = await asyncio.wait_for(asyncio.wrap_future(executor.submit_batch(payloads)),
+                                             INGEST_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="ingest shard did not answer in time")
+    else:
+        results = detect_batch(payloads)
+
+    # comms gaps are scored here: the pass tables live in this process
+    for anomaly, (score, message) in zip(results, CONTACTS.score_batch(payloads)):
+        anomaly["comms"] = {"score": score, "message": message}
+    return results
+
+
+def _store_records(records: List[Dict[str, Any]]):
+    """
+    Add records to in-memory state and persist them to DB in one commit.
+    """
+    for record in records:
+        add_anomaly_record(record)
+        timestamp = _parse_timestamp(record["timestamp"])
+        LIVENESS.seen(record["satellite_id"], to_epoch(timestamp))
+        # the liveness flush only UPDATEs rows; the registry inserts new satellites
+        SATELLITE_REGISTRY.seen(record["satellite_id"], timestamp, record["anomaly"].get("severity", "normal"))
+
+    # new dictionary entries go in before the write transaction
+    intern_names(
+        (record["satellite_id"] for record in records),
+        (issue for record in records for issue in record["anomaly"].get("issues", [])),
+    )
+    db = SessionLocal()
+    try:
+        # rows are per (satellite, issue) episode, not per sample
+        opened = EPISODES.observe(db, [
+            (
+                record["satellite_id"],
+                _parse_timestamp(record["timestamp"]),
+                record["anomaly"].get("issues", []),
+                record["anomaly"].get("severity", "normal"),
+                float(record["anomaly"].get("score", 0.0)),
+            )
+            for record in records
+        ])
+        # read before commit expires the rows
+        onsets = [(row.satellite_id, row.timestamp, row.issues) for row in opened]
+        db.commit()
+        EPISODES.commit(db)
+    finally:
+        # no-op after a successful commit
+        EPISODES.rollback(db)
+        db.close()
+    FLEET.observe(onsets)
+    bump_data_version()
+
+
 # ----- Main endpoint -----
 @router.post("/", status_code=200)
 async def receive_telemetry(data: Telemetry):
@@ -63,12 +153,11 @@ async def receive_telemetry(data: Telemetry):
 
         # Convert to dict for downstream functions
         payload: Dict[str, Any] = data.dict()
+        track_orbit(payload)
+        HOT_WINDOW.append_payloads([payload])
 
-        # 1) Preprocess features (expects dict)
-        features = preprocess_telemetry(payload)
-
-        # 2) Run anomaly engine (make sure this works with dict, not attributes!)
-        anomaly: Dict[str, Any] = compute_anomaly(features)
+        # 1) Preprocess + run anomaly engine (in-process or on the satellite's shard)
+        anomaly: Dict[str, Any] = (await _detect([payload]))[0]
 
         # Prepare record to keep history
         record = {
@@ -77,75 +166,138 @@ async def receive_telemetry(data: Telemetry):
             "anomaly": anomaly,
         }
 
-        # 3) Add to in-memory state
-        add_anomaly_record(record)
-
-        # 4) Persist to DB
-        db = SessionLocal()
-        try:
-            # Convert timestamp string to datetime if needed
-            timestamp = data.timestamp
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
-                    timestamp = datetime.utcnow()
-            
-            db_event = AnomalyEvent(
-                timestamp=timestamp,
-                satellite_id=data.satellite_id,
-                severity=anomaly.get("severity", "normal"),
-                issues=",".join(anomaly.get("issues", [])),
-                score=float(anomaly.get("score", 0.0)),
-            )
-            db.add(db_event)
-            db.commit()
-        finally:
-            db.close()
+        # 2) Add to in-memory state and persist to DB
+        _store_records([record])
 
         return {"status": "ok", **record}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /telemetry: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/latest")
-def get_latest_telemetry(limit: int = 10):
+@router.post("/batch", status_code=200)
+async def receive_telemetry_batch(data: List[Telemetry]):
     """
-    Get the latest telemetry records from the database.
-    Returns the most recent telemetry data for all satellites.
+    Ingest a batch of telemetry samples. Samples for the same satellite are
+    processed in the order given; the batch is persisted in one commit.
     """
-    db = SessionLocal()
     try:
-        rows = (
-            db.query(Telemetry)
-            .order_by(Telemetry.timestamp.desc())
-            .limit(limit)
-            .all()
-        )
-        result = [
+        payloads = [d.dict() for d in data]
+        for p in payloads:
+            track_orbit(p)
+        HOT_WINDOW.append_payloads(payloads)
+        anomalies = await _detect(payloads)
+
+        records = [
             {
-                "timestamp": r.timestamp.isoformat() if r.timestamp else None,
-                "satellite_id": r.satellite_id,
-                "position_x": r.position_x,
-                "position_y": r.position_y,
-                "position_z": r.position_z,
-                "velocity_x": r.velocity_x,
-                "velocity_y": r.velocity_y,
-                "velocity_z": r.velocity_z,
-                "temperature": r.temperature,
-                "rssi": r.rssi,
-                "snr": r.snr,
-                "packet_loss": r.packet_loss,
-                "battery_voltage": r.battery_voltage,
-                "solar_panel_current": r.solar_panel_current,
+                "timestamp": p["timestamp"],
+                "satellite_id": p["satellite_id"],
+                "anomaly": a,
             }
-            for r in rows
+            for p, a in zip(payloads, anomalies)
         ]
-        return {"data": result}
+        _store_records(records)
+
+        return {"status": "ok", "count": len(records), "data": records}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in /telemetry/batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+LATEST_FIELDS = (
+    "id", "timestamp", "satellite_id",
+    "position_x", "position_y", "position_z",
+    "velocity_x", "velocity_y", "velocity_z",
+    "temperature", "rssi", "snr", "packet_loss",
+    "battery_voltage", "solar_panel_current",
+)
+
+
+@router.get("/latest")
+def get_latest_telemetry(
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    satellite_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+):
+    """
+    Get the latest telemetry records from the database, newest first.
+    Pass the returned next_cursor back as cursor= for the next page.
+    """
+    selected = parse_fields(fields, LATEST_FIELDS)
+    db = SessionLocal()
+    try:
+        rows, next_cursor = keyset_page(
+            db, TelemetryRow, selected, limit,
+            cursor=decode_cursor(cursor), since=since, until=until, satellite_id=satellite_id,
+        )
+        for r in rows:
+            if r.get("timestamp") is not None:
+                r["timestamp"] = r["timestamp"].isoformat()
+        return {
+            "data": rows,
+            "next_cursor": encode_cursor(*next_cursor) if next_cursor else None,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /telemetry/latest: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         db.close()
+
+
+@router.get("/window")
+def get_window_stats():
+    """
+    Size and compression of the in-memory hot window.
+    """
+    return HOT_WINDOW.stats()
+
+
+@router.get("/window/{satellite_id}")
+def get_window(
+    satellite_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma separated channels to return"),
+):
+    """
+    Raw recent telemetry of one satellite from the hot window, oldest first,
+    as column arrays (timestamps in epoch milliseconds).
+    """
+    selected = parse_fields(fields, HOT_WINDOW.channels)
+    ts, values = HOT_WINDOW.read(
+        satellite_id,
+        since_ms=int(to_epoch(since) * 1000) if since else None,
+        until_ms=int(to_epoch(until) * 1000) if until else None,
+        channels=selected,
+    )
+    return {
+        "satellite_id": satellite_id,
+        "timestamps": ts.tolist(),
+        **{name: values[:, j].tolist() for j, name in enumerate(selected)},
+    }
+
+
+@router.get("/features/{satellite_id}")
+def get_features(satellite_id: str):
+    """
+    Latest derived features of one satellite from the feature store (kept
+    by whichever process runs detection).
+    """
+    try:
+        features = on_owner(satellite_id, "features", satellite_id)
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if features is None:
+        raise HTTPException(status_code=404, detail=f"No features for {satellite_id}")
+    return {"satellite_id": satellite_id, "features": features}
@@ -0,0 +1,113 @@
+# backend/api/routes/thresholds.py
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+import sys
+from pathlib import Path
+
+# Add project root to path to allow imports
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from backend.services.thresholds import ALL_SATELLITES, LEARNERS, ThresholdLearner
+from backend.services.shard_state import (
+    ShardUnavailable, merge_forecasts, merge_overrides, merge_threshold_exports, on_all, on_owner,
+)
+
+router = APIRouter(tags=["Thresholds"])
+
+# Learned thresholds and forecasts live in the process that runs detection;
+# with INGEST_WORKERS > 0 that is the shard workers, so every read and write
+# below goes through shard_state.
+
+
+class OverrideRequest(BaseModel):
+    channel: str
+    satellite_id: str = ALL_SATELLITES
+    learner: str = "features"
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+
+def _learner(name: str):
+    if name not in LEARNERS:
+        raise HTTPException(status_code=404, detail=f"Unknown threshold set '{name}'")
+    return LEARNERS[name]
+
+
+def _shards(call, *args):
+    try:
+        return call(*args)
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/export")
+def export_thresholds():
+    """
+    Learned sketches and overrides of every threshold set, as JSON.
+    """
+    return merge_threshold_exports(_shards(on_all, "export_thresholds"))
+
+
+@router.post("/import")
+def import_thresholds(payload: Dict[str, Dict[str, Any]]):
+    for name, data in payload.items():
+        try:
+            # checked on a scratch learner first, so a bad payload changes nothing anywhere
+            ThresholdLearner(_learner(name).channels).import_json(data)
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid export for '{name}': {e}")
+    # each shard keeps the satellites it owns
+    _shards(on_all, "import_thresholds", payload)
+    return {"status": "ok", "imported": list(payload)}
+
+
+@router.get("/overrides")
+def get_overrides():
+    return merge_overrides(_shards(on_all, "overrides"))
+
+
+@router.put("/overrides")
+def set_override(payload: OverrideRequest):
+    """
+    Pin a channel's limits for one satellite (or "*" for all); null clears.
+    """
+    learner = _learner(payload.learner)
+    if payload.channel not in learner.channels:
+        raise HTTPException(status_code=400, detail=f"Unknown channel '{payload.channel}'")
+    args = ("set_override", payload.learner, payload.satellite_id, payload.channel, payload.low, payload.high)
+    if payload.satellite_id == ALL_SATELLITES:
+        _shards(on_all, *args)
+    else:
+        _shards(on_owner, payload.satellite_id, *args)
+    return {"status": "ok", **payload.dict()}
+
+
+@router.get("/forecast")
+def get_breach_forecasts(horizon_s: Optional[float] = None, events: int = 50):
+    """
+    Predicted limit breaches within the horizon, soonest first, and the
+    latest breach alerts, per threshold set.
+    """
+    return merge_forecasts(_shards(on_all, "forecasts", horizon_s, events), events)
+
+
+@router.get("/forecast/{satellite_id}")
+def get_breach_forecast(satellite_id: str):
+    """
+    Per-channel trend (level, slope) and time-to-breach of a satellite.
+    """
+    forecasts = _shards(on_owner, satellite_id, "forecast", satellite_id)
+    if all(v is None for v in forecasts.values()):
+        raise HTTPException(status_code=404, detail=f"No forecast for {satellite_id}")
+    return {name: v for name, v in forecasts.items() if v is not None}
+
+
+@router.get("/{satellite_id}")
+def get_thresholds(satellite_id: str):
+    """
+    Effective limits per channel for a satellite, with sample counts.
+    """
+    return _shards(on_owner, satellite_id, "thresholds", satellite_id)
@@ -0,0 +1,271 @@
+"""
+Compact storage encodings for the telemetry and anomaly tables.
+
+The column types below keep the Python-side values, and so every query and
+API response, unchanged while the rows store small integers:
+
+- satellite ids are interned in the satellite_keys dimension table and
+  stored as its integer key
+- severity is a SMALLINT code (SEVERITY_CODES)
+- issues are a bitmask over the issue_codes dimension table (one bit per
+  distinct issue, at most 63); issue_index.py maintains the per-issue index
+- timestamps are int64 epoch milliseconds (naive UTC datetimes in Python)
+
+Dictionaries are cached in memory. Only names new to this process touch
+the DB: they are added with INSERT OR IGNORE in a short transaction of
+their own and the table is re-read, so processes sharing the file agree
+on keys. SQLite has a single writer, so ingest paths intern new names
+(intern_names) before they start writing; a bind-time miss inside a write
+transaction would have to wait for that transaction's own lock.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import BigInteger, Integer, SmallInteger, inspect, text
+from sqlalchemy.types import TypeDecorator
+
+from .database import engine
+
+SEVERITY_CODES = {"normal": 0, "warning": 1, "critical": 2}
+SEVERITY_NAMES = {code: name for name, code in SEVERITY_CODES.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+MAX_ISSUE_CODES = 63
+
+
+def to_epoch_ms(ts: datetime) -> int:
+    """
+    datetime (naive = UTC) -> epoch milliseconds.
+    """
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // timedelta(milliseconds=1)
+
+
+def from_epoch_ms(ms: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=int(ms))
+
+
+class Dictionary:
+    """
+    name <-> integer key mapping backed by a dimension table.
+    """
+
+    def __init__(self, table: str, key_column: str, name_column: str):
+        self.table = table
+        self.key_column = key_column
+        self.name_column = name_column
+        self._keys: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, conn):
+        rows = conn.execute(text(f"SELECT {self.key_column}, {self.name_column} FROM {self.table}")).all()
+        self._keys.update({name: key for key, name in rows})
+        self._names.update({key: name for key, name in rows})
+
+    def intern(self, names: Iterable[str]) -> Dict[str, int]:
+        names = list(dict.fromkeys(names))
+        missing = [n for n in names if n not in self._keys]
+        if missing:
+            with self._lock, engine.begin() as conn:
+                conn.execute(
+                    text(f"INSERT OR IGNORE INTO {self.table} ({self.name_column}) VALUES (:name)"),
+                    [{"name": n} for n in missing],
+                )
+                self._load(conn)
+        return {n: self._keys[n] for n in names}
+
+    def key(self, name: str) -> int:
+        key = self._keys.get(name)
+        return key if key is not None else self.intern([name])[name]
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        Key of a name, or None if it was never interned (nothing is added).
+        """
+        key = self._keys.get(name)
+        if key is None:
+            with self._lock, engine.connect() as conn:
+                self._load(conn)
+            key = self._keys.get(name)
+        return key
+
+    def name(self, key: int) -> str:
+        name = self._names.get(key)
+        if name is None:
+            # added by another process
+            with self._lock, engine.connect() as conn:
+                self._load(conn)
+            name = self._names[key]
+        return name
+
+
+SATELLITES = Dictionary("satellite_keys", "id", "satellite_id")
+ISSUES = Dictionary("issue_codes", "id", "issue")
+
+
+def intern_names(satellite_ids: Iterable[str] = (), issues: Iterable[str] = ()):
+    """
+    Add new satellites / issues to the dictionaries ahead of a write
+    transaction.
+    """
+    SATELLITES.intern(s for s in satellite_ids if s is not None)
+    ISSUES.intern(i for i in issues if i)
+
+
+class SatelliteKey(TypeDecorator):
+    """satellite_id string stored as its satellite_keys id."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else SATELLITES.key(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else SATELLITES.name(value)
+
+
+class SeverityCode(TypeDecorator):
+    """severity string stored as a SMALLINT code."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value not in SEVERITY_CODES:
+            raise ValueError(f"unknown severity {value!r}")
+        return SEVERITY_CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else SEVERITY_NAMES[value]
+
+
+def _split_issues(value) -> List[str]:
+    # legacy rows were written with ", ".join
+    if isinstance(value, str):
+        value = value.split(",")
+    return [i.strip() for i in value if i and i.strip()]
+
+
+class IssueKey(TypeDecorator):
+    """single issue stored as its issue_codes id."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else ISSUES.key(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else ISSUES.name(value)
+
+
+class IssueMask(TypeDecorator):
+    """comma separated issues stored as a bitmask over issue_codes."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        mask = 0
+        for key in ISSUES.intern(_split_issues(value)).values():
+            if key > MAX_ISSUE_CODES:
+                raise ValueError(f"more than {MAX_ISSUE_CODES} distinct issue codes")
+            mask |= 1 << (key - 1)
+        return mask
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        names, key = [], 1
+        while value:
+            if value & 1:
+                names.append(ISSUES.name(key))
+            value >>= 1
+            key += 1
+        return ",".join(names)
+
+
+class EpochMillis(TypeDecorator):
+    """naive UTC datetime stored as int64 epoch milliseconds."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return to_epoch_ms(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_epoch_ms(value)
+
+
+# ----- migration from the string / DATETIME row layout -----
+def _legacy(table: str) -> str:
+    return f"{table}_legacy"
+
+
+def migrate_legacy_tables(metadata, chunk_size: int = 5000):
+    """
+    Rebuild tables still in the old layout (satellite_id text column etc.):
+    the old table is renamed to <name>_legacy, the compact one created, and
+    rows are copied in chunks, then the legacy table is dropped. Resumes an
+    interrupted copy on the next start.
+    """
+    for table in metadata.sorted_tables:
+        if not any(isinstance(c.type, SatelliteKey) for c in table.columns):
+            continue
+        inspector = inspect(engine)
+        if inspector.has_table(table.name):
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            if "satellite_id" in existing and "satellite_key" not in existing:
+                with engine.begin() as conn:
+                    # index names stay with the renamed table; the new table reuses them
+                    for index in inspector.get_indexes(table.name):
+                        conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+                    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {_legacy(table.name)}"))
+                    table.create(bind=conn)
+        if inspect(engine).has_table(_legacy(table.name)):
+            _copy_legacy(table, chunk_size)
+
+
+def _copy_legacy(table, chunk_size: int):
+    legacy = _legacy(table.name)
+    issue_columns = [c.key for c in table.columns if isinstance(c.type, IssueMask)]
+    with engine.connect() as conn:
+        sats = conn.execute(text(f"SELECT DISTINCT satellite_id FROM {legacy}")).scalars().all()
+        issues = [
+            issue
+            for col in issue_columns
+            for value in conn.execute(text(f"SELECT DISTINCT {col} FROM {legacy}")).scalars()
+            if value
+            for issue in _split_issues(value)
+        ]
+        last_id = conn.execute(text(f"SELECT MAX(id) FROM {table.name}")).scalar() or 0
+    # dictionary inserts need the write lock, so they go before the copy
+    intern_names(sats, issues)
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(f"SELECT * FROM {legacy} WHERE id > :last ORDER BY id LIMIT :n"),
+                {"last": last_id, "n": chunk_size},
+            ).mappings().all()
+            if not rows:
+                conn.execute(text(f"DROP TABLE {legacy}"))
+                return
+            conn.execute(table.insert(), [_convert(table, row) for row in rows])
+        last_id = rows[-1]["id"]
+
+
+def _convert(table, row) -> Dict[str, Optional[object]]:
+    out = {}
+    for column in table.columns:
+        value = row.get(column.key)
+        if isinstance(column.type, EpochMillis) and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        out[column.key] = value
+    return out
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 import os
 from pathlib import Path
@@ -11,10 +11,59 @@ DB_URL = f"sqlite:///{DB_PATH}"
 engine = create_engine(
     DB_URL, connect_args={"check_same_thread": False}
 )
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _):
+    """
+    WAL lets readers and the retention job run alongside ingestion;
+    incremental auto_vacuum lets freed pages be returned without a full VACUUM
+    (only takes effect on a fresh database; convert older ones with core/vacuum.py).
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ensure_columns(metadata=None):
+    """
+    create_all() doesn't alter existing tables; add (nullable) columns that
+    were added to a model later.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in (metadata or Base.metadata).sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def ensure_indexes(metadata=None):
+    """
+    create_all() skips tables that already exist, so columns and indexes
+    added to a model later are created here, after tables still in the old
+    row layout are rebuilt in the compact one.
+    """
+    # compact.py / issue_index.py import this module for the engine
+    from .compact import migrate_legacy_tables
+    migrate_legacy_tables(metadata or Base.metadata)
+    ensure_columns(metadata)
+    for table in (metadata or Base.metadata).sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    from .issue_index import ensure_issue_indexes
+    ensure_issue_indexes()
+
+
 def get_db():
     """
     Dependency function to get database session.
@@ -0,0 +1,69 @@
+"""
+Inverted index from issue codes to anomaly rows.
+
+anomalies.issue_mask / anomaly_events.issue_mask hold a bitmask over
+issue_codes; filtering on it would scan the table. Each anomaly table has
+an index table (models.AnomalyIssue / AnomalyEventIssue) with one row per
+(row, issue), clustered on (issue_code, satellite_key, ts_ms, anomaly_id).
+
+SQLite triggers keep it in sync with every insert, delete and key update,
+whichever process or job writes: ingestion, retention, the legacy
+migration. Index rows are derived by expanding the mask against
+issue_codes. Tables that have rows but an empty index are backfilled at
+startup.
+"""
+from sqlalchemy import inspect, text
+
+from .database import engine
+
+# anomaly table -> its issue index table
+ISSUE_INDEXES = {
+    "anomalies": "anomaly_issues",
+    "anomaly_events": "anomaly_event_issues",
+}
+
+# the index keys can't be NULL in a WITHOUT ROWID table; 0 is no satellite / time
+_COLUMNS = "(issue_code, satellite_key, ts_ms, anomaly_id)"
+_VALUES = "c.id, COALESCE({row}.satellite_key, 0), COALESCE({row}.ts_ms, 0), {row}.id"
+_HAS_ISSUE = "{row}.issue_mask & (1 << (c.id - 1))"
+
+
+def _expand(row: str) -> str:
+    # one index row per bit set in the row's mask
+    return f"SELECT {_VALUES.format(row=row)} FROM issue_codes AS c WHERE {_HAS_ISSUE.format(row=row)}"
+
+
+def _trigger_sql(table: str, index: str):
+    insert = f"INSERT OR IGNORE INTO {index} {_COLUMNS} "
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN "
+        f"{insert}{_expand('NEW')}; END"
+    )
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE anomaly_id = OLD.id; END"
+    )
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF issue_mask, satellite_key, ts_ms ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE anomaly_id = OLD.id; "
+        f"{insert}{_expand('NEW')}; END"
+    )
+
+
+def ensure_issue_indexes():
+    """
+    Create the sync triggers and backfill empty indexes.
+    """
+    inspector = inspect(engine)
+    for table, index in ISSUE_INDEXES.items():
+        if not (inspector.has_table(table) and inspector.has_table(index)):
+            continue
+        with engine.begin() as conn:
+            for sql in _trigger_sql(table, index):
+                conn.execute(text(sql))
+            empty = conn.execute(text(f"SELECT 1 FROM {index} LIMIT 1")).first() is None
+            if empty:
+                conn.execute(text(
+                    f"INSERT OR IGNORE INTO {index} {_COLUMNS} SELECT {_VALUES.format(row='a')} "
+                    f"FROM {table} AS a JOIN issue_codes AS c ON {_HAS_ISSUE.format(row='a')}"
+                ))
@@ -1,18 +1,63 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import Integer, type_coerce
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 import random
+import sys
+from pathlib import Path
+
+# Add project root to path to allow backend.* imports
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 from core import models, schemas
-from core.database import engine, get_db
+from core.pagination import keyset_page
+from core.database import SessionLocal, engine, get_db, ensure_indexes
+from core.compact import SATELLITES, intern_names
+from backend.core.config import (
+    RETENTION_TELEMETRY_DAYS, RETENTION_CRITICAL_DAYS, RETENTION_WARNING_DAYS,
+    RETENTION_OTHER_DAYS, RETENTION_INTERVAL_S, RETENTION_CHUNK_SIZE,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_AGE_S,
+    SNAPSHOT_DIR, SNAPSHOT_INTERVAL_S, LIVENESS_TICK_S, PASS_INTERVAL_S, EPISODE_MAX_GAP_S,
+    MODEL_POLL_S, IFOREST_THRESHOLD, IFOREST_TREES, IFOREST_SAMPLE_SIZE,
+    TELEMETRY_COMPRESSION, TELEMETRY_TOLERANCES, TELEMETRY_MAX_GAP_S, SATELLITE_FLUSH_S,
+    CONJUNCTION_INTERVAL_S,
+)
+from backend.services.retention import RetentionWorker, default_policies
+from backend.services.response_cache import ResponseCache, ResponseCacheMiddleware, bump_data_version
+from backend.services.snapshot import SnapshotWriter, restore_snapshot
+from backend.services.stats import ANOMALY_STATS
+from backend.services.liveness import LIVENESS, LivenessWorker
+from backend.services.passes import PASSES, PassWorker, to_epoch, track_orbit
+from backend.services.contact import CONTACTS
+from backend.services.thresholds import CORE_THRESHOLDS
+from backend.services.forecast import CORE_FORECAST
+from backend.services.episodes import EpisodeTracker
+from backend.services.satellite_registry import SATELLITE_REGISTRY, SatelliteRegistryWorker
+from backend.services.fleet import FLEET
+from backend.services.conjunction import CONJUNCTIONS, ConjunctionWorker
+from backend.services.compression import SwingingDoorCompressor, parse_tolerances, reconstruct
+from backend.inference.registry import ModelWatcher
+from backend.inference.run_inference import MODELS, load_models, run_models
+from backend.utils.helpers import decode_cursor, encode_cursor, parse_fields, parse_list
 
 # Create tables
 models.Base.metadata.create_all(bind=engine)
+ensure_indexes()
 
 app = FastAPI(title="Satellite Anomaly Detector API")
 
+# Cache dashboard reads until the next ingest (added before CORS so CORS wraps it)
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_AGE_S)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    paths=["/satellites", "/anomalies", "/anomalies/latest", "/anomalies/stats", "/telemetry/latest"],
+    cache=response_cache,
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -20,8 +65,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+retention_worker = None
+snapshot_writer = None
+liveness_worker = None
+pass_worker = None
+model_watcher = None
+registry_worker = None
+conjunction_worker = None
+EPISODES = EpisodeTracker(models.Anomaly, "issue", EPISODE_MAX_GAP_S)
+
+def _on_liveness_event(event):
+    ANOMALY_STATS.set_online(event["satellite_id"], event["online"])
+
+LIVENESS.subscribe(_on_liveness_event)
+
 # Initialize some satellites on startup
 @app.on_event("startup")
 def startup_event():
@@ -41,9 +101,87 @@ def startup_event():
                 db.add(sat)
             db.commit()
             print("✅ Initialized satellites")
+
+        # stats counters: snapshot (if any) + rows added since it was taken
+        if SNAPSHOT_DIR:
+            restore_snapshot(SNAPSHOT_DIR)
+        ANOMALY_STATS.catch_up(db, models.Anomaly, models.Satellite)
+        EPISODES.load(db)
+        SATELLITE_REGISTRY.load(db, models.Satellite)
+
+        # is_online is derived from last_telemetry + timeout, not trusted from the table
+        LIVENESS.load({s.satellite_id: s.last_telemetry for s in SATELLITE_REGISTRY.records()})
+        for sat_id in LIVENESS.satellites():
+            ANOMALY_STATS.set_online(sat_id, LIVENESS.is_online(sat_id))
     finally:
         db.close()
 
+    global registry_worker
+    registry_worker = SatelliteRegistryWorker(SATELLITE_REGISTRY, SessionLocal, models.Satellite, SATELLITE_FLUSH_S)
+    registry_worker.start()
+
+    global liveness_worker
+    liveness_worker = LivenessWorker(LIVENESS, SessionLocal, models.Satellite, LIVENESS_TICK_S)
+    liveness_worker.start()
+
+    global pass_worker
+    pass_worker = PassWorker(PASSES, PASS_INTERVAL_S)
+    pass_worker.start()
+
+    global conjunction_worker
+    if CONJUNCTION_INTERVAL_S > 0:
+        conjunction_worker = ConjunctionWorker(CONJUNCTIONS, CONJUNCTION_INTERVAL_S)
+        conjunction_worker.start()
+
+    # newest trained model, then keep picking up new versions without a restart
+    global model_watcher
+    try:
+        load_models()
+    except Exception as e:
+        print(f"⚠️ Could not load isolation forest: {e}")
+    if MODEL_POLL_S > 0:
+        model_watcher = ModelWatcher(MODELS, MODEL_POLL_S)
+        model_watcher.start()
+
+    global snapshot_writer
+    if SNAPSHOT_DIR:
+        snapshot_writer = SnapshotWriter(SNAPSHOT_DIR, SNAPSHOT_INTERVAL_S)
+        snapshot_writer.start()
+
+    # background TTL deletes + incremental vacuum
+    global retention_worker
+    if RETENTION_INTERVAL_S > 0:
+        policies = default_policies(RETENTION_TELEMETRY_DAYS, RETENTION_CRITICAL_DAYS,
+                                    RETENTION_WARNING_DAYS, RETENTION_OTHER_DAYS)
+        retention_worker = RetentionWorker(engine, policies, RETENTION_INTERVAL_S, RETENTION_CHUNK_SIZE)
+        retention_worker.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if retention_worker is not None:
+        retention_worker.stop()
+    if snapshot_writer is not None:
+        snapshot_writer.stop()
+    # satellites first, so liveness updates of new ones find their rows
+    if registry_worker is not None:
+        registry_worker.stop()
+    if liveness_worker is not None:
+        liveness_worker.stop()
+    if pass_worker is not None:
+        pass_worker.stop()
+    if conjunction_worker is not None:
+        conjunction_worker.stop()
+    if model_watcher is not None:
+        model_watcher.stop()
+    # samples held back by the compressor become the last stored points
+    if COMPRESSOR is not None:
+        db = SessionLocal()
+        try:
+            db.add_all(models.Telemetry(**sample) for sample in COMPRESSOR.flush_all())
+            db.commit()
+        finally:
+            db.close()
+
 @app.get("/")
 def read_root():
     return {
@@ -56,11 +194,44 @@ def read_root():
 def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
 @app.get("/satellites", response_model=List[schemas.SatelliteResponse])
-def get_satellites(db: Session = Depends(get_db)):
-    """Get all satellites"""
-    satellites = db.query(models.Satellite).all()
-    return satellites
+def get_satellites():
+    """Get all satellites, with the next ground-station contact window (no DB reads)"""
+    return [
+        {
+            "satellite_id": s.satellite_id,
+            "is_online": LIVENESS.is_online(s.satellite_id),
+            "latest_severity": s.latest_severity,
+            "last_telemetry": s.last_telemetry,
+            **PASSES.contact_info(s.satellite_id),
+        }
+        for s in SATELLITE_REGISTRY.records()
+    ]
+
+@app.get("/thresholds/forecast")
+def get_breach_forecasts(horizon_s: Optional[float] = None, events: int = Query(50, ge=0, le=200)):
+    """Predicted limit breaches within the horizon (soonest first), and recent breach alerts"""
+    return {
+        "imminent": CORE_FORECAST.imminent(horizon_s),
+        "alerts": list(CORE_FORECAST.events)[::-1][:events],
+    }
+
+@app.get("/thresholds/forecast/{satellite_id}")
+def get_breach_forecast(satellite_id: str):
+    """Per-channel trend and time-to-breach of one satellite"""
+    forecast = CORE_FORECAST.forecast(satellite_id)
+    if forecast is None:
+        raise HTTPException(status_code=404, detail=f"No forecast for {satellite_id}")
+    return {"satellite_id": satellite_id, "channels": forecast}
+
+@app.get("/satellites/conjunctions")
+def get_conjunctions(satellite_id: Optional[str] = None):
+    """Predicted close approaches from the latest fleet screening, soonest first"""
+    return CONJUNCTIONS.latest(satellite_id)
 
 @app.post("/telemetry/")
 def receive_telemetry(data: schemas.TelemetrySchema, db: Session = Depends(get_db)):
@@ -70,46 +241,55 @@ def receive_telemetry(data: schemas.TelemetrySchema, db: Session = Depends(get_d
     if not data.timestamp:
         data.timestamp = datetime.utcnow()
     
-    # Store telemetry
-    telemetry = models.Telemetry(**data.dict())
-    db.add(telemetry)
+    # Store telemetry (with compression on, only the samples needed to
+    # interpolate the series within tolerance; detection below sees all)
+    sample = data.dict()
+    stored = COMPRESSOR.offer(data.satellite_id, sample) if COMPRESSOR is not None else [sample]
+    db.add_all(models.Telemetry(**s) for s in stored)
     
-    # Update satellite status
-    satellite = db.query(models.Satellite).filter(
-        models.Satellite.satellite_id == data.satellite_id
-    ).first()
-    
-    if satellite:
-        satellite.last_telemetry = data.timestamp
-        satellite.is_online = True
-    else:
-        satellite = models.Satellite(
-            satellite_id=data.satellite_id,
-            is_online=True,
-            last_telemetry=data.timestamp
-        )
-        db.add(satellite)
+    LIVENESS.seen(data.satellite_id, to_epoch(data.timestamp))
+    track_orbit(data.dict())
     
     # Anomaly detection logic
     issues = []
     score = 0.0
     severity = "normal"
 
-    if data.temperature and data.temperature > 70:
+    # limits are learned per satellite (static defaults until enough history)
+    values = [data.temperature, data.packet_loss, data.battery_voltage, data.rssi]
+    observed = [float("nan") if v is None else v for v in values]
+    low, high = (dict(zip(CORE_THRESHOLDS.channels, v[0])) for v in CORE_THRESHOLDS.limits([data.satellite_id]))
+    # trend towards those limits: flags a breach before it happens
+    forecast = CORE_FORECAST.update([data.satellite_id], [data.timestamp], [observed])[0]
+    CORE_THRESHOLDS.update([data.satellite_id], [observed])
+
+    if data.temperature and data.temperature > high["temperature"]:
         issues.append("High Temperature")
         score += 0.6
-    if data.temperature and data.temperature < -20:
+    if data.temperature and data.temperature < low["temperature"]:
         issues.append("Low Temperature")
         score += 0.5
-    if data.packet_loss and data.packet_loss > 10:
+    if data.packet_loss and data.packet_loss > high["packet_loss"]:
         issues.append("High Packet Loss")
         score += 0.8
-    if data.battery_voltage and data.battery_voltage < 20:
+    if data.battery_voltage and data.battery_voltage < low["battery_voltage"]:
         issues.append("Low Battery")
         score += 0.7
-    if data.rssi and data.rssi < -100:
+    if data.rssi and data.rssi < low["rssi"]:
         issues.append("Weak Signal")
         score += 0.4
+    # gaps are only scored while a ground station should have had contact
+    comms_score, _ = CONTACTS.score(data.satellite_id, data.timestamp)
+    if comms_score >= 0.6:
+        issues.append("Unexpected Outage")
+        score += 0.5
+    if forecast["flagged"]:
+        issues.append("Predicted Limit Breach")
+        score += 0.3
+    iforest = run_models([data.dict()])
+    if iforest is not None and iforest[0] >= IFOREST_THRESHOLD:
+        issues.append("Unusual Telemetry Pattern")
+        score += 0.5
 
     # Determine severity
     if score >= 0.8:
@@ -119,26 +299,29 @@ def receive_telemetry(data: schemas.TelemetrySchema, db: Session = Depends(get_d
     elif len(issues) > 0:
         severity = "warning"
 
-    # Store anomaly if detected
-    anomaly_id = None
-    if issues:
-        anomaly = models.Anomaly(
-            satellite_id=data.satellite_id,
-            severity=severity,
-            issue=", ".join(issues),
-            score=score,
-            timestamp=data.timestamp
-        )
-        db.add(anomaly)
+    # new dictionary entries go in before this session starts writing
+    intern_names([data.satellite_id], issues)
+    # One row per (satellite, issue) episode: opened, updated in place, closed when it clears.
+    # The episode write is the first of this transaction (see episodes.py).
+    try:
+        opened = EPISODES.observe(db, [(data.satellite_id, data.timestamp, issues, severity, score)])
+        # read before commit expires the rows
+        onsets = [(a.satellite_id, a.timestamp, a.issue) for a in opened]
         db.commit()
-        db.refresh(anomaly)
-        anomaly_id = anomaly.id
-        
-        # Update satellite severity
-        if satellite:
-            satellite.latest_severity = severity
-    
-    db.commit()
+        changes = EPISODES.commit(db)
+    finally:
+        EPISODES.rollback(db)
+    # stats count each episode at its current peak, like a GROUP BY over the table
+    for change in changes:
+        ANOMALY_STATS.record_anomaly(change.started, change.severity, change.score,
+                                     change.row_id, ended=change.ended)
+    anomaly_id = EPISODES.episode_id(data.satellite_id, issues[0]) if issues else None
+
+    # satellite status lives in the registry; its worker writes it out in batches
+    SATELLITE_REGISTRY.seen(data.satellite_id, data.timestamp, severity if issues else None)
+
+    FLEET.observe(onsets)
+    bump_data_version()
     
     return {
         "status": "ok",
@@ -146,23 +329,68 @@ def receive_telemetry(data: schemas.TelemetrySchema, db: Session = Depends(get_d
         "severity": severity,
         "score": score,
         "issues": issues,
-        "anomaly_id": anomaly_id
+        "anomaly_id": anomaly_id,
+        "time_to_breach_s": forecast["eta_s"],
+        "breach_channel": forecast["channel"]
     }
 
-@app.get("/anomalies", response_model=List[schemas.AnomalyResponse])
+ANOMALY_FIELDS = tuple(schemas.AnomalyResponse.model_fields)
+
+@app.get("/models")
+def get_models():
+    """Model versions on disk, the active one, and per-version load/latency stats"""
+    return MODELS.status()
+
+@app.post("/models/train")
+def train_model(limit: int = Query(50000, ge=2), activate: bool = False):
+    """Train a new isolation forest version on stored telemetry"""
+    try:
+        version = MODELS.train_from_db(SessionLocal, models.Telemetry, limit=limit,
+                                       n_trees=IFOREST_TREES, sample_size=IFOREST_SAMPLE_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if activate:
+        MODELS.activate(version)
+    return {"version": version, **MODELS.status()}
+
+@app.post("/models/{version}/activate")
+def activate_model(version: int):
+    """Hot-swap to a stored model version"""
+    if version not in MODELS.versions():
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    return MODELS.activate(version).to_dict()
+
+@app.get("/anomalies", response_model=List[schemas.AnomalyFieldsResponse], response_model_exclude_unset=True)
 def get_anomalies(
+    response: Response,
     satellite_id: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    issue: Optional[str] = None,
+    severity: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get anomalies, optionally filtered by satellite"""
-    query = db.query(models.Anomaly)
-    
-    if satellite_id:
-        query = query.filter(models.Anomaly.satellite_id == satellite_id)
-    
-    anomalies = query.order_by(models.Anomaly.timestamp.desc()).limit(limit).all()
-    return anomalies
+    """Get anomalies, newest first, optionally filtered by satellite, issues,
+    severities (comma separated, any of) and time range (datetimes or epoch ms).
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    rows, next_cursor = keyset_page(
+        db, models.Anomaly, parse_fields(fields, ANOMALY_FIELDS), limit,
+        cursor=decode_cursor(cursor),
+        since=since_ms if since_ms is not None else since,
+        until=until_ms if until_ms is not None else until,
+        satellite_id=satellite_id, issues=parse_list(issue), severities=parse_list(severity),
+        issue_index=models.AnomalyIssue,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_cursor)
+    return rows
 
 @app.get("/anomalies/latest")
 def get_latest_anomalies(limit: int = 10, db: Session = Depends(get_db)):
@@ -172,53 +400,92 @@ def get_latest_anomalies(limit: int = 10, db: Session = Depends(get_db)):
     ).limit(limit).all()
     return anomalies
 
+@app.get("/anomalies/incidents")
+def get_fleet_incidents(limit: int = Query(50, ge=1, le=200), kind: Optional[str] = None):
+    """Correlated fleet incidents (one per cluster sharing an issue or ground station), newest first"""
+    return FLEET.recent(limit, kind)
+
 @app.get("/anomalies/stats")
-def get_anomaly_stats(db: Session = Depends(get_db)):
-    """Get anomaly statistics"""
-    today = datetime.utcnow().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    total_today = db.query(models.Anomaly).filter(
-        models.Anomaly.timestamp >= today_start
-    ).count()
-    
-    critical_count = db.query(models.Anomaly).filter(
-        models.Anomaly.severity == "critical",
-        models.Anomaly.timestamp >= today_start
-    ).count()
-    
-    # Average score today
-    from sqlalchemy import func
-    avg_score = db.query(func.avg(models.Anomaly.score)).filter(
-        models.Anomaly.timestamp >= today_start
-    ).scalar() or 0.0
-    
-    # Online satellites
-    online_sats = db.query(models.Satellite).filter(
-        models.Satellite.is_online == True
-    ).count()
-    
-    return {
-        "total_anomalies_today": total_today,
-        "critical_anomalies": critical_count,
-        "average_score": round(avg_score, 2),
-        "online_satellites": online_sats
-    }
+def get_anomaly_stats():
+    """Get anomaly statistics (maintained incrementally on ingest)"""
+    return ANOMALY_STATS.summary()
+
+TELEMETRY_FIELDS = (
+    "id", "satellite_id", "temperature", "rssi", "snr", "packet_loss",
+    "position_x", "position_y", "position_z",
+    "velocity_x", "velocity_y", "velocity_z",
+    "battery_voltage", "solar_panel_current", "timestamp",
+)
+SERIES_CHANNELS = TELEMETRY_FIELDS[2:-1]
+
+COMPRESSOR = (
+    SwingingDoorCompressor(SERIES_CHANNELS, parse_tolerances(TELEMETRY_TOLERANCES), TELEMETRY_MAX_GAP_S)
+    if TELEMETRY_COMPRESSION else None
+)
 
 @app.get("/telemetry/latest")
 def get_latest_telemetry(
+    response: Response,
     satellite_id: Optional[str] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get latest telemetry data"""
-    query = db.query(models.Telemetry)
-    
-    if satellite_id:
-        query = query.filter(models.Telemetry.satellite_id == satellite_id)
-    
-    telemetry = query.order_by(models.Telemetry.timestamp.desc()).limit(limit).all()
-    return telemetry
+    """Get latest telemetry data (cursor in the X-Next-Cursor header)"""
+    rows, next_cursor = keyset_page(
+        db, models.Telemetry, parse_fields(fields, TELEMETRY_FIELDS), limit,
+        cursor=decode_cursor(cursor), since=since, until=until, satellite_id=satellite_id,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_cursor)
+    return rows
+
+@app.get("/telemetry/series")
+def get_telemetry_series(
+    satellite_id: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+    step_s: float = Query(60.0, gt=0),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Telemetry resampled every step_s seconds, interpolated from stored samples"""
+    until = until or (datetime.now(timezone.utc) if since.tzinfo else datetime.utcnow())
+    n = int((until - since).total_seconds() // step_s) + 1
+    if n < 1 or n > 10000:
+        raise HTTPException(status_code=400, detail="since/until/step_s must give 1..10000 points")
+    channels = parse_fields(fields, SERIES_CHANNELS)
+    columns = [getattr(models.Telemetry, c) for c in channels]
+    # compared as the stored key: binding the id would intern unknown satellites
+    sat_key = SATELLITES.lookup(satellite_id)
+    rows = []
+    if sat_key is not None:
+        # the stored neighbours just outside the range are needed to interpolate its edges
+        t = models.Telemetry
+        base = db.query(t.timestamp, *columns).filter(type_coerce(t.satellite_id, Integer) == sat_key)
+        before = base.filter(t.timestamp < since).order_by(t.timestamp.desc()).first()
+        after = base.filter(t.timestamp > until).order_by(t.timestamp.asc()).first()
+        rows = base.filter(t.timestamp >= since, t.timestamp <= until).order_by(t.timestamp.asc()).all()
+        rows = ([before] if before else []) + rows + ([after] if after else [])
+    pending = COMPRESSOR.pending(satellite_id) if COMPRESSOR is not None else None
+    if pending is not None and (not rows or to_epoch(pending["timestamp"]) > to_epoch(rows[-1][0])):
+        rows.append((pending["timestamp"], *(pending[c] for c in channels)))
+
+    query = [since + timedelta(seconds=i * step_s) for i in range(n)]
+    values = reconstruct(
+        [r[0] for r in rows],
+        [[float("nan") if v is None else v for v in r[1:]] for r in rows],
+        query,
+        channels=len(channels),
+    )
+    return {
+        "satellite_id": satellite_id,
+        "timestamps": [q.isoformat() for q in query],
+        **{c: [None if v != v else float(v) for v in values[:, j]] for j, c in enumerate(channels)},
+    }
 
 # Simulator endpoint for demo
 @app.post("/simulator/generate")
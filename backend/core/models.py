@@ -1,11 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index
 from datetime import datetime
 from .database import Base
+from .compact import EpochMillis, IssueKey, IssueMask, SatelliteKey, SeverityCode
+
+# Telemetry / anomaly rows store compact encodings (see compact.py); the
+# attributes keep their string / datetime values. The (satellite, timestamp)
+# index also serves satellite-only lookups and id is the rowid, so neither
+# gets an index of its own.
 
 class Telemetry(Base):
     __tablename__ = "telemetry"
-    id = Column(Integer, primary_key=True, index=True)
-    satellite_id = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    satellite_id = Column("satellite_key", SatelliteKey, key="satellite_id")
     temperature = Column(Float, nullable=True)
     rssi = Column(Float, nullable=True)
     snr = Column(Float, nullable=True)
@@ -18,16 +24,25 @@ class Telemetry(Base):
     velocity_z = Column(Float, nullable=True)
     battery_voltage = Column(Float, nullable=True)
     solar_panel_current = Column(Float, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column("ts_ms", EpochMillis, key="timestamp", default=datetime.utcnow, index=True)
+
+    # per-satellite keyset pages; (timestamp) alone already carries the rowid
+    __table_args__ = (Index("ix_telemetry_satellite_ts", "satellite_id", "timestamp"),)
 
 class Anomaly(Base):
     __tablename__ = "anomalies"
-    id = Column(Integer, primary_key=True, index=True)
-    satellite_id = Column(String, index=True)
-    severity = Column(String)
-    issue = Column(String)
+    id = Column(Integer, primary_key=True)
+    satellite_id = Column("satellite_key", SatelliteKey, key="satellite_id")
+    severity = Column("severity_code", SeverityCode, key="severity")
+    issue = Column("issue_mask", IssueMask, key="issue")
     score = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    # episode: timestamp is when the issue started, ended_at is NULL while open
+    timestamp = Column("ts_ms", EpochMillis, key="timestamp", default=datetime.utcnow, index=True)
+    last_seen = Column("last_seen_ms", EpochMillis, key="last_seen", nullable=True)
+    ended_at = Column("ended_ms", EpochMillis, key="ended_at", nullable=True)
+    sample_count = Column(Integer, default=1)
+
+    __table_args__ = (Index("ix_anomalies_satellite_ts", "satellite_id", "timestamp"),)
 
 class Satellite(Base):
     __tablename__ = "satellites"
@@ -35,4 +50,59 @@ class Satellite(Base):
     satellite_id = Column(String, unique=True, index=True)
     is_online = Column(Boolean, default=True)
     latest_severity = Column(String, default="normal")
-    last_telemetry = Column(DateTime, nullable=True)
\ No newline at end of file
+    last_telemetry = Column(DateTime, nullable=True)
+
+class AnomalyEvent(Base):
+    __tablename__ = "anomaly_events"
+    id = Column(Integer, primary_key=True)
+    satellite_id = Column("satellite_key", SatelliteKey, key="satellite_id")
+    severity = Column("severity_code", SeverityCode, key="severity")
+    issues = Column("issue_mask", IssueMask, key="issues")
+    score = Column(Float)
+    # episode: timestamp is when the issue started, ended_at is NULL while open
+    timestamp = Column("ts_ms", EpochMillis, key="timestamp", default=datetime.utcnow, index=True)
+    last_seen = Column("last_seen_ms", EpochMillis, key="last_seen", nullable=True)
+    ended_at = Column("ended_ms", EpochMillis, key="ended_at", nullable=True)
+    sample_count = Column(Integer, default=1)
+
+    __table_args__ = (Index("ix_anomaly_events_satellite_ts", "satellite_id", "timestamp"),)
+
+# dimension tables of the compact encodings
+class SatelliteKeyRow(Base):
+    __tablename__ = "satellite_keys"
+    id = Column(Integer, primary_key=True)
+    satellite_id = Column(String, unique=True, nullable=False)
+
+class IssueCode(Base):
+    __tablename__ = "issue_codes"
+    id = Column(Integer, primary_key=True)
+    issue = Column(String, unique=True, nullable=False)
+
+# issue indexes: one row per (anomaly row, issue), kept in sync by triggers
+# (issue_index.py). Clustered on (issue, satellite, time) without a rowid,
+# so a filtered page is a range scan in timestamp order.
+class AnomalyIssue(Base):
+    __tablename__ = "anomaly_issues"
+    issue = Column("issue_code", IssueKey, key="issue", primary_key=True)
+    satellite_id = Column("satellite_key", SatelliteKey, key="satellite_id", primary_key=True)
+    timestamp = Column("ts_ms", EpochMillis, key="timestamp", primary_key=True)
+    anomaly_id = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_anomaly_issues_issue_ts", "issue", "timestamp", "anomaly_id"),
+        Index("ix_anomaly_issues_anomaly", "anomaly_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+class AnomalyEventIssue(Base):
+    __tablename__ = "anomaly_event_issues"
+    issue = Column("issue_code", IssueKey, key="issue", primary_key=True)
+    satellite_id = Column("satellite_key", SatelliteKey, key="satellite_id", primary_key=True)
+    timestamp = Column("ts_ms", EpochMillis, key="timestamp", primary_key=True)
+    anomaly_id = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_anomaly_event_issues_issue_ts", "issue", "timestamp", "anomaly_id"),
+        Index("ix_anomaly_event_issues_anomaly", "anomaly_id"),
+        {"sqlite_with_rowid": False},
+    )
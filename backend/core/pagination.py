@@ -0,0 +1,110 @@
+"""
+Keyset (cursor) pagination over (timestamp, id) for the history endpoints.
+"""
+import heapq
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Integer, SmallInteger, literal, select, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+from .compact import ISSUES, SATELLITES, SEVERITY_CODES
+
+# datetimes, or epoch milliseconds as stored
+TimeBound = Union[datetime, int]
+
+
+def keyset_page(
+    db: Session,
+    model,
+    fields: Sequence[str],
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    since: Optional[TimeBound] = None,
+    until: Optional[TimeBound] = None,
+    satellite_id: Optional[str] = None,
+    issues: Optional[Sequence[str]] = None,
+    severities: Optional[Sequence[str]] = None,
+    issue_index=None,
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[datetime, int]]]:
+    """
+    One page of rows, newest first, ordered by (timestamp, id).
+
+    Only the requested columns are selected and rows come back as plain
+    dicts (no ORM objects). The cursor is the (timestamp, id) of the last
+    row of the previous page, so each page is an index range scan no
+    matter how deep it is. Returns (rows, next_cursor).
+
+    Filtering by issues needs the model's issue index table (issue_index):
+    each issue's page is read off the index in (timestamp, id) order and
+    joined to the rows, and several issues are merged. Unknown satellites,
+    issues or severities match nothing.
+    """
+    # filter values are compared as stored keys; unknown names must not be interned
+    sat_key = None
+    if satellite_id:
+        sat_key = SATELLITES.lookup(satellite_id)
+        if sat_key is None:
+            return [], None
+    issue_keys = None
+    if issues:
+        issue_keys = [k for k in map(ISSUES.lookup, issues) if k is not None]
+        if not issue_keys:
+            return [], None
+    severity_codes = None
+    if severities:
+        severity_codes = [SEVERITY_CODES[s] for s in severities if s in SEVERITY_CODES]
+        if not severity_codes:
+            return [], None
+
+    def page(issue_key: Optional[int]):
+        # key_* are the columns the satellite / range filters, cursor and order apply to
+        columns = [getattr(model, f) for f in fields]
+        if issue_key is None:
+            key_ts, key_id, key_sat = model.timestamp, model.id, model.satellite_id
+            stmt = select(*columns, key_ts.label("_ts"), key_id.label("_id"))
+        else:
+            key_ts, key_id, key_sat = issue_index.timestamp, issue_index.anomaly_id, issue_index.satellite_id
+            stmt = (
+                select(*columns, key_ts.label("_ts"), key_id.label("_id"))
+                .join_from(issue_index, model, model.id == key_id)
+                .where(type_coerce(issue_index.issue, Integer) == issue_key)
+            )
+        if sat_key is not None:
+            stmt = stmt.where(type_coerce(key_sat, Integer) == sat_key)
+        if severity_codes is not None:
+            stmt = stmt.where(type_coerce(model.severity, SmallInteger).in_(severity_codes))
+        if since is not None:
+            stmt = stmt.where(key_ts >= since)
+        if until is not None:
+            stmt = stmt.where(key_ts < until)
+        if cursor is not None:
+            # bound with the column types, so the timestamp is encoded like the stored one
+            cursor_ts, cursor_id = cursor
+            stmt = stmt.where(tuple_(key_ts, key_id) < tuple_(
+                literal(cursor_ts, key_ts.type), literal(cursor_id, Integer())
+            ))
+        stmt = stmt.order_by(key_ts.desc(), key_id.desc()).limit(limit + 1)
+        return db.execute(stmt).mappings()
+
+    if not issue_keys:
+        rows = [dict(r) for r in page(None)]
+    else:
+        # one ordered index range per issue, merged; a row with several of
+        # the issues comes up once per issue
+        rows, seen = [], set()
+        merged = heapq.merge(*(page(k) for k in issue_keys), key=lambda r: (r["_ts"], r["_id"]), reverse=True)
+        for r in merged:
+            if r["_id"] not in seen:
+                seen.add(r["_id"])
+                rows.append(dict(r))
+                if len(rows) > limit:
+                    break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1]["_ts"], rows[-1]["_id"])
+    for row in rows:
+        del row["_ts"], row["_id"]
+    return rows, next_cursor
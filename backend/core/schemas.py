@@ -35,6 +35,25 @@ class AnomalyResponse(BaseModel):
     issue: str
     score: float
     timestamp: datetime
+    # episode: last sample, end (None while open) and samples seen
+    last_seen: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    sample_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class AnomalyFieldsResponse(BaseModel):
+    """AnomalyResponse fields picked with fields=; absent ones are left out."""
+    id: Optional[int] = None
+    satellite_id: Optional[str] = None
+    severity: Optional[str] = None
+    issue: Optional[str] = None
+    score: Optional[float] = None
+    timestamp: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    sample_count: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -44,6 +63,9 @@ class SatelliteResponse(BaseModel):
     is_online: bool
     latest_severity: str
     last_telemetry: Optional[datetime] = None
+    in_contact: Optional[bool] = None
+    next_aos: Optional[datetime] = None
+    next_los: Optional[datetime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
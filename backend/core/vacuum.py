@@ -0,0 +1,32 @@
+# backend/core/vacuum.py
+"""
+Offline conversion of an existing database to incremental auto_vacuum, so
+the retention job can return freed pages to the OS. Databases created by
+the servers already start in that mode; older ones need this once. It runs
+a full VACUUM, which locks the database for the whole rewrite, so stop the
+servers first.
+
+    python -m backend.core.vacuum
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from backend.core.database import DB_PATH, engine
+from backend.services.retention import convert_to_incremental_vacuum, incremental_vacuum_enabled
+
+
+def main():
+    if incremental_vacuum_enabled(engine):
+        print(f"{DB_PATH} already uses incremental auto_vacuum")
+        return
+    print(f"Converting {DB_PATH} to incremental auto_vacuum (full VACUUM) ...")
+    convert_to_incremental_vacuum(engine)
+    print("Done")
+
+
+if __name__ == "__main__":
+    main()
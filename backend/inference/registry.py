@@ -0,0 +1,213 @@
+# backend/inference/registry.py
+"""
+Versioned registry of isolation-forest models.
+
+Models are trained offline on stored telemetry and written to MODEL_DIR as
+iforest-vNNNN.npz (written to a temp file and renamed, so a reader never
+sees a partial file). The active model is held as one (version, model,
+stats) tuple: activating a version loads it fully first and then replaces
+the tuple in a single assignment, so in-flight batches finish on the model
+they started with and no request sees a half-loaded one.
+
+Each loaded version reports its load time, memory footprint and per-batch
+inference latency.
+"""
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.logger import logger
+from backend.models.isolation_forest import IsolationForest, fit
+
+# stored telemetry channels (core.models.Telemetry) plus orbit radius/speed,
+# which unlike raw position/velocity don't depend on orbit phase
+TELEMETRY_FEATURES = (
+    "temperature", "rssi", "snr", "packet_loss", "battery_voltage", "solar_panel_current",
+    "radius", "speed",
+)
+
+_VERSION_FILE = re.compile(r"^iforest-v(\d+)\.npz$")
+
+
+def _get(sample: Any, name: str):
+    return sample.get(name) if isinstance(sample, dict) else getattr(sample, name, None)
+
+
+def telemetry_matrix(samples: Iterable[Any]) -> np.ndarray:
+    """
+    (n, len(TELEMETRY_FEATURES)) matrix from telemetry dicts or ORM rows;
+    missing values are NaN.
+    """
+    rows = []
+    for s in samples:
+        values = [_get(s, name) for name in TELEMETRY_FEATURES[:6]]
+        pos = [_get(s, f"position_{a}") for a in "xyz"]
+        vel = [_get(s, f"velocity_{a}") for a in "xyz"]
+        values.append(np.linalg.norm(pos) if None not in pos else None)
+        values.append(np.linalg.norm(vel) if None not in vel else None)
+        rows.append([np.nan if v is None else v for v in values])
+    return np.array(rows, dtype=float).reshape(-1, len(TELEMETRY_FEATURES))
+
+
+@dataclass
+class ModelStats:
+    version: int
+    load_time_s: float
+    memory_bytes: int
+    n_trees: int
+    batches: int = 0
+    samples: int = 0
+    last_latency_ms: float = 0.0
+    avg_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, latency_s: float, n: int, alpha: float = 0.1):
+        ms = latency_s * 1000.0
+        with self._lock:
+            self.batches += 1
+            self.samples += n
+            self.last_latency_ms = ms
+            self.avg_latency_ms = ms if self.batches == 1 else (1 - alpha) * self.avg_latency_ms + alpha * ms
+            self.max_latency_ms = max(self.max_latency_ms, ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+
+class ModelRegistry:
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._active: Optional[Tuple[int, IsolationForest, ModelStats]] = None
+        self._stats: Dict[int, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, version: int) -> str:
+        return os.path.join(self.directory, f"iforest-v{version:04d}.npz")
+
+    def versions(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(int(m.group(1)) for m in map(_VERSION_FILE.match, os.listdir(self.directory)) if m)
+
+    @property
+    def active_version(self) -> Optional[int]:
+        active = self._active
+        return active[0] if active else None
+
+    # ----- training -----
+    def train(self, X: np.ndarray, n_trees: int = 100, sample_size: int = 256,
+              seed: Optional[int] = None) -> int:
+        """
+        Fit a model on X (n, len(TELEMETRY_FEATURES)) and store it as the
+        next version. Does not activate it.
+        """
+        with self._lock:
+            version = max(self.versions(), default=0) + 1
+            model = fit(X, TELEMETRY_FEATURES, n_trees=n_trees, sample_size=sample_size, seed=seed,
+                        meta={"version": version, "trained_at": datetime.utcnow().isoformat()})
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._path(version) + ".tmp.npz"
+            model.save(tmp)
+            os.replace(tmp, self._path(version))
+        logger.info(f"Trained isolation forest v{version} on {len(X)} samples")
+        return version
+
+    def train_from_db(self, session_factory, telemetry_model, limit: int = 50000, **kwargs) -> int:
+        """
+        Train on the most recent `limit` stored telemetry rows.
+        """
+        db = session_factory()
+        try:
+            rows = (
+                db.query(telemetry_model)
+                .order_by(telemetry_model.timestamp.desc())
+                .limit(limit)
+                .all()
+            )
+            X = telemetry_matrix(rows)
+        finally:
+            db.close()
+        return self.train(X, **kwargs)
+
+    # ----- loading / hot swap -----
+    def activate(self, version: int) -> ModelStats:
+        t0 = time.perf_counter()
+        model = IsolationForest.load(self._path(version))
+        if tuple(model.feature_names) != TELEMETRY_FEATURES:
+            raise ValueError(f"model v{version} was trained on different features")
+        load_time_s = time.perf_counter() - t0
+        with self._lock:
+            # re-activating a version keeps its latency history
+            stats = self._stats.get(version)
+            if stats is None:
+                stats = self._stats[version] = ModelStats(version, load_time_s, model.nbytes, model.n_trees)
+            stats.load_time_s = load_time_s
+            self._active = (version, model, stats)
+        logger.info(f"Activated isolation forest v{version} "
+                    f"({stats.memory_bytes} bytes, loaded in {stats.load_time_s * 1000:.1f} ms)")
+        return stats
+
+    def refresh(self) -> Optional[int]:
+        """
+        Activate the newest version on disk if it is newer than any loaded so
+        far (so a manual rollback to an older version sticks).
+        """
+        latest = max(self.versions(), default=None)
+        if latest is not None and latest > max(self._stats, default=0):
+            self.activate(latest)
+            return latest
+        return None
+
+    # ----- inference -----
+    def score(self, X: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Anomaly scores for X with the active model; None if none is loaded.
+        """
+        active = self._active
+        if active is None:
+            return None
+        _, model, stats = active
+        t0 = time.perf_counter()
+        scores = model.score(X)
+        stats.record(time.perf_counter() - t0, len(scores))
+        return scores
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = {v: s.to_dict() for v, s in self._stats.items()}
+        return {"active_version": self.active_version, "versions": self.versions(), "loaded": loaded}
+
+
+class ModelWatcher:
+    """
+    Picks up versions trained offline by polling MODEL_DIR.
+    """
+
+    def __init__(self, registry: ModelRegistry, interval_s: float):
+        self.registry = registry
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.registry.refresh()
+            except Exception as e:
+                logger.error(f"Model refresh failed: {e}")
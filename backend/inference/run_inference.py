@@ -1,14 +1,28 @@
-# Placeholder for loading ML models later
+# backend/inference/run_inference.py
+"""
+Model inference entry points, backed by the isolation-forest registry.
+"""
+from typing import Any, Iterable, Optional
 
+import numpy as np
 
-def load_models():
-# e.g., load Keras / PyTorch models
-    return None
+from backend.core.config import MODEL_DIR
+from backend.inference.registry import ModelRegistry, telemetry_matrix
 
+MODELS = ModelRegistry(MODEL_DIR)
 
-models = load_models()
 
+def load_models() -> ModelRegistry:
+    """
+    Activate the newest model version on disk, if there is one.
+    """
+    MODELS.refresh()
+    return MODELS
 
-def run_models(features):
-# replace compute_anomaly with model inference when available
-    return None
\ No newline at end of file
+
+def run_models(samples: Iterable[Any]) -> Optional[np.ndarray]:
+    """
+    Isolation-forest scores for a batch of telemetry dicts / rows, or None
+    while no model is active.
+    """
+    return MODELS.score(telemetry_matrix(samples))
@@ -0,0 +1,37 @@
+# backend/inference/train.py
+"""
+Offline training: fit an isolation forest on stored telemetry and add it to
+the registry as a new version. A running server picks it up on its next
+MODEL_POLL_S tick (or via POST /models/{version}/activate).
+
+    python -m backend.inference.train [--limit N] [--trees T] [--sample-size S]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from backend.core.config import IFOREST_SAMPLE_SIZE, IFOREST_TREES
+from backend.core.database import SessionLocal
+from backend.core.models import Telemetry
+from backend.inference.run_inference import MODELS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train an isolation forest on stored telemetry")
+    parser.add_argument("--limit", type=int, default=50000, help="most recent rows to train on")
+    parser.add_argument("--trees", type=int, default=IFOREST_TREES)
+    parser.add_argument("--sample-size", type=int, default=IFOREST_SAMPLE_SIZE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    version = MODELS.train_from_db(SessionLocal, Telemetry, limit=args.limit, n_trees=args.trees,
+                                   sample_size=args.sample_size, seed=args.seed)
+    print(f"Saved isolation forest v{version} to {MODELS.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,9 @@ def detect(features: Dict[str, float]) -> Tuple[float, str]:
         features: dict with keys like:
             - avg_contact_gap_min      (float) average minutes between contacts
             - last_gap_min             (float) minutes since last contact
+            - expected_gap_min         (float, optional) part of last_gap_min the
+                                       satellite was predicted to be out of contact;
+                                       only the remainder is scored as an outage
             - packets_per_min          (float)
             - error_rate_pct           (float)
             - downlink_success_ratio   (float 0–1, optional)
@@ -30,6 +33,9 @@ def detect(features: Dict[str, float]) -> Tuple[float, str]:
 
     gap_avg = features.get("avg_contact_gap_min")
     gap_last = features.get("last_gap_min")
+    expected = features.get("expected_gap_min")
+    if gap_last is not None and expected is not None:
+        gap_last = max(gap_last - expected, 0.0)
     packets = features.get("packets_per_min")
     err = features.get("error_rate_pct")
     success = features.get("downlink_success_ratio")
@@ -1,160 +1,377 @@
-"""This script implements the orbit determination filters in the following sequence:
-    - Initialization of filter:
-        Gauss initial orbit determination
-        Batch least squares
-    - Kalman filter - Cowell filter (EKF or UKF), Semianalytical filter (ESKF or USKF)
+# backend/models/filter.py
 """
-import os
+Orbit determination from ground-station passes (NumPy only):
+    - Initialization: Gauss initial orbit determination, then batch least squares
+    - Sequential filtering: EKF or UKF on the cartesian state
+
+Everything is batched over Monte Carlo runs: states are (runs, 6) arrays,
+covariances (runs, 6, 6), and each filter step propagates all runs (plus
+finite-difference perturbations or sigma points) in a single call to the
+J2 propagator. run_monte_carlo() can additionally split runs over a process
+pool. Metrics are returned as arrays, not collected per step.
+"""
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 
 import numpy as np
 
-from beyond.beyond.dates import Date, timedelta
-from beyond.beyond.orbits import Orbit
-
-from orbidet.propagators import ImportedProp
-from orbidet.satellite import SatelliteSpecs
-from orbidet.observers import GroundStation, get_obs
-from orbidet.force import Force,TwoBody,AtmosphericDrag,GravityAcceleration,ExponentialDragDb
+from .observations import DEFAULT_SIGMA, GroundStation, residual, simulate_observations
+from .propagation import EARTH_RADIUS_KM, MU_EARTH, propagate, propagate_states, rv_to_elements
+
+# finite-difference steps for position [km] and velocity [km/s]
+FD_STEP = np.array([1e-3, 1e-3, 1e-3, 1e-6, 1e-6, 1e-6])
+# process noise per filter step (position km^2, velocity km^2/s^2)
+DEFAULT_Q = np.diag([1e-9, 1e-9, 1e-9, 1e-12, 1e-12, 1e-12])
+
+# reference trajectory initial state (km, km/s)
+DEFAULT_STATE = np.array([6542.76, 2381.36, -0.000102, 0.3928, -1.0793, 7.592])
+
+
+def propagate_batch(x: np.ndarray, dt: np.ndarray) -> np.ndarray:
+    """
+    Propagate states x (N, 6) by dt (scalar or (N,)) seconds.
+    """
+    r, v = propagate_states(x[:, :3], x[:, 3:], dt)
+    return np.concatenate([r, v], axis=1)
+
+
+def _measure_batch(station: GroundStation, x: np.ndarray, t) -> np.ndarray:
+    return station.measure(x[..., :3], x[..., 3:], t)
+
+
+def _jacobian(f: Callable[[np.ndarray], np.ndarray], x: np.ndarray,
+              diff: Callable[[np.ndarray, np.ndarray], np.ndarray] = np.subtract) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forward-difference Jacobian of f at every row of x (N, 6), evaluating f
+    once on the (7N, 6) stack of nominal and perturbed states.
+    Returns f(x) (N, k) and the Jacobian (N, k, 6).
+    """
+    n = len(x)
+    stacked = np.concatenate([x] + [x + FD_STEP[j] * np.eye(6)[j] for j in range(6)])
+    out = f(stacked)
+    f0 = out[:n]
+    cols = [diff(out[n * (j + 1):n * (j + 2)], f0) / FD_STEP[j] for j in range(6)]
+    return f0, np.stack(cols, axis=-1)
+
+
+# ----- initial orbit determination -----
+def gauss_iod(station: GroundStation, t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Gauss angles-only IOD for a batch of runs.
+
+    t: the three observation times (3,); y: measurements (B, 3, 4), of
+    which only azimuth/elevation are used. Returns the state (B, 6) at t[1];
+    rows without a physical solution are NaN.
+    """
+    L = station.line_of_sight(y[..., 1], y[..., 2], t)          # (B, 3, 3)
+    R = np.broadcast_to(station.position_eci(t), L.shape)
+    L1, L2, L3 = L[:, 0], L[:, 1], L[:, 2]
+    R1, R2, R3 = R[:, 0], R[:, 1], R[:, 2]
+
+    tau1, tau3 = t[0] - t[1], t[2] - t[1]
+    tau = tau3 - tau1
+    p1, p2, p3 = np.cross(L2, L3), np.cross(L1, L3), np.cross(L1, L2)
+    D0 = np.einsum("ij,ij->i", L1, p1)
+    D = np.einsum("bik,bjk->bij", np.stack([R1, R2, R3], 1), np.stack([p1, p2, p3], 1))
+
+    A = (-D[:, 0, 1] * tau3 / tau + D[:, 1, 1] + D[:, 2, 1] * tau1 / tau) / D0
+    B = (D[:, 0, 1] * (tau3 ** 2 - tau ** 2) * tau3 / tau
+         + D[:, 2, 1] * (tau ** 2 - tau1 ** 2) * tau1 / tau) / (6 * D0)
+    E = np.einsum("ij,ij->i", R2, L2)
+    a = -(A ** 2 + 2 * A * E + np.einsum("ij,ij->i", R2, R2))
+    b = -2 * MU_EARTH * B * (A + E)
+    c = -(MU_EARTH * B) ** 2
+
+    # x^8 + a x^6 + b x^3 + c = 0 via batched companion-matrix eigenvalues
+    coeffs = np.zeros((len(a), 8))
+    coeffs[:, 1], coeffs[:, 4], coeffs[:, 7] = a, b, c
+    companion = np.zeros((len(a), 8, 8))
+    companion[:, 0, :] = -coeffs
+    companion[:, 1:, :-1] = np.eye(7)
+    roots = np.linalg.eigvals(companion)
+    real = (np.abs(roots.imag) < 1e-6 * np.abs(roots)) & (roots.real > EARTH_RADIUS_KM)
+    r2 = np.where(real, roots.real, np.inf).min(axis=1)
+    r2 = np.where(np.isfinite(r2), r2, np.nan)
+    r23 = r2 ** 3
+
+    rho1 = ((6 * (D[:, 2, 0] * tau1 / tau3 + D[:, 1, 0] * tau / tau3) * r23
+             + MU_EARTH * D[:, 2, 0] * (tau ** 2 - tau1 ** 2) * tau1 / tau3)
+            / (6 * r23 + MU_EARTH * (tau ** 2 - tau3 ** 2)) - D[:, 0, 0]) / D0
+    rho2 = A + MU_EARTH * B / r23
+    rho3 = ((6 * (D[:, 0, 2] * tau3 / tau1 - D[:, 1, 2] * tau / tau1) * r23
+             + MU_EARTH * D[:, 0, 2] * (tau ** 2 - tau3 ** 2) * tau3 / tau1)
+            / (6 * r23 + MU_EARTH * (tau ** 2 - tau1 ** 2)) - D[:, 2, 2]) / D0
+
+    r1 = R1 + rho1[:, None] * L1
+    r2v = R2 + rho2[:, None] * L2
+    r3 = R3 + rho3[:, None] * L3
+    f1 = 1 - MU_EARTH * tau1 ** 2 / (2 * r23)
+    f3 = 1 - MU_EARTH * tau3 ** 2 / (2 * r23)
+    g1 = tau1 - MU_EARTH * tau1 ** 3 / (6 * r23)
+    g3 = tau3 - MU_EARTH * tau3 ** 3 / (6 * r23)
+    v2 = (-f3[:, None] * r1 + f1[:, None] * r3) / (f1 * g3 - f3 * g1)[:, None]
+    return np.concatenate([r2v, v2], axis=1)
+
+
+def batch_least_squares(station: GroundStation, x0: np.ndarray, t0: float, t: np.ndarray, y: np.ndarray,
+                        sigma: np.ndarray = DEFAULT_SIGMA, max_iter: int = 20,
+                        tol: float = 1e-3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gauss-Newton fit of the epoch-t0 states x0 (B, 6) to measurements
+    y (B, m, 4) taken at times t (m,). Returns the fitted states, their
+    covariances (B, 6, 6) and a (B,) convergence mask.
+    """
+    x = np.array(x0, dtype=float)
+    n_runs, m = len(x), len(t)
+    weights = np.tile(1.0 / sigma ** 2, m)
+    converged = np.zeros(n_runs, dtype=bool)
+    good = np.isfinite(x).all(axis=1)
+
+    def h(states):
+        at_obs = propagate_batch(np.repeat(states, m, axis=0), np.tile(t - t0, len(states)))
+        return _measure_batch(station, at_obs, np.tile(t, len(states))).reshape(len(states), m * 4)
+
+    def diff(a, b):
+        return residual(a.reshape(-1, m, 4), b.reshape(-1, m, 4)).reshape(-1, m * 4)
+
+    for _ in range(max_iter):
+        good &= np.linalg.norm(x[:, :3], axis=1) > EARTH_RADIUS_KM
+        # failed runs are evaluated at a placeholder state and masked out
+        x = np.where(good[:, None], x, DEFAULT_STATE)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            h0, H = _jacobian(h, x, diff)
+        res = diff(y.reshape(n_runs, m * 4), h0)
+        good &= np.isfinite(res).all(axis=1) & np.isfinite(H).all(axis=(1, 2))
+        H = np.where(good[:, None, None], H, 0.0)
+        res = np.where(good[:, None], res, 0.0)
+
+        HtW = np.transpose(H, (0, 2, 1)) * weights
+        normal = HtW @ H + np.where(good, 0.0, 1.0)[:, None, None] * np.eye(6)
+        dx = np.linalg.solve(normal, HtW @ res[..., None])[..., 0]
+        x = x + dx
+        step = np.linalg.norm(dx[:, :3], axis=1) + 1e3 * np.linalg.norm(dx[:, 3:], axis=1)
+        converged = good & (step < tol)
+        if (converged == good).all():
+            break
+
+    x = np.where(converged[:, None], x, np.nan)
+    P = np.linalg.inv(normal)
+    return x, P, converged
+
+
+# ----- sequential filters -----
+class BatchEKF:
+    """
+    Extended Kalman filter over B independent runs.
+    """
+
+    def __init__(self, station: GroundStation, x: np.ndarray, P: np.ndarray,
+                 Q: np.ndarray = DEFAULT_Q, sigma: np.ndarray = DEFAULT_SIGMA):
+        self.station = station
+        self.x = np.array(x, dtype=float)
+        self.P = np.array(P, dtype=float)
+        self.Q = Q
+        self.R = np.diag(sigma ** 2)
+
+    def predict(self, dt: float):
+        self.x, F = _jacobian(lambda s: propagate_batch(s, dt), self.x)
+        self.P = F @ self.P @ np.transpose(F, (0, 2, 1)) + self.Q
+
+    def update(self, y: np.ndarray, t: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Measurement update with y (B, 4); rows outside mask are left
+        untouched. Returns the normalized innovation squared (B,).
+        """
+        h0, H = _jacobian(lambda s: _measure_batch(self.station, s, t), self.x, residual)
+        nu = residual(y, h0)
+        Ht = np.transpose(H, (0, 2, 1))
+        S = H @ self.P @ Ht + self.R
+        K = self.P @ Ht @ np.linalg.inv(S)
+        I_KH = np.eye(6) - K @ H
+        x = self.x + (K @ nu[..., None])[..., 0]
+        P = I_KH @ self.P @ np.transpose(I_KH, (0, 2, 1)) + K @ self.R @ np.transpose(K, (0, 2, 1))
+        return self._apply(x, P, nu, S, mask)
+
+    def _apply(self, x, P, nu, S, mask):
+        mask = np.ones(len(x), dtype=bool) if mask is None else mask
+        self.x = np.where(mask[:, None], x, self.x)
+        self.P = np.where(mask[:, None, None], 0.5 * (P + np.transpose(P, (0, 2, 1))), self.P)
+        nis = np.einsum("bi,bi->b", nu, np.linalg.solve(S, nu[..., None])[..., 0])
+        return np.where(mask, nis, np.nan)
+
+
+class BatchUKF(BatchEKF):
+    """
+    Unscented Kalman filter over B independent runs (alpha=1, beta=2, kappa=0).
+    """
+    n = 6
+    lam = 0.0
+    Wm = np.r_[0.0, np.full(12, 1.0 / 12)]
+    Wc = np.r_[2.0, np.full(12, 1.0 / 12)]
+
+    def _sigma_points(self) -> np.ndarray:
+        L = np.linalg.cholesky((self.n + self.lam) * self.P)     # (B, 6, 6)
+        cols = np.transpose(L, (0, 2, 1))                          # rows are columns of L
+        x = self.x[:, None, :]
+        return np.concatenate([x, x + cols, x - cols], axis=1)    # (B, 13, 6)
+
+    def predict(self, dt: float):
+        X = self._sigma_points()
+        b = len(X)
+        X = propagate_batch(X.reshape(-1, 6), dt).reshape(b, 13, 6)
+        self.x = np.einsum("s,bsi->bi", self.Wm, X)
+        d = X - self.x[:, None, :]
+        self.P = np.einsum("s,bsi,bsj->bij", self.Wc, d, d) + self.Q
+
+    def update(self, y: np.ndarray, t: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        X = self._sigma_points()
+        Z = _measure_batch(self.station, X, t)                     # (B, 13, 4)
+        z = np.einsum("s,bsk->bk", self.Wm, Z)
+        # circular mean for azimuth
+        z[:, 1] = np.arctan2(np.einsum("s,bs->b", self.Wm, np.sin(Z[..., 1])),
+                             np.einsum("s,bs->b", self.Wm, np.cos(Z[..., 1])))
+        dz = residual(Z, z[:, None, :])
+        dx = X - self.x[:, None, :]
+        S = np.einsum("s,bsi,bsj->bij", self.Wc, dz, dz) + self.R
+        Pxz = np.einsum("s,bsi,bsj->bij", self.Wc, dx, dz)
+        K = Pxz @ np.linalg.inv(S)
+        nu = residual(y, z)
+        x = self.x + (K @ nu[..., None])[..., 0]
+        P = self.P - K @ S @ np.transpose(K, (0, 2, 1))
+        return self._apply(x, P, nu, S, mask)
+
+
+FILTERS = {"EKF": BatchEKF, "UKF": BatchUKF}
+
+
+# ----- Monte Carlo -----
+@dataclass
+class MonteCarloResult:
+    filter_name: str
+    t: np.ndarray            # (steps,) seconds
+    errors: np.ndarray       # (runs, steps, 6) estimate - truth, inertial frame
+    errors_rsw: np.ndarray   # (runs, steps, 3) position error, radial / along-track / cross-track
+    nees: np.ndarray         # (runs, steps)
+    nis: np.ndarray          # (runs, steps), NaN where there was no measurement
+    converged: np.ndarray    # (runs,) initialization converged
+
+    def rmse(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Position [km] and velocity [km/s] RMSE per step over converged runs.
+        """
+        e = self.errors[self.converged]
+        return (np.sqrt(np.mean(np.sum(e[..., :3] ** 2, axis=-1), axis=0)),
+                np.sqrt(np.mean(np.sum(e[..., 3:] ** 2, axis=-1), axis=0)))
+
+    def summary(self) -> Dict[str, float]:
+        pos, vel = self.rmse()
+        tail = slice(len(self.t) // 2, None)
+        return {
+            "filter": self.filter_name,
+            "runs": int(len(self.converged)),
+            "converged": int(self.converged.sum()),
+            "final_position_rmse_km": float(pos[-1]) if len(pos) else float("nan"),
+            "final_velocity_rmse_km_s": float(vel[-1]) if len(vel) else float("nan"),
+            "mean_nees": float(np.nanmean(self.nees[self.converged][:, tail])),
+            "mean_nis": float(np.nanmean(self.nis[self.converged])),
+        }
+
+    @staticmethod
+    def concat(results) -> "MonteCarloResult":
+        first = results[0]
+        return MonteCarloResult(
+            first.filter_name, first.t,
+            *(np.concatenate([getattr(r, name) for r in results])
+              for name in ("errors", "errors_rsw", "nees", "nis", "converged")),
+        )
+
+
+def _rsw_errors(truth: np.ndarray, errors: np.ndarray) -> np.ndarray:
+    r, v = truth[:, :3], truth[:, 3:]
+    R = r / np.linalg.norm(r, axis=1, keepdims=True)
+    W = np.cross(r, v)
+    W /= np.linalg.norm(W, axis=1, keepdims=True)
+    S = np.cross(W, R)
+    frame = np.stack([R, S, W], axis=1)                       # (steps, 3, 3)
+    return np.einsum("tij,btj->bti", frame, errors[..., :3])
+
+
+def _first_pass(visible: np.ndarray, length: int) -> np.ndarray:
+    idx = np.flatnonzero(visible)
+    passes = np.split(idx, np.flatnonzero(np.diff(idx) > 1) + 1)
+    for p in passes:
+        if len(p) >= length:
+            return p[:length]
+    raise ValueError(f"no pass with {length} visible observations in the simulated window")
+
+
+def run_monte_carlo(runs: int = 100, state: np.ndarray = DEFAULT_STATE, station: Optional[GroundStation] = None,
+                    duration_s: float = 6 * 3600, step_s: float = 10.0, sigma: np.ndarray = DEFAULT_SIGMA,
+                    filter_name: str = "UKF", iod_len: int = 10, Q: np.ndarray = DEFAULT_Q,
+                    seed: Optional[int] = 0, processes: Optional[int] = None) -> MonteCarloResult:
+    """
+    Simulate one reference trajectory observed by `station` and estimate it
+    in `runs` independent noise realizations: Gauss IOD + batch least
+    squares on the first iod_len observations of the first pass, then the
+    chosen filter over the rest of the window.
+
+    With processes > 1 the runs are split into chunks over a process pool,
+    each chunk still vectorized internally.
+    """
+    if filter_name not in FILTERS:
+        raise ValueError(f"unknown filter {filter_name!r}; expected one of {sorted(FILTERS)}")
+    station = station or GroundStation("Lisbon", 38.0, -10.0, 0.0)
+
+    if processes and processes > 1 and runs > 1:
+        chunks = [len(c) for c in np.array_split(np.arange(runs), min(processes, runs))]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        with ProcessPoolExecutor(len(chunks), mp_context=mp.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(run_monte_carlo, n, state, station, duration_s, step_s, sigma,
+                            filter_name, iod_len, Q, int(s.generate_state(1)[0]), None)
+                for n, s in zip(chunks, seeds)
+            ]
+            return MonteCarloResult.concat([f.result() for f in futures])
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, duration_s, step_s)
+    r, v = propagate(rv_to_elements(state[:3], state[3:]), t)
+    truth = np.concatenate([r[0], v[0]], axis=1)                  # (m, 6)
+    y, visible = simulate_observations(station, r[0], v[0], t, sigma, runs, rng)
+
+    # initialization: Gauss on first/middle/last of the IOD window, LS on all of it
+    iod = _first_pass(visible, iod_len)
+    triple = iod[[0, len(iod) // 2, -1]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_iod = gauss_iod(station, t[triple], y[:, triple])
+        x_epoch = propagate_batch(x_iod, t[iod[-1]] - t[triple[1]])
+    x, P, converged = batch_least_squares(station, x_epoch, t[iod[-1]], t[iod], y[:, iod], sigma)
+
+    steps = np.arange(iod[-1] + 1, len(t))
+    errors = np.full((runs, len(steps), 6), np.nan)
+    nees = np.full((runs, len(steps)), np.nan)
+    nis = np.full((runs, len(steps)), np.nan)
+
+    ok = np.flatnonzero(converged)
+    if len(ok):
+        flt = FILTERS[filter_name](station, x[ok], P[ok], Q, sigma)
+        for k, idx in enumerate(steps):
+            flt.predict(step_s)
+            if visible[idx]:
+                nis[ok, k] = flt.update(y[ok, idx], t[idx])
+            e = flt.x - truth[idx]
+            errors[ok, k] = e
+            nees[ok, k] = np.einsum("bi,bi->b", e, np.linalg.solve(flt.P, e[..., None])[..., 0])
+
+    return MonteCarloResult(filter_name, t[steps], errors, _rsw_errors(truth[steps], errors), nees, nis, converged)
 
-from orbidet.IOD.Gauss import Gauss
-from orbidet.estimators import LeastSquares,CowellFilter,SemianalyticalFilter
-from orbidet.errors import LSnotConverged
-from orbidet.metrics.metrics import Metrics
-from orbidet.observers.utils import matrix_RSW_to_ECI
 
 def main():
-    ################# defining initial conditions and simulation setup #################
-    start = Date(2000,4,6,11,0,0)
-    step = timedelta(seconds = 5)
-    stop = start + timedelta(hours = 6)
-    MonteCarlo = 1 #number of Monte Carlo runs to run the simulation
-
-    # frames
-    frameECI = "TOD"
-    frameECEF = "PEF"
-
-    # Control flags
-    apply_noise = True              #Measurement Noise
-    LOS = True                     #use LOS condition to validate measurements
-
-    # reference trajectory
-    filename = "./orbidet/data/trajectories/GMAT1.csv"
-    prop = ImportedProp(start, filename=filename,frame="TOD")
-    initialState = prop.orbit
-
-    # setting up Ground Station (GS) observer
-    sensors_GS = ["Range", "Azimuth","Elevation","Range Rate"]
-    GS1_name = "Lisbon"
-    GS1_latlonalt = (38,-10,0)
-
-    # Noise figures
-    std_range = (100) / 1000                 #range                              [km]
-    std_angles = (0.02) * np.pi/180            #angle measurements                 [rad]
-    std_rangerate = (10) / 100 / 1000       #range rate                         [km/s]
-    dict_std = {"range":std_range,
-                "angles":std_angles,
-                "range rate":std_rangerate}
-
-    observer = GroundStation(GS1_name,GS1_latlonalt,sensors_GS,dict_std,frameECEF)
-    # print(repr(observer))
-
-    # creating satellite & force model
-    sat = SatelliteSpecs("SAT1", #name
-                        2,       #CD
-                        50,      #mass [kg]
-                        2)      #area [m²]
-    force = Force(integrationFrame = frameECI, gravityFrame = frameECEF)
-    grav = GravityAcceleration(5,0)
-    DragHandler = ExponentialDragDb()
-    drag = AtmosphericDrag(sat,DragHandler)
-    two_body = TwoBody()
-    force.addForce(grav)
-    # force.addForce(drag)
-    force.addForce(two_body)
-    # print(force)
-
-
-    ################# Estimation Setup #################
-    InitialOD_LEN = 10 # Number of observations to collect in initialization procedure
-    filterName = "USKF" #possible filters: EKF, UKF, ESKF or USKF
-    Q_cartesian = np.block([[10**-9*np.eye(3),np.zeros((3,3))],[np.zeros((3,3)),10**-12*np.eye(3)]]) #process noise cov
-    Q_equinoctial = np.diag([1e-10,1e-14,1e-14,1e-14,1e-14,1e-12])
-    metrics = Metrics(MonteCarlo,RMSE_errors = True,
-                                              consistency_tests = True,abs_erros=True,frames = ("ECI","RSW"))
-
-
-    ################# simulation #################
-    run = 1
-    while run <= MonteCarlo:
-        print('Monte Carlo run %d'%run)
-
-        gen = prop.iter(step=step,stop=stop,start=start)
-        # The algorithm should only start when there is LOS (consume observations until LOS)
-        if LOS:
-            y = None
-            while y is None:
-                orbit = next(gen)
-                y = get_obs(orbit.copy(),observer,dict_std,apply_noise,LOS)
-
-        # setup Initial Orbit Determination (10 observations)
-        IOD = []
-        while len(IOD) < InitialOD_LEN:
-            orbit = next(gen)
-            y = get_obs(orbit,observer,dict_std,apply_noise,LOS)
-            if y is not None:
-                IOD.append([orbit.date,y])
-
-        # run Gauss Initial Orbit Determination algorithm
-        gauss = Gauss(IOD[0:3],observer,frameECI)
-
-        # run batch least squares
-        t = IOD[3][0]
-        orbit = gauss.get_propagated_solution(t,force)
-        try:
-            LS = LeastSquares(IOD[3:],orbit,observer.R_default,0.1,observer.jacobian_h,observer.h,force)
-        except LSnotConverged:
-            print("this MC did not converge. Retrying this Monte Carlo run")
-            continue
-        orbit,P,t = LS.get_propagated_solution(frameECI)
-
-        # create Kalman filter (uncomment desired filter: Cowell or Semianalytical)
-        # filter = CowellFilter(filterName,orbit,t,P,Q_cartesian, observer,force,frameECI,"RK45")
-        filter = SemianalyticalFilter(filterName,orbit,P,t,Q_equinoctial,
-                          observer,force,frameECI,"RK45",timedelta(hours=1),
-                          quadrature_order = 20,DFT_lmb_len = 16, DFT_sideral_len=16)
-
-        # continue the simulation until the end of the generator
-        for orbit in gen:
-            ECI_to_RSW = matrix_RSW_to_ECI(np.array(orbit[0:3]),np.array(orbit[3:])).T
-            t = (orbit.date - start).total_seconds()
-
-            y = get_obs(orbit.copy(),observer,dict_std,apply_noise,LOS) #get reference observation and corrupt it with noise
-            invS,v = filter.filtering_cycle(orbit.date,y,observer)
-            metrics.append_estimation(t,np.array(orbit),filter.x_osc.copy(form="cartesian"),
-                    R_ECI_to_RSW=ECI_to_RSW,P = filter.P_osc,Sinv = invS,obs_err = v)
-            print(orbit.date)
-
-
-
-        run += 1
-
-    # process estimation metrics
-    path = "./results/"
-    save = False
-    if save and not os.path.exists(path):
-        os.makedirs(path)
-
-    metrics.process_results(path+"_osc_"+filterName,save=save)
-    metrics.plot_results(len(sensors_GS),6,n=-1,side_consistency="one-sided",prob_consistency=0.95,
-                            filter_name = filterName)
-
-
-
-
-
-
-
-
+    for name in ("EKF", "UKF"):
+        result = run_monte_carlo(runs=200, filter_name=name, duration_s=3 * 3600)
+        print(result.summary())
 
 
 if __name__ == "__main__":
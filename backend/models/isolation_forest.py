@@ -0,0 +1,151 @@
+# backend/models/isolation_forest.py
+"""
+Isolation forest (Liu, Ting & Zhou) in NumPy.
+
+Trees are stored as complete binary trees in flat arrays (children of node
+i at 2i+1 and 2i+2), so a forest is four small arrays: split feature
+(-1 = leaf), split threshold, and the path length credited at each leaf.
+Scoring walks every tree for every sample at once, one level per step.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+EULER_GAMMA = 0.5772156649
+
+
+def average_path_length(n: np.ndarray) -> np.ndarray:
+    """
+    c(n): average path length of an unsuccessful BST search among n points.
+    """
+    n = np.asarray(n, dtype=float)
+    safe = np.maximum(n, 2.0)
+    c = 2.0 * (np.log(safe - 1.0) + EULER_GAMMA) - 2.0 * (safe - 1.0) / safe
+    return np.where(n > 2, c, np.where(n == 2, 1.0, 0.0))
+
+
+@dataclass
+class IsolationForest:
+    feature_names: Sequence[str]
+    sample_size: int
+    feature: np.ndarray          # (T, nodes) int16, -1 = leaf
+    threshold: np.ndarray        # (T, nodes) float32
+    value: np.ndarray            # (T, nodes) float32, path length at leaves
+    fill: np.ndarray             # (d,) values used for missing inputs
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def n_trees(self) -> int:
+        return self.feature.shape[0]
+
+    @property
+    def max_depth(self) -> int:
+        return int(np.log2(self.feature.shape[1] + 1)) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.feature.nbytes + self.threshold.nbytes + self.value.nbytes + self.fill.nbytes
+
+    def path_lengths(self, X: np.ndarray) -> np.ndarray:
+        """
+        Mean path length per sample for X (n, d).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        X = np.where(np.isnan(X), self.fill, X)
+        trees = np.arange(self.n_trees)[:, None]
+        samples = np.arange(len(X))[None, :]
+        node = np.zeros((self.n_trees, len(X)), dtype=np.int64)
+        for _ in range(self.max_depth):
+            f = self.feature[trees, node]
+            leaf = f < 0
+            right = X[samples, np.maximum(f, 0)] >= self.threshold[trees, node]
+            node = np.where(leaf, node, 2 * node + 1 + right)
+        return self.value[trees, node].mean(axis=0)
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """
+        Anomaly score in (0, 1); ~0.5 is normal, close to 1 is isolated.
+        """
+        return 2.0 ** (-self.path_lengths(X) / average_path_length(self.sample_size))
+
+    # ----- serialization -----
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            value=self.value,
+            fill=self.fill,
+            header=np.array(json.dumps({
+                "feature_names": list(self.feature_names),
+                "sample_size": self.sample_size,
+                "meta": self.meta,
+            })),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IsolationForest":
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            return cls(
+                feature_names=tuple(header["feature_names"]),
+                sample_size=int(header["sample_size"]),
+                feature=data["feature"],
+                threshold=data["threshold"],
+                value=data["value"],
+                fill=data["fill"],
+                meta=header.get("meta", {}),
+            )
+
+
+def fit(X: np.ndarray, feature_names: Sequence[str], n_trees: int = 100, sample_size: int = 256,
+        seed: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> IsolationForest:
+    """
+    Train on X (n, d); NaN entries are replaced by the column median.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    fill = np.nan_to_num(np.nanmedian(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+    X = np.where(np.isnan(X), fill, X)
+    rng = np.random.default_rng(seed)
+    sample_size = int(min(sample_size, len(X)))
+    if sample_size < 2:
+        raise ValueError("need at least 2 samples to train an isolation forest")
+    max_depth = int(np.ceil(np.log2(sample_size)))
+    nodes = 2 ** (max_depth + 1) - 1
+
+    feature = np.full((n_trees, nodes), -1, dtype=np.int16)
+    threshold = np.zeros((n_trees, nodes), dtype=np.float32)
+    value = np.zeros((n_trees, nodes), dtype=np.float32)
+
+    for t in range(n_trees):
+        sample = X[rng.choice(len(X), sample_size, replace=False)]
+        stack = [(0, sample, 0)]
+        while stack:
+            node, points, depth = stack.pop()
+            splittable = []
+            if depth < max_depth and len(points) > 1:
+                lo, hi = points.min(axis=0), points.max(axis=0)
+                splittable = np.flatnonzero(hi > lo)
+            if not len(splittable):
+                value[t, node] = depth + average_path_length(len(points))
+                continue
+            f = rng.choice(splittable)
+            thr = rng.uniform(lo[f], hi[f])
+            feature[t, node] = f
+            threshold[t, node] = thr
+            # float32 storage can round the split; partition the way scoring will
+            right = points[:, f] >= np.float32(thr)
+            stack.append((2 * node + 1, points[~right], depth + 1))
+            stack.append((2 * node + 2, points[right], depth + 1))
+
+    return IsolationForest(
+        feature_names=tuple(feature_names),
+        sample_size=sample_size,
+        feature=feature,
+        threshold=threshold,
+        value=value,
+        fill=fill,
+        meta=dict(meta or {}, n_train=len(X)),
+    )
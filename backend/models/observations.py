@@ -1,63 +1,146 @@
-"""This script creates measurement records of ground station passes
+# backend/models/observations.py
 """
+Ground-station measurement model (NumPy only).
+
+A GroundStation observes range [km], azimuth, elevation [rad] and range
+rate [km/s] of satellites given inertial position/velocity arrays. The
+Earth frame rotates about z at OMEGA_EARTH from the angle theta0 at t=0,
+which is enough for simulated passes and orbit determination without a
+full precession/nutation model. Every function broadcasts over leading
+dimensions, so whole trajectories or batches of states are observed in
+one call.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
 
 import numpy as np
 
-from beyond.beyond.dates import Date, timedelta
-from beyond.beyond.orbits import Orbit
-
-from orbidet.propagators import ImportedProp
-from orbidet.satellite import SatelliteSpecs
-from orbidet.observers import GroundStation, get_obs
-
-
-
-def main():
-    # defining initial conditions and setting propagator
-    start = Date(2010,3,1,18,00,0)
-    filename = "./orbidet/data/trajectories/GMAT1.csv"
-    prop = ImportedProp(start, filename=filename,frame="TOD")
-    initialState = prop.orbit
-    # print(repr(initialState))
-
-    # getting generator
-    step = timedelta(seconds = 60)
-    stop = start + timedelta(hours = 24)
-    gen = prop.iter(step=step,stop=stop,start=start)
-
-    # setting up Ground Station (GS) observer
-    sensors_GS = ["Range", "Azimuth","Elevation","Range Rate"]
-    GS1_name = "Lisbon"
-    GS1_latlonalt = (38,-10,0)
-
-    # Noise figures
-    std_range = (100) / 1000                 #range                              [km]
-    std_angles = (0.02) * np.pi/180            #angle measurements                 [rad]
-    std_rangerate = (10) / 100 / 1000       #range rate                         [km/s]
-    dict_std = {"range":std_range,
-                "angles":std_angles,
-                "range rate":std_rangerate}
-
-    ECEF_frame = "PEF" # the topocentric frame is defined with respect to ECEF_frame
-    observer = GroundStation(GS1_name,GS1_latlonalt,sensors_GS,dict_std,ECEF_frame)
-    # print(repr(observer))
-
-
-    # generate orbit
-    for orbit in gen:
-        y = get_obs(orbit.copy(),observer,dict_std,apply_noise=True,do_LOS=True)
-        if y is not None:
-            print(orbit.date, y)
-
-
-
-
-
-
-
-
-
-
-
-if __name__ == "__main__":
-    main()
+OMEGA_EARTH = 7.292115e-5          # rad/s
+WGS84_A = 6378.137                 # km
+WGS84_E2 = 6.69437999014e-3
+
+MEASUREMENTS = ("range", "azimuth", "elevation", "range_rate")
+# default noise: 100 m, 0.02 deg, 0.02 deg, 0.1 m/s
+DEFAULT_SIGMA = np.array([0.1, np.radians(0.02), np.radians(0.02), 1e-4])
+
+
+def gmst(unix_seconds: float) -> float:
+    """
+    Greenwich mean sidereal angle [rad] at a UNIX time (UT1 ~ UTC).
+    """
+    days = (unix_seconds - 946728000.0) / 86400.0      # since J2000.0
+    return float(np.radians((280.46061837 + 360.98564736629 * days) % 360.0))
+
+
+def _rot_z(theta: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    """
+    Rotate vectors (..., 3) by angle theta (...) about z.
+    """
+    c, s = np.cos(theta), np.sin(theta)
+    x, y, z = vec[..., 0], vec[..., 1], vec[..., 2]
+    return np.stack(np.broadcast_arrays(c * x - s * y, s * x + c * y, z), axis=-1)
+
+
+def wrap_angle(x: np.ndarray) -> np.ndarray:
+    return (x + np.pi) % (2 * np.pi) - np.pi
+
+
+@dataclass
+class GroundStation:
+    name: str
+    lat_deg: float
+    lon_deg: float
+    alt_km: float = 0.0
+    min_elevation_deg: float = 0.0
+    theta0: float = 0.0   # Earth rotation angle at t=0 [rad]
+
+    def __post_init__(self):
+        lat, lon = np.radians(self.lat_deg), np.radians(self.lon_deg)
+        n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * np.sin(lat) ** 2)
+        self.ecef = np.array([
+            (n + self.alt_km) * np.cos(lat) * np.cos(lon),
+            (n + self.alt_km) * np.cos(lat) * np.sin(lon),
+            (n * (1.0 - WGS84_E2) + self.alt_km) * np.sin(lat),
+        ])
+        # rows: east, north, up unit vectors in ECEF
+        self.enu = np.array([
+            [-np.sin(lon), np.cos(lon), 0.0],
+            [-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)],
+            [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+        ])
+        self.min_elevation = np.radians(self.min_elevation_deg)
+
+    def rotation_angle(self, t: np.ndarray) -> np.ndarray:
+        return self.theta0 + OMEGA_EARTH * np.asarray(t, dtype=float)
+
+    def position_eci(self, t: np.ndarray) -> np.ndarray:
+        return _rot_z(self.rotation_angle(t), np.broadcast_to(self.ecef, np.shape(t) + (3,)))
+
+    def velocity_eci(self, t: np.ndarray) -> np.ndarray:
+        r = self.position_eci(t)
+        return np.stack([-OMEGA_EARTH * r[..., 1], OMEGA_EARTH * r[..., 0], np.zeros(r.shape[:-1])], axis=-1)
+
+    def measure(self, r: np.ndarray, v: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """
+        Noise-free measurements (..., 4) ordered as MEASUREMENTS for
+        inertial states r, v (..., 3) at times t (broadcast to r[..., 0]).
+        """
+        t = np.broadcast_to(np.asarray(t, dtype=float), r.shape[:-1])
+        rho = r - self.position_eci(t)
+        rho_dot = v - self.velocity_eci(t)
+        rng = np.linalg.norm(rho, axis=-1)
+
+        local = _rot_z(-self.rotation_angle(t), rho) @ self.enu.T
+        az = np.mod(np.arctan2(local[..., 0], local[..., 1]), 2 * np.pi)
+        el = np.arcsin(np.clip(local[..., 2] / rng, -1.0, 1.0))
+        rr = np.einsum("...k,...k->...", rho, rho_dot) / rng
+        return np.stack([rng, az, el, rr], axis=-1)
+
+    def elevation(self, r: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """
+        Elevation [rad] only, for visibility searches over many positions.
+        """
+        t = np.broadcast_to(np.asarray(t, dtype=float), r.shape[:-1])
+        rho = r - self.position_eci(t)
+        up = _rot_z(-self.rotation_angle(t), rho) @ self.enu[2]
+        return np.arcsin(np.clip(up / np.linalg.norm(rho, axis=-1), -1.0, 1.0))
+
+    def visible(self, measurements: np.ndarray) -> np.ndarray:
+        return measurements[..., 2] >= self.min_elevation
+
+    def line_of_sight(self, az: np.ndarray, el: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """
+        Inertial unit vectors (..., 3) towards the given azimuth/elevation.
+        """
+        local = np.stack([np.cos(el) * np.sin(az), np.cos(el) * np.cos(az), np.sin(el)], axis=-1)
+        return _rot_z(self.rotation_angle(t), local @ self.enu)
+
+
+def residual(y: np.ndarray, h: np.ndarray) -> np.ndarray:
+    """
+    Measurement residual y - h with the azimuth difference wrapped.
+    """
+    d = y - h
+    d[..., 1] = wrap_angle(d[..., 1])
+    return d
+
+
+def add_noise(measurements: np.ndarray, sigma: np.ndarray = DEFAULT_SIGMA,
+              rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    rng = rng or np.random.default_rng()
+    noisy = measurements + rng.standard_normal(measurements.shape) * sigma
+    noisy[..., 1] = np.mod(noisy[..., 1], 2 * np.pi)
+    return noisy
+
+
+def simulate_observations(station: GroundStation, r: np.ndarray, v: np.ndarray, t: np.ndarray,
+                          sigma: np.ndarray = DEFAULT_SIGMA, runs: int = 1,
+                          rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Measurement records for one trajectory r, v (m, 3) over times t (m,):
+    noisy measurements (runs, m, 4), one realization per run, and the
+    (m,) visibility mask of the noise-free geometry.
+    """
+    truth = station.measure(r, v, t)
+    noisy = add_noise(np.broadcast_to(truth, (runs,) + truth.shape).copy(), sigma, rng)
+    return noisy, station.visible(truth)
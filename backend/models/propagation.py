@@ -1,155 +1,179 @@
-"""File demonstrating the use of propagators (examples)
+# backend/models/propagation.py
 """
+Vectorized two-body + J2 orbit propagation (NumPy only).
+
+Orbits are given as Keplerian element arrays of shape (n, 6), ordered as
+ELEMENT_KEYS: semi-major axis [km], eccentricity, inclination, RAAN,
+argument of perigee and mean anomaly at t=0 (angles in radians).
+J2 is applied as secular drift of RAAN, argument of perigee and mean
+anomaly, which is what dominates LEO drift over hours to days.
+
+propagate() evaluates every satellite at every time of a grid in one call;
+Kepler's equation is solved with Newton iterations over the whole (n, m)
+array at once.
+"""
+from typing import Tuple
+
 import numpy as np
 
-from beyond.beyond.dates import Date, timedelta
-from beyond.beyond.orbits import Orbit
-
-from orbidet.propagators import ImportedProp, Cowell, Semianalytical
-from orbidet.force import Force,TwoBody,AtmosphericDrag,GravityAcceleration,ExponentialDragDb
-from orbidet.satellite import SatelliteSpecs
-from orbidet.metrics.plot_utils import *
-
-
-forms = {'cartesian':['x','y','z','vx','vy','vz'],
-         'keplerian':["a", "e", "i", "RAAN", "w", "TA"],
-         'keplerian_mean':["a", "e", "i", "RAAN", "w", "M"],
-         "equinoctial_mean":["a","h","k","p","q","lmb"]
-         }
-
-
-def ImportedPropExample():
-    # defining initial conditions and setting propagator
-    start = Date(2010,3,1,18,00,0)
-    filename = "./orbidet/data/trajectories/GMAT1.csv"
-    prop = ImportedProp(start, filename=filename)
-    initialState = prop.orbit
-    # print(repr(initialState))
-
-    # getting generator
-    step = timedelta(seconds = 5)
-    stop = start + timedelta(hours = 1)
-    gen = prop.iter(step=step,stop=stop,start=start)
-
-    # generate orbit
-    for orbit in gen:
-        print(orbit.date, orbit)
-
-
-def CowellExample():
-    # defining initial conditions & frames
-    start = Date(2010,3,1,18,00,0)
-    step = timedelta(seconds = 5)
-    stop = start + timedelta(hours = 1)
-    integrationFrame = "TOD"
-    gravityFrame = "PEF"
-    initialOrbit = Orbit(np.array([6542.76,2381.36,-0.000102,0.3928,-1.0793,7.592]),
-                        start,"cartesian",integrationFrame,None)
-
-    # creating satellite
-    sat = SatelliteSpecs("SAT1", #name
-                        2,       #CD
-                        50,      #mass [kg]
-                        2)      #area [m²]
-
-    # creating force model
-    force = Force(integrationFrame = integrationFrame, gravityFrame = gravityFrame)
-    grav = GravityAcceleration(5,5)
-    DragHandler = ExponentialDragDb()
-    drag = AtmosphericDrag(sat,DragHandler)
-    two_body = TwoBody()
-    force.addForce(grav)
-    force.addForce(drag)
-    force.addForce(two_body)
-    # print(force)
-
-    # creating propagator & generator
-    prop = Cowell(step,force,method="RK45",frame=initialOrbit.frame)
-    initialOrbit.propagator = prop
-    gen = initialOrbit.iter(stop=stop,step=step)
-
-    # generate orbit
-    for orbit in gen:
-        print(orbit.date,orbit)
-
-
-
-
-def SemianalyticalExample():
-    # defining initial conditions & frames
-    start = Date(2010,3,1,18,00,0)
-    output_step = timedelta(seconds = 60)
-    propagation_step = timedelta(hours = 1)
-    stop = start + timedelta(hours = 5)
-    integrationFrame = "TOD"
-    gravityFrame = "PEF"
-    initialOrbit = Orbit(np.array([6542.76,2381.36,-0.000102,0.3928,-1.0793,7.592]),
-                        start,"cartesian",integrationFrame,None)
-
-    # creating satellite
-    sat = SatelliteSpecs("SAT1", #name
-                        2,       #CD
-                        50,      #mass [kg]
-                        2)      #area [m²]
-
-    # creating force model
-    force = Force(integrationFrame = integrationFrame, gravityFrame = gravityFrame)
-    grav = GravityAcceleration(5,5)
-    DragHandler = ExponentialDragDb()
-    drag = AtmosphericDrag(sat,DragHandler)
-    two_body = TwoBody()
-    force.addForce(grav)
-    # force.addForce(drag)
-    force.addForce(two_body)
-    # print(force)
-
-    # creating propagator & generator
-    prop = Semianalytical(propagation_step,force,method="RK45",frame=initialOrbit.frame,
-                        quadrature_order = 20, DFT_lmb_len = 32, DFT_sideral_len=32,
-                        outputs=("mean","osculating"))
-    initialOrbit.propagator = prop
-    initialOrbit.state = "mean"
-    gen = initialOrbit.iter(stop=stop,step=output_step)
-
-
-    ephm_osc = []
-    ephm_mean = []
-    output_form = "equinoctial_mean"
-    # generate orbit
-    for mean,osc in gen:
-        ephm_osc.append(osc.copy(form=output_form))
-        ephm_mean.append(mean.copy(form=output_form))
-
-        print(mean.date)
-
-
-    # Time array
-    dt = (ephm_osc[1].date - ephm_osc[0].date).total_seconds()
-    delta_t = (ephm_osc[-1].date - ephm_osc[0].date).total_seconds()
-    t = [t_i for t_i in range(0,round(delta_t+dt),round(dt))]
-    xlabel = 'Time [s]'
-
-
-    for ephm,label in zip([ephm_osc,ephm_mean],["osc","mean"]):
-        x0 = [x[0] for x in ephm]
-        x1 = [x[1] for x in ephm]
-        x2 = [x[2] for x in ephm]
-        x3 = [x[3] for x in ephm]
-        x4 = [x[4] for x in ephm]
-        x5 = [x[5] for x in ephm]
-        plot_graphs(x0,t,forms[output_form][0],"",xlabel,i=0,label=label,show_label=True)
-        plot_graphs(x1,t,forms[output_form][1],"",xlabel,i=1,label=label,show_label=True)
-        plot_graphs(x2,t,forms[output_form][2],"",xlabel,i=2,label=label,show_label=True)
-        plot_graphs(x3,t,forms[output_form][3],"",xlabel,i=3,label=label,show_label=True)
-        plot_graphs(x4,t,forms[output_form][4],"",xlabel,i=4,label=label,show_label=True)
-        plot_graphs(x5,t,forms[output_form][5],"",xlabel,i=5,label=label,show_label=True)
-    show_plots(True)
-
-
-
-
-def main():
-    SemianalyticalExample()
-
-if __name__ == "__main__":
-    main()
+MU_EARTH = 398600.4418      # km^3 / s^2
+EARTH_RADIUS_KM = 6378.137
+J2 = 1.08262668e-3
+
+ELEMENT_KEYS = ("a", "e", "i", "raan", "argp", "M")
+
+
+def solve_kepler(M: np.ndarray, e: np.ndarray, tol: float = 1e-12, max_iter: int = 20) -> np.ndarray:
+    """
+    Solve E - e sin E = M for the eccentric anomaly E (elliptic orbits).
+    M and e broadcast against each other.
+    """
+    M = np.mod(M, 2 * np.pi)
+    e = np.broadcast_to(e, M.shape)
+    E = np.where(e < 0.8, M, np.pi)
+    for _ in range(max_iter):
+        f = E - e * np.sin(E) - M
+        step = f / (1.0 - e * np.cos(E))
+        E = E - step
+        if np.max(np.abs(step), initial=0.0) < tol:
+            break
+    return E
+
+
+def j2_rates(a: np.ndarray, e: np.ndarray, i: np.ndarray, j2: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Secular rates (rad/s) of RAAN, argument of perigee and mean anomaly.
+    """
+    n = np.sqrt(MU_EARTH / a ** 3)
+    if not j2:
+        zero = np.zeros_like(n)
+        return zero, zero, n
+    p = a * (1.0 - e ** 2)
+    k = 1.5 * J2 * (EARTH_RADIUS_KM / p) ** 2 * n
+    sin2 = np.sin(i) ** 2
+    raan_dot = -k * np.cos(i)
+    argp_dot = k * (2.0 - 2.5 * sin2)
+    m_dot = n + k * np.sqrt(1.0 - e ** 2) * (1.0 - 1.5 * sin2)
+    return raan_dot, argp_dot, m_dot
+
+
+def _perifocal_axes(i, raan, argp) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unit vectors P (towards perigee) and Q in the inertial frame, shape (..., 3).
+    """
+    i, raan, argp = np.broadcast_arrays(i, raan, argp)
+    cO, sO = np.cos(raan), np.sin(raan)
+    cw, sw = np.cos(argp), np.sin(argp)
+    ci, si = np.cos(i), np.sin(i)
+    P = np.stack([cO * cw - sO * sw * ci, sO * cw + cO * sw * ci, sw * si], axis=-1)
+    Q = np.stack([-cO * sw - sO * cw * ci, -sO * sw + cO * cw * ci, cw * si], axis=-1)
+    return P, Q
+
+
+def elements_to_rv(a, e, i, raan, argp, M) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Position [km] and velocity [km/s] arrays of shape (..., 3) from
+    broadcastable element arrays.
+    """
+    E = solve_kepler(np.asarray(M, dtype=float), np.asarray(e, dtype=float))
+    cE, sE = np.cos(E), np.sin(E)
+    b = np.sqrt(1.0 - e ** 2)
+    r_norm = a * (1.0 - e * cE)
+
+    x_pf = a * (cE - e)
+    y_pf = a * b * sE
+    vscale = np.sqrt(MU_EARTH * a) / r_norm
+    vx_pf = -vscale * sE
+    vy_pf = vscale * b * cE
+
+    P, Q = _perifocal_axes(i, raan, argp)
+    r = x_pf[..., None] * P + y_pf[..., None] * Q
+    v = vx_pf[..., None] * P + vy_pf[..., None] * Q
+    return r, v
+
+
+def rv_to_elements(r: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Osculating elements (n, 6) from position/velocity arrays of shape (n, 3).
+    Circular orbits get argp=0 and equatorial orbits RAAN=0.
+    """
+    r = np.atleast_2d(np.asarray(r, dtype=float))
+    v = np.atleast_2d(np.asarray(v, dtype=float))
+    r_norm = np.linalg.norm(r, axis=1)
+    v2 = np.einsum("ij,ij->i", v, v)
+    rv = np.einsum("ij,ij->i", r, v)
+
+    h = np.cross(r, v)
+    h_norm = np.linalg.norm(h, axis=1)
+    w = h / h_norm[:, None]
+    e_vec = ((v2 - MU_EARTH / r_norm)[:, None] * r - rv[:, None] * v) / MU_EARTH
+    e = np.linalg.norm(e_vec, axis=1)
+    a = 1.0 / (2.0 / r_norm - v2 / MU_EARTH)
+    i = np.arccos(np.clip(w[:, 2], -1.0, 1.0))
+
+    # ascending node direction; x axis for equatorial orbits
+    node = np.stack([-h[:, 1], h[:, 0], np.zeros(len(h))], axis=1)
+    node_norm = np.linalg.norm(node, axis=1)
+    equatorial = node_norm < 1e-10 * h_norm
+    node = np.where(equatorial[:, None], [1.0, 0.0, 0.0], node / np.where(equatorial, 1.0, node_norm)[:, None])
+    m = np.cross(w, node)
+
+    raan = np.mod(np.arctan2(node[:, 1], node[:, 0]), 2 * np.pi)
+    u = np.arctan2(np.einsum("ij,ij->i", r, m), np.einsum("ij,ij->i", r, node))
+    argp = np.where(e < 1e-10, 0.0,
+                    np.arctan2(np.einsum("ij,ij->i", e_vec, m), np.einsum("ij,ij->i", e_vec, node)))
+    nu = u - argp
+
+    E = np.arctan2(np.sqrt(1.0 - e ** 2) * np.sin(nu), e + np.cos(nu))
+    M = E - e * np.sin(E)
+    return np.stack([a, e, i, raan, np.mod(argp, 2 * np.pi), np.mod(M, 2 * np.pi)], axis=1)
+
+
+def propagate(elements: np.ndarray, t: np.ndarray, j2: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Propagate n orbits over m times (seconds from the element epoch).
+
+    Returns position and velocity arrays of shape (n, m, 3).
+    """
+    el = np.atleast_2d(np.asarray(elements, dtype=float))
+    t = np.atleast_1d(np.asarray(t, dtype=float))
+    a, e, i, raan0, argp0, M0 = (el[:, k:k + 1] for k in range(6))
+
+    raan_dot, argp_dot, m_dot = j2_rates(a, e, i, j2)
+    raan = raan0 + raan_dot * t
+    argp = argp0 + argp_dot * t
+    M = M0 + m_dot * t
+    return elements_to_rv(a, e, i, raan, argp, M)
+
+
+def propagate_at(elements: np.ndarray, t: np.ndarray, j2: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Propagate orbit k of elements (k, 6) to its own time t[k].
+    Returns (k, 3) position and velocity.
+    """
+    el = np.atleast_2d(np.asarray(elements, dtype=float))
+    t = np.asarray(t, dtype=float)
+    a, e, i = el[:, 0], el[:, 1], el[:, 2]
+    raan_dot, argp_dot, m_dot = j2_rates(a, e, i, j2)
+    return elements_to_rv(a, e, i, el[:, 3] + raan_dot * t, el[:, 4] + argp_dot * t, el[:, 5] + m_dot * t)
+
+
+def propagate_states(r: np.ndarray, v: np.ndarray, dt: np.ndarray, j2: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict where n satellites with states (r, v) are dt seconds later
+    (dt scalar or per satellite). Returns (n, 3) position and velocity.
+    """
+    el = rv_to_elements(r, v)
+    return propagate_at(el, np.broadcast_to(np.asarray(dt, dtype=float), (len(el),)), j2)
+
+
+def circular_elements(radius_km, inclination_deg, raan_deg=0.0, phase_deg=0.0) -> np.ndarray:
+    """
+    (n, 6) elements for circular orbits from broadcastable arrays.
+    """
+    radius_km, inc, raan, phase = np.broadcast_arrays(
+        np.asarray(radius_km, dtype=float), np.radians(inclination_deg),
+        np.radians(raan_deg), np.radians(phase_deg),
+    )
+    zeros = np.zeros(radius_km.shape)
+    return np.stack([radius_km, zeros, inc, raan, zeros, phase], axis=-1).reshape(-1, 6)
@@ -7,10 +7,14 @@ Instead of a TensorFlow autoencoder, we use simple rule-based checks
 to compute an anomaly score between 0 and 1.
 """
 
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
+# (low, elevated, high) temperature limits in °C
+DEFAULT_TEMP_LIMITS = (-20.0, 60.0, 80.0)
 
-def detect(features: Dict[str, float]) -> Tuple[float, str]:
+
+def detect(features: Dict[str, float],
+           temp_limits: Optional[Tuple[float, float, float]] = None) -> Tuple[float, str]:
     """
     Detect anomaly based on sensor readings and temperature.
 
@@ -20,6 +24,8 @@ def detect(features: Dict[str, float]) -> Tuple[float, str]:
             - battery_level_pct
             - comm_signal_db
             - orbit_altitude_km (optional)
+        temp_limits: optional (low, elevated, high) temperature limits,
+            e.g. learned per satellite; defaults to DEFAULT_TEMP_LIMITS
 
     Returns:
         score (float): 0–1 anomaly score
@@ -29,18 +35,20 @@ def detect(features: Dict[str, float]) -> Tuple[float, str]:
     battery = features.get("battery_level_pct")
     signal = features.get("comm_signal_db")
 
+    temp_low, temp_elevated, temp_high = temp_limits or DEFAULT_TEMP_LIMITS
+
     score = 0.0
     reasons = []
 
     # Temperature checks
     if temp is not None:
-        if temp > 80:
+        if temp > temp_high:
             score += 0.6
             reasons.append(f"High temperature {temp:.1f} °C")
-        elif temp > 60:
+        elif temp > temp_elevated:
             score += 0.3
             reasons.append(f"Elevated temperature {temp:.1f} °C")
-        elif temp < -20:
+        elif temp < temp_low:
             score += 0.4
             reasons.append(f"Very low temperature {temp:.1f} °C")
 
@@ -51,4 +51,45 @@ def compute_anomaly(features: np.ndarray) -> dict:
         "severity": severity,
         "issues": issues,
         "score": score
-    }
\ No newline at end of file
+    }
+
+def compute_anomaly_batch(features: np.ndarray, upper: np.ndarray = None,
+                          extra_checks: list = None) -> list:
+    """
+    Vectorized version of compute_anomaly for an (n, 15) feature matrix.
+    Returns one result dict per row, identical to compute_anomaly.
+
+    upper optionally gives per-row upper limits (n, 15), e.g. learned
+    per-satellite thresholds; without it the fixed limits above are used.
+    extra_checks optionally adds (issue, mask) pairs from stateful
+    detectors (multivariate model, sensor health) to the rule checks.
+    """
+    features = np.atleast_2d(features)
+    if upper is None:
+        upper = np.full_like(features, np.inf, dtype=float)
+        upper[:, 6], upper[:, 7], upper[:, 14] = 70, 60, 0.2
+
+    checks = [
+        ("HIGH_PAYLOAD_TEMPERATURE", features[:, 6] > upper[:, 6]),
+        ("HIGH_BATTERY_TEMPERATURE", features[:, 7] > upper[:, 7]),
+        ("HIGH_PACKET_LOSS", features[:, 14] > upper[:, 14]),
+        ("SENSOR_INCONSISTENCY", np.std(features[:, 9:12], axis=1) > 50),
+    ]
+    checks += [(name, np.asarray(mask, dtype=bool)) for name, mask in extra_checks or []]
+    counts = np.sum([mask for _, mask in checks], axis=0)
+
+    results = []
+    for i in range(features.shape[0]):
+        issues = [name for name, mask in checks if mask[i]]
+        if not issues:
+            severity = "normal"
+        elif len(issues) == 1:
+            severity = "warning"
+        else:
+            severity = "critical"
+        results.append({
+            "severity": severity,
+            "issues": issues,
+            "score": min(1.0, int(counts[i]) / 3.0),
+        })
+    return results
@@ -0,0 +1,173 @@
+# backend/services/compression.py
+"""
+Swinging-door compression of stored telemetry.
+
+Per satellite, every channel has a tolerance. Starting from the last
+stored (archived) sample, each channel keeps the range of slopes that a
+straight line from the archived point may take while staying within
+tolerance of every sample since. A sample is held back as long as the
+line straight to it lies inside every channel's range; once it falls
+outside one, the previous (held) sample is stored and becomes the new
+archive point. Linear interpolation between
+stored samples therefore reproduces every dropped value of every channel
+to within its tolerance.
+
+Stored rows stay complete samples, so raw-row reads work unchanged; only
+rows in between are missing. The newest received sample is held in memory
+until it is stored or flushed (flush_all on shutdown), and series reads
+include it. Detection always sees every raw sample; this only decides
+what is written.
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.services.passes import to_epoch
+
+
+def parse_tolerances(spec: str) -> Dict[str, float]:
+    """
+    "channel:tol,channel:tol" -> {channel: tol}
+    """
+    out = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        name, tol = item.split(":")
+        out[name.strip()] = float(tol)
+    return out
+
+
+class _DoorState:
+    __slots__ = ("t0", "v0", "upper", "lower", "last", "last_t", "last_v")
+
+    def __init__(self, t0: float, v0: np.ndarray):
+        self.t0, self.v0 = t0, v0
+        self.upper = np.full(len(v0), np.inf)
+        self.lower = np.full(len(v0), -np.inf)
+        self.last, self.last_t, self.last_v = None, t0, v0
+
+
+class SwingingDoorCompressor:
+
+    def __init__(self, channels: Sequence[str], tolerances: Dict[str, float], max_gap_s: float = 600.0):
+        self.channels = tuple(channels)
+        self.tolerance = np.array([tolerances.get(c, 0.0) for c in self.channels], dtype=float)
+        self.max_gap_s = max_gap_s
+        self._state: Dict[str, _DoorState] = {}
+        self._received = 0
+        self._stored = 0
+        self._lock = threading.Lock()
+
+    def _values(self, sample: Dict[str, Any]) -> np.ndarray:
+        return np.array([np.nan if sample.get(c) is None else sample[c] for c in self.channels], dtype=float)
+
+    def offer(self, satellite_id: str, sample: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Feed one raw sample (dict with channels and a timestamp). Returns
+        the samples that must be stored now: the first sample of a
+        satellite, or the previous sample when a door closes.
+        """
+        t = to_epoch(sample["timestamp"])
+        v = self._values(sample)
+        with self._lock:
+            self._received += 1
+            st = self._state.get(satellite_id)
+            if st is None or t <= st.last_t:
+                # first (or out-of-order) sample: store it, and whatever was held
+                out = [sample] if st is None or st.last is None else [st.last, sample]
+                self._state[satellite_id] = _DoorState(t, v)
+                self._stored += len(out)
+                return out
+
+            dt = t - st.t0
+            with np.errstate(invalid="ignore"):
+                # the line straight to this sample must fit every sample since
+                # the archive point, i.e. its slope must be inside the doors
+                slope = (v - st.v0) / dt
+                outside = (slope > st.upper) | (slope < st.lower)
+                upper = np.fmin(st.upper, slope + self.tolerance / dt)
+                lower = np.fmax(st.lower, slope - self.tolerance / dt)
+            gaps_changed = np.isnan(v) != np.isnan(st.v0)
+            closed = outside.any() or gaps_changed.any() or dt > self.max_gap_s
+            if not closed:
+                st.upper, st.lower = upper, lower
+                st.last, st.last_t, st.last_v = sample, t, v
+                return []
+
+            out = []
+            if st.last is not None:
+                # archive the previous sample and restart the doors from it
+                out.append(st.last)
+                new = _DoorState(st.last_t, st.last_v)
+                dt = t - new.t0
+                with np.errstate(invalid="ignore"):
+                    new.upper = (v + self.tolerance - new.v0) / dt
+                    new.lower = (v - self.tolerance - new.v0) / dt
+                if (np.isnan(v) != np.isnan(new.v0)).any() or dt > self.max_gap_s:
+                    out.append(sample)
+                    new = _DoorState(t, v)
+                else:
+                    new.last, new.last_t, new.last_v = sample, t, v
+            else:
+                out.append(sample)
+                new = _DoorState(t, v)
+            self._state[satellite_id] = new
+            self._stored += len(out)
+            return out
+
+    def pending(self, satellite_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Newest received sample of a satellite that is not stored (yet).
+        """
+        with self._lock:
+            st = self._state.get(satellite_id)
+            return st.last if st else None
+
+    def flush_all(self) -> List[Dict[str, Any]]:
+        """
+        Pending samples of every satellite; they become archive points.
+        """
+        with self._lock:
+            out = []
+            for sat_id, st in self._state.items():
+                if st.last is not None:
+                    out.append(st.last)
+                    self._state[sat_id] = _DoorState(st.last_t, st.last_v)
+            self._stored += len(out)
+            return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "received": self._received,
+                "stored": self._stored,
+                "ratio": self._received / self._stored if self._stored else None,
+            }
+
+
+def reconstruct(times: Sequence[datetime], values: np.ndarray, query: Sequence[datetime],
+                channels: Optional[int] = None) -> np.ndarray:
+    """
+    Linearly interpolate stored samples (times ascending, values (n, c)) at
+    the query times; NaN outside the stored range or where a channel is
+    missing at either neighbour. channels gives c when there may be no
+    stored samples to take it from.
+    """
+    t = np.array([to_epoch(x) for x in times], dtype=float)
+    q = np.array([to_epoch(x) for x in query], dtype=float)
+    values = np.asarray(values, dtype=float).reshape(len(t), -1 if channels is None else channels)
+    out = np.full((len(q), values.shape[1]), np.nan)
+    if len(t) == 0:
+        return out
+    inside = (q >= t[0]) & (q <= t[-1])
+    right = np.clip(np.searchsorted(t, q, side="left"), 1, max(len(t) - 1, 1))
+    left = right - 1
+    if len(t) == 1:
+        out[inside] = values[0]
+        return out
+    w = ((q - t[left]) / np.where(t[right] > t[left], t[right] - t[left], 1.0))[:, None]
+    interp = values[left] + w * (values[right] - values[left])
+    exact = (q == t[right])[:, None]
+    out[inside] = np.where(exact, values[right], interp)[inside]
+    return out
@@ -0,0 +1,153 @@
+# backend/services/conjunction.py
+"""
+Conjunction screening over the whole fleet.
+
+Every tick the latest state vector of each satellite (as tracked for pass
+prediction) is propagated over a look-ahead grid of step_s. At each grid
+time the positions go into a uniform grid hash (utils.spatial) whose cell
+size is the miss-distance threshold plus the furthest two objects can
+close on each other within half a step, so no approach between grid times
+is missed. Only those candidate pairs are refined: relative motion is taken
+as linear around the grid time to get the time and distance of closest
+approach. Each pair is reported once, at its closest approach in the
+window.
+
+Per grid time this is O(n log n) plus the candidates; orbits that are not
+bound above the surface (bad state vectors) are left out.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.config import (
+    CONJUNCTION_LOOKAHEAD_S, CONJUNCTION_MAX_STATE_AGE_S, CONJUNCTION_STEP_S, CONJUNCTION_THRESHOLD_KM,
+)
+from backend.core.logger import logger
+from backend.models.propagation import EARTH_RADIUS_KM, propagate_at, rv_to_elements
+from backend.services.passes import PASSES, PassPredictor
+from backend.utils.spatial import grid_pairs
+
+
+class ConjunctionScreener:
+
+    def __init__(self, passes: PassPredictor, threshold_km: float = 5.0, lookahead_s: float = 600.0,
+                 step_s: float = 10.0, max_state_age_s: float = 86400.0):
+        self.passes = passes
+        self.threshold_km = threshold_km
+        self.lookahead_s = lookahead_s
+        self.step_s = step_s
+        self.max_state_age_s = max_state_age_s
+        self._conjunctions: List[Dict[str, Any]] = []
+        self._stats: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def screen(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Pairs predicted closer than threshold_km within [now, now +
+        lookahead_s], soonest first. Also kept as the latest result.
+        """
+        now = time.time() if now is None else now
+        started = time.monotonic()
+        ids, epochs, r, v = self.passes.states()
+        fresh = now - epochs <= self.max_state_age_s
+        elements = rv_to_elements(r, v) if len(ids) else np.zeros((0, 6))
+        ok = (fresh & (elements[:, 1] < 1.0) & (elements[:, 0] * (1.0 - elements[:, 1]) > EARTH_RADIUS_KM)
+              & np.isfinite(elements).all(axis=1))
+        idx = np.flatnonzero(ok)
+        elements, epochs = elements[idx], epochs[idx]
+
+        # pair (i, j) -> (miss distance, tca, relative speed)
+        best: Dict[Tuple[int, int], Tuple[float, float, float]] = {}
+        candidates = 0
+        half = self.step_s / 2
+        for t in now + np.arange(0.0, self.lookahead_s + half, self.step_s):
+            if len(idx) < 2:
+                break
+            pos, vel = propagate_at(elements, t - epochs)
+            speed = np.linalg.norm(vel, axis=1)
+            # two objects close at most at the sum of their speeds
+            reach = self.threshold_km + 2 * float(speed.max()) * half
+            i, j = grid_pairs(pos, reach)
+            candidates += len(i)
+            if not len(i):
+                continue
+            dr, dv = pos[j] - pos[i], vel[j] - vel[i]
+            dv2 = np.einsum("ij,ij->i", dv, dv)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                tau = np.where(dv2 > 0, -np.einsum("ij,ij->i", dr, dv) / dv2, 0.0)
+            # within this step's share of the window
+            tau = np.clip(tau, max(-half, now - t), min(half, now + self.lookahead_s - t))
+            miss = np.linalg.norm(dr + dv * tau[:, None], axis=1)
+            for k in np.flatnonzero(miss < self.threshold_km):
+                pair = (int(i[k]), int(j[k])) if i[k] < j[k] else (int(j[k]), int(i[k]))
+                if pair not in best or miss[k] < best[pair][0]:
+                    best[pair] = (float(miss[k]), float(t + tau[k]), float(np.sqrt(dv2[k])))
+
+        conjunctions = sorted(
+            (
+                {
+                    "satellite_a": ids[idx[a]],
+                    "satellite_b": ids[idx[b]],
+                    "tca": datetime.utcfromtimestamp(tca).isoformat(),
+                    "miss_distance_km": miss,
+                    "relative_speed_km_s": rel,
+                }
+                for (a, b), (miss, tca, rel) in best.items()
+            ),
+            key=lambda c: c["tca"],
+        )
+        with self._lock:
+            self._conjunctions = conjunctions
+            self._stats = {
+                "screened_at": datetime.utcfromtimestamp(now).isoformat(),
+                "objects": int(len(idx)),
+                "skipped": int(len(ids) - len(idx)),
+                "candidates": candidates,
+                "conjunctions": len(conjunctions),
+                "duration_s": time.monotonic() - started,
+            }
+        return conjunctions
+
+    def latest(self, satellite_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            items = self._conjunctions
+            stats = dict(self._stats)
+        if satellite_id is not None:
+            items = [c for c in items if satellite_id in (c["satellite_a"], c["satellite_b"])]
+        return {**stats, "data": items}
+
+
+class ConjunctionWorker:
+    """
+    Background thread re-screening the fleet every interval_s.
+    """
+
+    def __init__(self, screener: ConjunctionScreener, interval_s: float = 5.0):
+        self.screener = screener
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="conjunctions", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                found = self.screener.screen()
+                if found:
+                    logger.warning(f"{len(found)} conjunctions within {self.screener.threshold_km} km predicted")
+            except Exception as e:
+                logger.error(f"Conjunction screening failed: {e}")
+
+
+CONJUNCTIONS = ConjunctionScreener(
+    PASSES, CONJUNCTION_THRESHOLD_KM, CONJUNCTION_LOOKAHEAD_S, CONJUNCTION_STEP_S, CONJUNCTION_MAX_STATE_AGE_S,
+)
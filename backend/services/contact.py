@@ -0,0 +1,101 @@
+# backend/services/contact.py
+"""
+Contact-aware comms gap scoring.
+
+Every telemetry sample is a contact. For the gap since the satellite's
+previous sample, the predicted pass table says how much of it fell inside
+a ground-station window; only that part counts as an outage, so planned
+loss of signal below the horizon is never flagged. The typical in-window
+gap is tracked per satellite as an EWMA. Each sample costs two binary
+searches on the satellite's pass table.
+
+Parts of a gap not covered by the current pass table (before it was
+computed) are treated as planned, to avoid alerts on missing predictions.
+Satellites without a pass table are scored on the raw gap.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.models.comms_seq_model import detect as comms_detect
+from backend.services.passes import PASSES, PassPredictor, to_epoch
+from backend.services.snapshot import register_provider
+
+
+class ContactScorer:
+
+    def __init__(self, passes: PassPredictor, alpha: float = 0.1, min_avg_gap_min: float = 1.0):
+        self.passes = passes
+        self.alpha = alpha
+        self.min_avg_gap_min = min_avg_gap_min
+        self._last: Dict[str, float] = {}
+        self._avg_gap_min: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def features(self, satellite_id: str, t: float) -> Optional[Dict[str, float]]:
+        """
+        Gap features for a sample at UNIX time t, updating the per-satellite
+        state. None for the first sample of a satellite (or out-of-order ones).
+        """
+        with self._lock:
+            last = self._last.get(satellite_id)
+            if last is not None and t < last:
+                return None
+            self._last[satellite_id] = t
+        if last is None:
+            return None
+
+        gap_min = (float(t) - last) / 60.0
+        feats = {"last_gap_min": gap_min}
+        in_window_min = gap_min
+
+        table = self.passes.table(satellite_id)
+        if table is not None:
+            start = max(last, table.computed_at)
+            covered = float(table.contact_seconds(start, t)) if t > start else 0.0
+            in_window_min = covered / 60.0
+            feats["expected_gap_min"] = gap_min - in_window_min
+
+        with self._lock:
+            avg = self._avg_gap_min.get(satellite_id)
+            feats["avg_contact_gap_min"] = max(avg if avg is not None else in_window_min, self.min_avg_gap_min)
+            # only learn from gaps that look normal, so an outage doesn't raise the baseline
+            if avg is None or in_window_min <= 2 * feats["avg_contact_gap_min"]:
+                self._avg_gap_min[satellite_id] = (
+                    in_window_min if avg is None else (1 - self.alpha) * avg + self.alpha * in_window_min
+                )
+        return feats
+
+    def score(self, satellite_id: str, timestamp) -> Tuple[float, str]:
+        feats = self.features(satellite_id, to_epoch(timestamp))
+        if feats is None:
+            return 0.0, "Communication pattern nominal"
+        return comms_detect(feats)
+
+    def score_batch(self, samples: List[Dict[str, Any]]) -> List[Tuple[float, str]]:
+        return [self.score(s["satellite_id"], s["timestamp"]) for s in samples]
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            ids = list(self._last)
+            return {
+                "satellite_ids": np.array(ids, dtype=str),
+                "last": np.array([self._last[s] for s in ids], dtype=float),
+                "avg_gap_min": np.array([self._avg_gap_min.get(s, np.nan) for s in ids], dtype=float),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        with self._lock:
+            for sat_id, last, avg in zip(arrays["satellite_ids"].tolist(), arrays["last"].tolist(),
+                                         arrays["avg_gap_min"].tolist()):
+                self._last[sat_id] = last
+                if not np.isnan(avg):
+                    self._avg_gap_min[sat_id] = avg
+
+
+CONTACTS = ContactScorer(PASSES)
+
+register_provider("contacts", CONTACTS.export_arrays, CONTACTS.import_arrays,
+                  {"satellite_ids": ("last", "avg_gap_min")})
@@ -0,0 +1,64 @@
+# backend/services/detection.py
+"""
+Per-sample detection pipeline.
+
+Shared by the in-process ingest path and the sharded ingest workers, so the
+same code owns the per-satellite detector state wherever it runs.
+"""
+from typing import Any, Dict, List
+
+from backend.services.preprocess import preprocess_batch
+from backend.services.feature_engineering import FEATURE_STORE
+from backend.services.anomaly_engine import compute_anomaly_batch
+from backend.services.state import ORBIT_KEYS, get_orbit_state, set_orbit_state
+from backend.services.multivariate import MULTIVARIATE
+from backend.services.sensor_health import FAULT_CODES, SENSOR_COLUMNS, SENSOR_HEALTH
+from backend.services.thresholds import FEATURE_COLUMNS, FEATURE_THRESHOLDS, feature_limits
+from backend.services.forecast import FEATURE_FORECAST
+from backend.models.orbit_kalman import detect as orbit_detect
+
+
+def detect_batch(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run anomaly detection for a list of telemetry dicts.
+
+    Derived features are computed once for the batch by the feature store
+    and every detector reads its inputs from that frame.
+
+    Rule checks, the multivariate score and sensor fault classification are
+    evaluated on the whole batch at once, against per-satellite state that
+    then learns from the batch; the orbit drift filter is then advanced per
+    sample, in order, so the per-satellite state sees samples in the order
+    they arrived.
+    """
+    if not samples:
+        return []
+
+    features = preprocess_batch(samples)
+    sat_ids = [s["satellite_id"] for s in samples]
+    timestamps = [s.get("timestamp") for s in samples]
+    frame = FEATURE_STORE.update(sat_ids, timestamps, features)
+    multivariate = MULTIVARIATE.score_update(sat_ids, frame.matrix(MULTIVARIATE.channels))
+    sensors = SENSOR_HEALTH.update(sat_ids, features[:, SENSOR_COLUMNS])
+    # trends towards the checked limits, before the limits learn from this batch
+    forecasts = FEATURE_FORECAST.update(sat_ids, timestamps, features[:, FEATURE_COLUMNS])
+    extra_checks = [("CORRELATED_DRIFT", [m["flagged"] for m in multivariate])] + [
+        (code, [code in s["issues"] for s in sensors]) for code in FAULT_CODES.values()
+    ] + [("PREDICTED_LIMIT_BREACH", [f["flagged"] for f in forecasts])]
+    results = compute_anomaly_batch(features, feature_limits(sat_ids), extra_checks)
+    FEATURE_THRESHOLDS.update(sat_ids, features[:, FEATURE_COLUMNS])
+
+    rows = zip(sat_ids, results, multivariate, sensors, forecasts)
+    for i, (sat_id, anomaly, mv, sensor, forecast) in enumerate(rows):
+        score, message, new_state = orbit_detect(get_orbit_state(sat_id), frame.row(i, ORBIT_KEYS))
+        set_orbit_state(sat_id, new_state)
+        anomaly["orbit"] = {"score": score, "message": message}
+        anomaly["multivariate"] = {"score": mv["score"], "message": mv["message"]}
+        anomaly["sensors"] = {"score": sensor["score"], "message": sensor["message"]}
+        anomaly["forecast"] = {"score": forecast["score"], "message": forecast["message"], "eta_s": forecast["eta_s"]}
+
+    return results
+
+
+def detect_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
+    return detect_batch([sample])[0]
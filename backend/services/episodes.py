@@ -0,0 +1,249 @@
+# backend/services/episodes.py
+"""
+Anomaly episodes.
+
+Instead of one row per anomalous sample, each (satellite, issue) condition
+is one row: it is inserted when the issue first appears, its peak severity
+and score, sample count and last_seen are updated in place while it
+persists, and ended_at is set on the first sample without it (or at
+last_seen, when the satellite was silent for longer than max_gap_s).
+
+Open episodes are tracked in memory, so a sample costs no reads; updates of
+a whole batch go out as one executemany UPDATE in the caller's
+transaction. DB-agnostic: both ingest paths pass their own model class and
+the name of its issue column.
+
+observe() only stages its changes: memory is updated by commit() after
+the caller's transaction commits, and rollback() discards them, so a
+failed commit can't leave the tracker pointing at rows that don't exist.
+One transaction at a time stages changes (observe() holds the tracker's
+write lock until commit() / rollback()), and observe() must be the first
+write of that transaction, so the SQLite write lock is always taken after
+the tracker's. Reads only take a short lock on memory and never wait for
+SQL.
+"""
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+SEVERITY_RANK = {"normal": 0, "warning": 1, "critical": 2}
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    # stored DateTime columns are naive UTC; ingest may hand us aware values
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+@dataclass
+class Episode:
+    row: Any                     # ORM object until flushed, then its id
+    severity: str
+    score: float
+    count: int
+    last_seen: datetime
+    started: datetime
+
+    @property
+    def row_id(self) -> Optional[int]:
+        return self.row if isinstance(self.row, int) else getattr(self.row, "id", None)
+
+
+class EpisodeChange(NamedTuple):
+    """An episode row that was opened, changed its peak, or closed."""
+    row_id: int
+    started: datetime
+    severity: str
+    score: float
+    ended: bool
+
+
+@dataclass
+class _Staged:
+    # satellite_id -> its open episodes after the transaction
+    open: Dict[str, Dict[str, Episode]]
+    latest_severity: Dict[str, str]
+    changes: List[EpisodeChange] = field(default_factory=list)
+
+
+class EpisodeTracker:
+
+    def __init__(self, model, issue_column: str, max_gap_s: float = 3600.0):
+        self.model = model
+        self.issue_column = issue_column
+        self.max_gap_s = max_gap_s
+        self._open: Dict[str, Dict[str, Episode]] = {}
+        self._latest_severity: Dict[str, str] = {}
+        # memory only; never held while SQL runs
+        self._lock = threading.Lock()
+        # held from observe() to commit() / rollback()
+        self._write_lock = threading.Lock()
+        self._key = ("episodes", id(self))
+
+    def load(self, db: Session):
+        """
+        Resume episodes left open by a previous run.
+        """
+        m = self.model
+        rows = db.query(m.id, m.satellite_id, getattr(m, self.issue_column), m.severity, m.score,
+                        m.sample_count, m.last_seen, m.timestamp).filter(m.ended_at.is_(None)).all()
+        with self._lock:
+            for row_id, sat_id, issue, severity, score, count, last_seen, started in rows:
+                self._open.setdefault(sat_id, {})[issue] = Episode(
+                    row_id, severity, score or 0.0, count or 1, last_seen or started, started,
+                )
+
+    def observe(self, db: Session, samples: Iterable[Tuple[str, datetime, List[str], str, float]]) -> List[Any]:
+        """
+        Apply (satellite_id, timestamp, issues, severity, score) samples, in
+        order. New episode rows are added to the session, closes and in-place
+        updates are executed on it; the caller commits and then calls
+        commit(db), or rollback(db) if the transaction failed. Returns the
+        ORM objects of the episodes opened.
+        """
+        if self._key in db.info:
+            raise RuntimeError("episodes already staged on this transaction")
+        samples = [(sat_id, _naive_utc(ts), issues, severity, score)
+                   for sat_id, ts, issues, severity, score in samples]
+        self._write_lock.acquire()
+        try:
+            with self._lock:
+                # copies: memory keeps the committed state until commit()
+                staged = _Staged({
+                    sat_id: {issue: replace(ep) for issue, ep in self._open.get(sat_id, {}).items()}
+                    for sat_id in {s[0] for s in samples}
+                }, {})
+            opened = self._stage(db, staged, samples)
+        except BaseException:
+            self._write_lock.release()
+            raise
+        db.info[self._key] = staged
+        return opened
+
+    def commit(self, db: Session) -> List[EpisodeChange]:
+        """
+        Make the changes staged on db's transaction current; call after
+        db.commit() succeeded. Returns the episodes opened, closed or with
+        a new peak severity / score.
+        """
+        staged = db.info.pop(self._key, None)
+        if staged is None:
+            return []
+        with self._lock:
+            for sat_id, episodes in staged.open.items():
+                if episodes:
+                    self._open[sat_id] = episodes
+                else:
+                    self._open.pop(sat_id, None)
+            self._latest_severity.update(staged.latest_severity)
+        self._write_lock.release()
+        return staged.changes
+
+    def rollback(self, db: Session):
+        """
+        Drop the changes staged on db's transaction (no-op if none).
+        """
+        if db.info.pop(self._key, None) is not None:
+            self._write_lock.release()
+
+    def _stage(self, db: Session, staged: _Staged, samples) -> List[Any]:
+        opened = []
+        peaks = {ep.row: (ep.severity, ep.score) for eps in staged.open.values() for ep in eps.values()}
+        # row id -> episode, and closes, to write once per episode
+        touched: Dict[int, Episode] = {}
+        closes: Dict[int, datetime] = {}
+        for sat_id, ts, issues, severity, score in samples:
+            staged.latest_severity[sat_id] = severity
+            episodes = staged.open[sat_id]
+            for issue, ep in list(episodes.items()):
+                gap = (ts - ep.last_seen).total_seconds()
+                if issue not in issues or gap > self.max_gap_s:
+                    ended_at = ts if gap <= self.max_gap_s else ep.last_seen
+                    if isinstance(ep.row, int):
+                        closes[ep.row] = ended_at
+                        touched[ep.row] = ep
+                    else:
+                        # opened and closed within the same batch, still pending insert
+                        ep.row.ended_at = ended_at
+                    del episodes[issue]
+            for issue in dict.fromkeys(issues):
+                ep = episodes.get(issue)
+                if ep is None:
+                    row = self.model(satellite_id=sat_id, severity=severity, score=score, timestamp=ts,
+                                     last_seen=ts, sample_count=1, **{self.issue_column: issue})
+                    db.add(row)
+                    opened.append(row)
+                    episodes[issue] = Episode(row, severity, score, 1, ts, ts)
+                    continue
+                ep.count += 1
+                ep.last_seen = ts
+                ep.score = max(ep.score, score)
+                if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(ep.severity, 0):
+                    ep.severity = severity
+                if isinstance(ep.row, int):
+                    touched[ep.row] = ep
+                else:
+                    ep.row.severity, ep.row.score = ep.severity, ep.score
+                    ep.row.sample_count, ep.row.last_seen = ep.count, ep.last_seen
+
+        if opened:
+            db.flush()
+            for episodes in staged.open.values():
+                for ep in episodes.values():
+                    if not isinstance(ep.row, int):
+                        ep.row = ep.row.id
+        self._write(db, touched, closes)
+
+        staged.changes = [
+            EpisodeChange(row.id, row.timestamp, row.severity, row.score, row.ended_at is not None)
+            for row in opened
+        ] + [
+            EpisodeChange(row_id, ep.started, ep.severity, ep.score, row_id in closes)
+            for row_id, ep in touched.items()
+            if row_id in closes or (ep.severity, ep.score) != peaks[row_id]
+        ]
+        return opened
+
+    def _write(self, db: Session, touched: Dict[int, Episode], closes: Dict[int, datetime]):
+        # one parameter set per episode, however many samples touched it
+        if not touched:
+            return
+        params = [
+            {"rid": row_id, "severity": ep.severity, "score": ep.score, "count": ep.count,
+             "last_seen": ep.last_seen, "ended_at": closes.get(row_id)}
+            for row_id, ep in touched.items()
+        ]
+        m = self.model
+        stmt = (
+            update(m.__table__)
+            .where(m.__table__.c.id == bindparam("rid"))
+            .values(severity=bindparam("severity"), score=bindparam("score"),
+                    sample_count=bindparam("count"), last_seen=bindparam("last_seen"),
+                    ended_at=bindparam("ended_at"))
+        )
+        db.connection().execute(stmt, params)
+
+    # ----- queries -----
+    def current_severity(self, satellite_id: str) -> str:
+        """
+        Severity of the satellite's latest sample, or the worst open episode
+        for satellites not seen since startup.
+        """
+        with self._lock:
+            if satellite_id in self._latest_severity:
+                return self._latest_severity[satellite_id]
+            episodes = self._open.get(satellite_id, {})
+            return max((ep.severity for ep in episodes.values()),
+                       key=lambda s: SEVERITY_RANK.get(s, 0), default="normal")
+
+    def episode_id(self, satellite_id: str, issue: str) -> Optional[int]:
+        with self._lock:
+            ep = self._open.get(satellite_id, {}).get(issue)
+            return ep.row_id if ep else None
+
+    def open_count(self) -> int:
+        with self._lock:
+            return sum(len(e) for e in self._open.values())
@@ -0,0 +1,286 @@
+# backend/services/feature_engineering.py
+"""
+Declarative derived-feature pipeline with a per-satellite feature store.
+
+Features are declared once in a FeatureRegistry on top of the raw
+FEATURE_FIELDS columns:
+
+- derived: stateless functions of the batch columns (orbit radius,
+  altitude, inclination, speed, ...), computed for the whole batch with
+  array operations. They may use features declared before them.
+- lag / rate / mean: per-satellite history of a source column (the value k
+  samples back, the change per second since the previous sample, the mean
+  of the last w samples). Each source keeps one ring buffer per satellite,
+  long enough for every feature reading it.
+
+FeatureStore.update computes every feature once per micro-batch, advancing
+the history one round of unique satellites at a time (see
+helpers.occurrence_rounds), and caches each satellite's latest values.
+Detectors read their inputs from the returned FeatureFrame instead of
+deriving them again.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import FEATURE_ROLLING_WINDOW
+from backend.services.passes import to_epoch
+from backend.services.preprocess import EARTH_RADIUS_KM, FEATURE_FIELDS
+from backend.services.snapshot import register_provider
+from backend.utils.helpers import occurrence_rounds
+
+Columns = Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Feature:
+    names: Tuple[str, ...]
+    kind: str  # "derived", "lag", "rate" or "mean"
+    compute: Optional[Callable[[Columns], np.ndarray]] = None
+    source: Optional[str] = None
+    window: int = 1
+
+
+class FeatureRegistry:
+
+    def __init__(self, base_fields: Sequence[str]):
+        self.base_fields = tuple(base_fields)
+        self.features: List[Feature] = []
+        self._known = set(self.base_fields)
+
+    def _add(self, feature: Feature):
+        if feature.source is not None and feature.source not in self._known:
+            raise ValueError(f"unknown source column {feature.source!r}")
+        clash = self._known.intersection(feature.names)
+        if clash:
+            raise ValueError(f"duplicate feature {sorted(clash)}")
+        self._known.update(feature.names)
+        self.features.append(feature)
+
+    def derived(self, names, compute: Callable[[Columns], np.ndarray]):
+        """
+        compute(columns) returns (n,) for one name or (n, len(names)).
+        """
+        names = (names,) if isinstance(names, str) else tuple(names)
+        self._add(Feature(names, "derived", compute=compute))
+
+    def lag(self, name: str, source: str, k: int = 1):
+        self._add(Feature((name,), "lag", source=source, window=k))
+
+    def rate(self, name: str, source: str):
+        """Change of source per second since the satellite's previous sample."""
+        self._add(Feature((name,), "rate", source=source, window=1))
+
+    def mean(self, name: str, source: str, window: int):
+        """Mean of the last `window` finite values of source, this sample included."""
+        self._add(Feature((name,), "mean", source=source, window=window))
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(n for f in self.features for n in f.names)
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(f.source for f in self.features if f.source is not None))
+
+    def history(self) -> int:
+        """Ring buffer length needed by the stateful features."""
+        sizes = [f.window - 1 if f.kind == "mean" else f.window for f in self.features if f.source]
+        return max(sizes + [1])
+
+
+class FeatureFrame:
+    """
+    Feature values of one batch: an (n, len(names)) matrix.
+    """
+
+    def __init__(self, names: Sequence[str], values: np.ndarray):
+        self.names = tuple(names)
+        self.values = values
+        self._index = {name: j for j, name in enumerate(self.names)}
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self._index[name]]
+
+    def matrix(self, names: Sequence[str]) -> np.ndarray:
+        return self.values[:, [self._index[n] for n in names]]
+
+    def row(self, i: int, names: Sequence[str]) -> Dict[str, float]:
+        """
+        {name: value} of sample i, for the per-sample detectors; missing
+        (non-finite) values are left out.
+        """
+        return {n: float(self.values[i, self._index[n]]) for n in names
+                if np.isfinite(self.values[i, self._index[n]])}
+
+
+def _epoch(ts) -> float:
+    if ts is None:
+        return float("nan")
+    return float(ts) if isinstance(ts, (int, float)) else to_epoch(ts)
+
+
+class FeatureStore:
+
+    def __init__(self, registry: FeatureRegistry):
+        self.registry = registry
+        self.names = registry.base_fields + registry.names
+        self.sources = registry.sources
+        self.history = registry.history()
+
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._hist = np.zeros((0, len(self.sources), self.history))
+        self._pos = np.zeros(0, dtype=np.int64)
+        self._last_ts = np.zeros(0)
+        self._latest = np.zeros((0, len(self.names)))
+        self._lock = threading.Lock()
+
+    def _row(self, satellite_id: str) -> int:
+        row = self._rows.get(satellite_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row == len(self._pos):
+            grow = max(16, row)
+            self._hist = np.concatenate([self._hist, np.full((grow,) + self._hist.shape[1:], np.nan)])
+            self._pos = np.concatenate([self._pos, np.zeros(grow, dtype=np.int64)])
+            self._last_ts = np.concatenate([self._last_ts, np.full(grow, np.nan)])
+            self._latest = np.concatenate([self._latest, np.full((grow, len(self.names)), np.nan)])
+        self._rows[satellite_id] = row
+        self._ids.append(satellite_id)
+        return row
+
+    def _back(self, rows: np.ndarray, source: int, k: int) -> np.ndarray:
+        """Value of source k samples back, per row."""
+        return self._hist[rows, source, (self._pos[rows] - k) % self.history]
+
+    def update(self, satellite_ids: Sequence[str], timestamps: Sequence[Any],
+               features: np.ndarray) -> FeatureFrame:
+        """
+        Compute all features for a batch (features: (n, base_fields) raw
+        rows, in arrival order per satellite; timestamps as datetimes, ISO
+        strings or epoch seconds) and advance the history.
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=float))
+        n = len(features)
+        t = np.array([_epoch(ts) for ts in timestamps], dtype=float)
+        columns: Columns = {name: features[:, j] for j, name in enumerate(self.registry.base_fields)}
+        stateful = []
+        for feature in self.registry.features:
+            if feature.kind != "derived":
+                stateful.append(feature)
+                continue
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = np.asarray(feature.compute(columns), dtype=float).reshape(n, -1)
+            for j, name in enumerate(feature.names):
+                columns[name] = out[:, j]
+        for feature in stateful:
+            columns[feature.names[0]] = np.full(n, np.nan)
+
+        src = np.column_stack([columns[s] for s in self.sources]) if self.sources else np.zeros((n, 0))
+        source_index = {s: j for j, s in enumerate(self.sources)}
+        with self._lock:
+            rows = np.array([self._row(s) for s in satellite_ids], dtype=np.int64)
+            for idx in occurrence_rounds(rows):
+                r, x = rows[idx], src[idx]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    for feature in stateful:
+                        c = source_index[feature.source]
+                        out = columns[feature.names[0]]
+                        if feature.kind == "lag":
+                            out[idx] = self._back(r, c, feature.window)
+                        elif feature.kind == "rate":
+                            dt = t[idx] - self._last_ts[r]
+                            out[idx] = np.where(dt > 0, (x[:, c] - self._back(r, c, 1)) / dt, np.nan)
+                        else:
+                            window = np.column_stack(
+                                [x[:, c]] + [self._back(r, c, k) for k in range(1, feature.window)]
+                            )
+                            finite = np.isfinite(window)
+                            out[idx] = np.where(finite, window, 0.0).sum(axis=1) / finite.sum(axis=1)
+                self._hist[r, :, self._pos[r]] = x
+                self._pos[r] = (self._pos[r] + 1) % self.history
+                self._last_ts[r] = np.where(np.isfinite(t[idx]), t[idx], self._last_ts[r])
+
+            frame = FeatureFrame(self.names, np.column_stack([columns[name] for name in self.names]))
+            # each satellite's last row of the batch is its cached latest
+            last = {row: i for i, row in enumerate(rows)}
+            self._latest[list(last)] = frame.values[list(last.values())]
+        return frame
+
+    def latest(self, satellite_id: str) -> Optional[Dict[str, float]]:
+        """
+        Latest feature values of a satellite (None if never seen); missing
+        values are None.
+        """
+        with self._lock:
+            row = self._rows.get(satellite_id)
+            if row is None:
+                return None
+            values = self._latest[row].tolist()
+        return {name: (v if np.isfinite(v) else None) for name, v in zip(self.names, values)}
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            s = len(self._ids)
+            return {
+                "satellite_ids": np.array(self._ids, dtype=str),
+                "names": np.array(self.names, dtype=str),
+                "hist": self._hist[:s].copy(),
+                "pos": self._pos[:s].copy(),
+                "last_ts": self._last_ts[:s].copy(),
+                "latest": self._latest[:s].copy(),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        # a snapshot taken with other feature definitions doesn't line up
+        if tuple(arrays["names"].tolist()) != self.names or arrays["hist"].shape[1:] != self._hist.shape[1:]:
+            return
+        with self._lock:
+            for i, sat_id in enumerate(arrays["satellite_ids"].tolist()):
+                row = self._row(sat_id)
+                self._hist[row] = arrays["hist"][i]
+                self._pos[row] = arrays["pos"][i]
+                self._last_ts[row] = arrays["last_ts"][i]
+                self._latest[row] = arrays["latest"][i]
+
+
+# ----- feature definitions -----
+def _vector(columns: Columns, prefix: str) -> np.ndarray:
+    return np.column_stack([columns[f"{prefix}_{axis}"] for axis in "xyz"])
+
+
+FEATURES = FeatureRegistry(FEATURE_FIELDS)
+
+# orbit geometry (rotation-invariant, so constant for a nominal orbit)
+FEATURES.derived("radius", lambda c: np.linalg.norm(_vector(c, "position"), axis=1))
+FEATURES.derived("speed", lambda c: np.linalg.norm(_vector(c, "velocity"), axis=1))
+FEATURES.derived("radial_velocity", lambda c: np.where(
+    c["radius"] > 0, np.sum(_vector(c, "position") * _vector(c, "velocity"), axis=1) / c["radius"], 0.0
+))
+FEATURES.derived(("h_x", "h_y", "h_z"), lambda c: np.cross(_vector(c, "position"), _vector(c, "velocity")))
+FEATURES.derived("orbit_altitude_km", lambda c: c["radius"] - EARTH_RADIUS_KM)
+FEATURES.derived("orbit_inclination_deg", lambda c: np.degrees(np.arccos(np.clip(
+    c["h_z"] / np.linalg.norm(np.column_stack([c["h_x"], c["h_y"], c["h_z"]]), axis=1), -1.0, 1.0
+))))
+FEATURES.derived("comm_signal_db", lambda c: c["comms_rssi"])
+
+# thermal trends
+for _field in ("temp_payload", "temp_battery", "temp_bus"):
+    FEATURES.rate(f"{_field}_rate", _field)
+    FEATURES.mean(f"{_field}_mean", _field, FEATURE_ROLLING_WINDOW)
+
+# link quality
+FEATURES.mean("comms_snr_mean", "comms_snr", FEATURE_ROLLING_WINDOW)
+FEATURES.mean("comms_packet_loss_mean", "comms_packet_loss", FEATURE_ROLLING_WINDOW)
+FEATURES.lag("comms_rssi_lag1", "comms_rssi")
+FEATURES.lag("orbit_altitude_km_lag1", "orbit_altitude_km")
+
+FEATURE_STORE = FeatureStore(FEATURES)
+
+register_provider("features", FEATURE_STORE.export_arrays, FEATURE_STORE.import_arrays,
+                  {"satellite_ids": ("hist", "pos", "last_ts", "latest")})
@@ -0,0 +1,162 @@
+# backend/services/fleet.py
+"""
+Fleet-wide correlation of anomaly onsets.
+
+Detectors work per satellite, so one space-weather event or ground-station
+fault shows up as one anomaly per satellite. Here every onset (a newly
+opened episode) is counted in a tumbling time window under two keys: its
+issue code, and the ground station the satellite was predicted to be in
+view of at the time (if any). When a key collects onsets from
+min_satellites distinct satellites within one window, a single incident is
+emitted for it; later satellites in the same window join that incident
+instead of raising new ones. One event usually satisfies both keys (the
+same issue on satellites over the same station), so a key that reaches
+the threshold while an incident of the window already shares satellites
+with it is merged into that incident rather than opening another: the
+incident lists every issue and station that matched.
+
+Windows are dicts of per-key satellite sets, so an onset costs O(1) and
+nothing is compared pairwise. Windows older than the previous one are
+dropped; onsets arriving for them are counted as late.
+"""
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.config import FLEET_MAX_INCIDENTS, FLEET_MIN_SATELLITES, FLEET_WINDOW_S
+from backend.core.logger import logger
+from backend.services.passes import PASSES, to_epoch
+
+Incident = Dict[str, Any]
+Key = Tuple[str, str]   # ("issue", code) or ("station", name)
+
+
+def _iso(t: float) -> str:
+    return datetime.utcfromtimestamp(t).isoformat()
+
+
+class FleetCorrelator:
+
+    def __init__(self, window_s: float = 300.0, min_satellites: int = 3, max_incidents: int = 200,
+                 station_of: Optional[Callable[[str, float], Optional[str]]] = None):
+        self.window_s = window_s
+        self.min_satellites = min_satellites
+        self.station_of = station_of
+        # window index -> key -> {satellite_id: onset time}
+        self._windows: Dict[int, Dict[Key, Dict[str, float]]] = {}
+        self._open: Dict[Tuple[int, Key], Incident] = {}
+        self._latest_window: Optional[int] = None
+        self._ids = itertools.count(1)
+        self._subscribers: List[Callable[[Incident], None]] = []
+        self.incidents = deque(maxlen=max_incidents)
+        self.late = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn: Callable[[Incident], None]):
+        self._subscribers.append(fn)
+
+    def observe(self, onsets: Iterable[Tuple[str, Any, str]]) -> List[Incident]:
+        """
+        Count (satellite_id, timestamp, issue) onsets. Returns the incidents
+        opened by them.
+        """
+        opened = []
+        with self._lock:
+            for sat_id, ts, issue in onsets:
+                t = to_epoch(ts)
+                w = int(t // self.window_s)
+                if self._latest_window is not None and w < self._latest_window - 1:
+                    self.late += 1
+                    continue
+                keys = [("issue", issue)]
+                station = self.station_of(sat_id, t) if self.station_of is not None else None
+                if station is not None:
+                    keys.append(("station", station))
+                for key in keys:
+                    incident = self._add(w, key, sat_id, t)
+                    if incident is not None:
+                        opened.append(incident)
+                if self._latest_window is None or w > self._latest_window:
+                    self._latest_window = w
+                    self._expire()
+            opened = [self._public(i) for i in opened]
+
+        for incident in opened:
+            logger.warning(
+                f"Fleet incident {incident['id']}: {incident['kind']} {incident['key']} "
+                f"on {len(incident['satellites'])} satellites"
+            )
+            for fn in self._subscribers:
+                try:
+                    fn(incident)
+                except Exception as e:
+                    logger.error(f"Fleet incident subscriber failed: {e}")
+        return opened
+
+    def _add(self, w: int, key: Key, sat_id: str, t: float) -> Optional[Incident]:
+        members = self._windows.setdefault(w, {}).setdefault(key, {})
+        if sat_id in members:
+            return None
+        members[sat_id] = t
+        incident = self._open.get((w, key))
+        if incident is not None:
+            self._join(incident, {sat_id: t})
+            return None
+        if len(members) < self.min_satellites:
+            return None
+        for (ow, _), other in self._open.items():
+            if ow == w and not other["satellites"].keys().isdisjoint(members):
+                # the same cluster, seen through another key
+                self._open[(w, key)] = other
+                other[key[0] + "s"].append(key[1])
+                self._join(other, members)
+                return None
+        incident = {
+            "id": next(self._ids),
+            "kind": key[0],
+            "key": key[1],
+            "issues": [key[1]] if key[0] == "issue" else [],
+            "stations": [key[1]] if key[0] == "station" else [],
+            "window_start": _iso(w * self.window_s),
+            "window_end": _iso((w + 1) * self.window_s),
+            "satellites": {},
+        }
+        self._join(incident, members)
+        self._open[(w, key)] = incident
+        self.incidents.append(incident)
+        return incident
+
+    @staticmethod
+    def _join(incident: Incident, onsets: Dict[str, float]):
+        # satellites: {satellite_id: first onset}, a list in the public copies
+        sats = incident["satellites"]
+        for sat_id, t in onsets.items():
+            sats[sat_id] = min(t, sats.get(sat_id, t))
+        incident["first_onset"] = _iso(min(sats.values()))
+        incident["last_onset"] = _iso(max(sats.values()))
+
+    def _expire(self):
+        horizon = self._latest_window - 1
+        for w in [w for w in self._windows if w < horizon]:
+            del self._windows[w]
+        for k in [k for k in self._open if k[0] < horizon]:
+            del self._open[k]
+
+    def recent(self, limit: int = 50, kind: Optional[str] = None) -> List[Incident]:
+        """
+        Latest incidents, newest first.
+        """
+        with self._lock:
+            items = [self._public(i) for i in reversed(self.incidents)
+                     if kind is None or i.get(kind + "s")]
+        return items[:limit]
+
+    @staticmethod
+    def _public(incident: Incident) -> Incident:
+        return dict(incident, satellites=list(incident["satellites"]), issues=list(incident["issues"]),
+                    stations=list(incident["stations"]))
+
+
+FLEET = FleetCorrelator(FLEET_WINDOW_S, FLEET_MIN_SATELLITES, FLEET_MAX_INCIDENTS, PASSES.station_in_view)
@@ -0,0 +1,345 @@
+# backend/services/forecast.py
+"""
+Time-to-breach forecasting per satellite and channel.
+
+Each (satellite, channel) keeps an exponentially forgetting least-squares
+fit of a linear (or quadratic) trend, in information form: the weighted
+moment matrix S = sum(w phi phi^T) and vector b = sum(w phi y) of the
+basis phi = (1, tau, tau^2), with tau the time relative to the
+satellite's latest sample. A new sample shifts the basis to its own time
+(a fixed linear map of S and b), decays the old weight by `forgetting`
+and adds itself at tau = 0, so the state is a few numbers per channel and
+an update is O(1) regardless of history. Solving S theta = b gives the
+current level, slope and curvature. A weighted sum of squares alongside
+gives the residual variance, and a trend whose slope is within
+`significance` standard errors of zero forecasts no breach, so noise on a
+flat channel is not extrapolated into one.
+
+The ETA is the first time the fitted trend reaches the channel's current
+low or high limit (from the threshold learner, overrides included). A
+sample that is already outside a limit has ETA 0. When the ETA of a
+channel drops within horizon_s an event is emitted once, until it leaves
+the horizon again. Batches are processed one round of unique satellites
+at a time, vectorized over satellites and channels.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import (
+    FORECAST_FORGETTING, FORECAST_HORIZON_S, FORECAST_MIN_SAMPLES, FORECAST_ORDER, FORECAST_SIGNIFICANCE,
+)
+from backend.core.logger import logger
+from backend.services.passes import to_epoch
+from backend.services.snapshot import register_provider
+from backend.services.thresholds import CORE_THRESHOLDS, FEATURE_THRESHOLDS, ThresholdLearner
+from backend.utils.helpers import occurrence_rounds
+
+Event = Dict[str, Any]
+
+
+def _epoch(ts) -> float:
+    if ts is None:
+        return float("nan")
+    return float(ts) if isinstance(ts, (int, float)) else to_epoch(ts)
+
+
+def _shift_matrices(delta: np.ndarray, d: int) -> np.ndarray:
+    """
+    (m, d, d) maps of the basis (1, tau, tau^2)[:d] to tau - delta.
+    """
+    T = np.zeros((len(delta), d, d))
+    T[:, 0, 0] = 1.0
+    if d > 1:
+        T[:, 1, 0], T[:, 1, 1] = -delta, 1.0
+    if d > 2:
+        T[:, 2, 0], T[:, 2, 1], T[:, 2, 2] = delta ** 2, -2 * delta, 1.0
+    return T
+
+
+def _first_crossing(a: np.ndarray, b: np.ndarray, c: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """
+    Smallest tau > 0 with a + b tau + c tau^2 == target, inf if none.
+    """
+    k = a - target
+    with np.errstate(invalid="ignore", divide="ignore"):
+        linear = np.where(b != 0, -k / b, np.inf)
+        disc = b * b - 4 * c * k
+        sq = np.sqrt(np.where(disc >= 0, disc, np.nan))
+        roots = np.stack([(-b - sq) / (2 * c), (-b + sq) / (2 * c)])
+        roots = np.where(roots > 0, roots, np.inf).min(axis=0)
+        tau = np.where(np.abs(c) > 1e-12, roots, linear)
+    return np.where(np.isfinite(tau) & (tau > 0), tau, np.inf)
+
+
+class BreachForecaster:
+
+    def __init__(self, learner: ThresholdLearner, order: int = 1, forgetting: float = 0.98,
+                 horizon_s: float = 1800.0, min_samples: int = 20, significance: float = 4.0,
+                 time_scale_s: float = 60.0, ridge: float = 1e-9, max_events: int = 200):
+        self.learner = learner
+        self.channels = learner.channels
+        # linear or quadratic
+        self.d = min(max(order, 1), 2) + 1
+        self.forgetting = forgetting
+        self.horizon_s = horizon_s
+        self.min_samples = min_samples
+        self.significance = significance
+        # fit in minutes rather than seconds, for conditioning
+        self.time_scale_s = time_scale_s
+        self.ridge = ridge
+
+        c, d = len(self.channels), self.d
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._S = np.zeros((0, c, d, d))
+        self._b = np.zeros((0, c, d))
+        self._yy = np.zeros((0, c))
+        self._t = np.zeros(0)
+        self._count = np.zeros((0, c), dtype=np.int64)
+        self._theta = np.zeros((0, c, d))
+        self._eta = np.zeros((0, c))
+        self._warned = np.zeros((0, c), dtype=bool)
+
+        self._subscribers: List[Callable[[Event], None]] = []
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn: Callable[[Event], None]):
+        self._subscribers.append(fn)
+
+    def _row(self, satellite_id: str) -> int:
+        row = self._rows.get(satellite_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row == len(self._t):
+            grow = max(16, row)
+            self._S = np.concatenate([self._S, np.zeros((grow,) + self._S.shape[1:])])
+            self._b = np.concatenate([self._b, np.zeros((grow,) + self._b.shape[1:])])
+            self._yy = np.concatenate([self._yy, np.zeros((grow,) + self._yy.shape[1:])])
+            self._t = np.concatenate([self._t, np.full(grow, np.nan)])
+            self._count = np.concatenate([self._count, np.zeros((grow,) + self._count.shape[1:], dtype=np.int64)])
+            self._theta = np.concatenate([self._theta, np.full((grow,) + self._theta.shape[1:], np.nan)])
+            self._eta = np.concatenate([self._eta, np.full((grow,) + self._eta.shape[1:], np.nan)])
+            self._warned = np.concatenate([self._warned, np.zeros((grow,) + self._warned.shape[1:], dtype=bool)])
+        self._rows[satellite_id] = row
+        self._ids.append(satellite_id)
+        return row
+
+    def update(self, satellite_ids: Sequence[str], timestamps: Sequence[Any],
+               values: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Fold in observations (n, channels) (NaN = missing) and forecast.
+        Returns per row {"eta_s", "channel", "flagged", "score", "message"}
+        for its soonest breach; eta_s is None while no breach is predicted
+        (or the fit has too few samples).
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        n = len(values)
+        t = np.array([_epoch(ts) for ts in timestamps], dtype=float)
+        low, high = self.learner.limits(satellite_ids)
+        eta = np.full((n, len(self.channels)), np.nan)
+        events = []
+
+        with self._lock:
+            rows = np.array([self._row(s) for s in satellite_ids], dtype=np.int64)
+            for idx in occurrence_rounds(rows):
+                r, x = rows[idx], values[idx]
+                eta[idx], upward = self._step(r, t[idx], x, low[idx], high[idx])
+                events += self._alerts(r, t[idx], x, eta[idx], upward, low[idx], high[idx])
+
+        for event in events:
+            logger.warning(
+                f"{event['satellite_id']} {event['channel']} predicted to cross {event['side']} limit "
+                f"{event['limit']:.3g} in {event['eta_s']:.0f}s"
+            )
+            for fn in self._subscribers:
+                try:
+                    fn(event)
+                except Exception as e:
+                    logger.error(f"Forecast subscriber failed: {e}")
+        return [self._summary(row) for row in eta]
+
+    def _step(self, r: np.ndarray, t: np.ndarray, x: np.ndarray, low: np.ndarray,
+              high: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance the fits of one round; returns the ETAs and whether each is
+        towards the high limit.
+        """
+        d, lam = self.d, self.forgetting
+        delta = np.nan_to_num((t - self._t[r]) / self.time_scale_s)
+        # move the basis to the newest sample; an out-of-order sample goes in at its own (negative) tau
+        T = _shift_matrices(np.maximum(delta, 0.0), d)[:, None]
+        S = T @ self._S[r] @ np.swapaxes(T, -1, -2)
+        b = (T @ self._b[r][..., None])[..., 0]
+        tau = np.minimum(delta, 0.0)
+        phi = np.stack([tau ** k for k in range(d)], axis=-1)[:, None, :]     # (m, 1, d)
+
+        valid = np.isfinite(x)
+        w = np.where(valid, lam, 1.0)[..., None]
+        S = w[..., None] * S + valid[..., None, None] * (phi[..., :, None] * phi[..., None, :])
+        y = np.where(valid, x, 0.0)
+        b = w * b + y[..., None] * phi
+        yy = w[..., 0] * self._yy[r] + y * y
+        self._S[r], self._b[r], self._yy[r] = S, b, yy
+        self._count[r] += valid
+        self._t[r] = np.fmax(self._t[r], t)
+
+        ready = self._count[r] >= max(self.min_samples, d)
+        inv = np.linalg.inv(S + self.ridge * np.eye(d))
+        theta = (inv @ b[..., None])[..., 0]
+        theta = np.where(ready[..., None], theta, np.nan)
+        self._theta[r] = theta
+
+        # slope standard error from the weighted residual variance
+        # (floored relative to the data, so rounding on a constant channel isn't a trend)
+        sse = np.maximum(yy - np.sum(theta * b, axis=-1), 1e-12 * yy)
+        dof = np.maximum(S[..., 0, 0] - d, 1e-9)
+        with np.errstate(invalid="ignore"):
+            trending = np.abs(theta[..., 1]) > self.significance * np.sqrt(sse / dof * inv[..., 1, 1])
+
+        coef = [theta[..., k] if k < d else np.zeros_like(theta[..., 0]) for k in range(3)]
+        to_high = _first_crossing(*coef, high)
+        to_low = _first_crossing(*coef, low)
+        eta = np.where(trending, np.minimum(to_high, to_low) * self.time_scale_s, np.inf)
+        eta = np.where((x >= high) | (x <= low), 0.0, eta)
+        eta = np.where(ready, eta, np.nan)
+        self._eta[r] = eta
+        return eta, to_high <= to_low
+
+    def _alerts(self, r: np.ndarray, t: np.ndarray, x: np.ndarray, eta: np.ndarray, upward: np.ndarray,
+                low: np.ndarray, high: np.ndarray) -> List[Event]:
+        inside = eta <= self.horizon_s
+        fire = inside & (eta > 0) & ~self._warned[r]
+        self._warned[r] = inside
+        events = []
+        for i, j in zip(*np.nonzero(fire)):
+            side, limit = ("high", high[i, j]) if upward[i, j] else ("low", low[i, j])
+            event = {
+                "satellite_id": self._ids[r[i]],
+                "channel": self.channels[j],
+                "side": side,
+                "limit": float(limit),
+                "value": float(x[i, j]),
+                "eta_s": float(eta[i, j]),
+                "breach_at": datetime.utcfromtimestamp(t[i] + eta[i, j]).isoformat(),
+                "timestamp": datetime.utcfromtimestamp(t[i]).isoformat(),
+            }
+            self.events.append(event)
+            events.append(event)
+        return events
+
+    def _summary(self, eta: np.ndarray) -> Dict[str, Any]:
+        soonest = np.where(np.isnan(eta), np.inf, eta)
+        j = int(np.argmin(soonest))
+        if not np.isfinite(soonest[j]):
+            return {"eta_s": None, "channel": None, "flagged": False, "score": 0.0,
+                    "message": "No limit breach predicted"}
+        flagged = 0 < soonest[j] <= self.horizon_s
+        return {
+            "eta_s": float(soonest[j]),
+            "channel": self.channels[j],
+            "flagged": bool(flagged),
+            "score": float(1.0 - soonest[j] / self.horizon_s) if flagged else 0.0,
+            "message": (f"{self.channels[j]} predicted to breach its limit in {soonest[j]:.0f}s"
+                        if soonest[j] > 0 else f"{self.channels[j]} outside its limit"),
+        }
+
+    # ----- queries -----
+    def forecast(self, satellite_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Per channel: fitted level and slope (per second) at the latest
+        sample, ETA to the nearest limit and when that is. None for an
+        unknown satellite.
+        """
+        with self._lock:
+            row = self._rows.get(satellite_id)
+            if row is None:
+                return None
+            theta, eta, t = self._theta[row].copy(), self._eta[row].copy(), self._t[row]
+        out = {}
+        for j, channel in enumerate(self.channels):
+            finite = np.isfinite(eta[j])
+            out[channel] = {
+                "level": None if np.isnan(theta[j, 0]) else float(theta[j, 0]),
+                "slope_per_s": None if np.isnan(theta[j, 1]) else float(theta[j, 1] / self.time_scale_s),
+                "eta_s": float(eta[j]) if finite else None,
+                "breach_at": datetime.utcfromtimestamp(t + eta[j]).isoformat() if finite else None,
+            }
+        return out
+
+    def imminent(self, horizon_s: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        (satellite, channel) pairs whose predicted breach is within the
+        horizon, soonest first.
+        """
+        horizon_s = self.horizon_s if horizon_s is None else horizon_s
+        with self._lock:
+            s = len(self._ids)
+            eta, t = self._eta[:s].copy(), self._t[:s].copy()
+        with np.errstate(invalid="ignore"):
+            rows, cols = np.nonzero(eta <= horizon_s)
+        items = [
+            {
+                "satellite_id": self._ids[i],
+                "channel": self.channels[j],
+                "eta_s": float(eta[i, j]),
+                "breach_at": datetime.utcfromtimestamp(t[i] + eta[i, j]).isoformat(),
+            }
+            for i, j in zip(rows, cols)
+        ]
+        return sorted(items, key=lambda e: e["breach_at"])
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            s = len(self._ids)
+            return {
+                "satellite_ids": np.array(self._ids, dtype=str),
+                "moments": self._S[:s].copy(),
+                "targets": self._b[:s].copy(),
+                "squares": self._yy[:s].copy(),
+                "last_ts": self._t[:s].copy(),
+                "counts": self._count[:s].copy(),
+                "fits": self._theta[:s].copy(),
+                "etas": self._eta[:s].copy(),
+                "warned": self._warned[:s].copy(),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        # a snapshot taken with another channel set or order doesn't line up
+        if arrays["moments"].shape[1:] != self._S.shape[1:]:
+            return
+        # older snapshots have no fits: forecasts resume with the next sample
+        fitted = "fits" in arrays
+        with self._lock:
+            for i, sat_id in enumerate(arrays["satellite_ids"].tolist()):
+                row = self._row(sat_id)
+                self._S[row] = arrays["moments"][i]
+                self._b[row] = arrays["targets"][i]
+                self._yy[row] = arrays["squares"][i]
+                self._t[row] = arrays["last_ts"][i]
+                self._count[row] = arrays["counts"][i]
+                self._theta[row] = arrays["fits"][i] if fitted else np.nan
+                self._eta[row] = arrays["etas"][i] if fitted else np.nan
+                self._warned[row] = arrays["warned"][i] if fitted else False
+
+
+def _forecaster(learner: ThresholdLearner) -> BreachForecaster:
+    return BreachForecaster(learner, FORECAST_ORDER, FORECAST_FORGETTING, FORECAST_HORIZON_S,
+                            FORECAST_MIN_SAMPLES, FORECAST_SIGNIFICANCE)
+
+
+# one per threshold set, forecasting against its limits
+FEATURE_FORECAST = _forecaster(FEATURE_THRESHOLDS)
+CORE_FORECAST = _forecaster(CORE_THRESHOLDS)
+
+FORECASTERS = {"features": FEATURE_FORECAST, "core": CORE_FORECAST}
+
+_BY_SATELLITE = {"satellite_ids": ("moments", "targets", "squares", "last_ts", "counts", "fits", "etas", "warned")}
+register_provider("forecast", FEATURE_FORECAST.export_arrays, FEATURE_FORECAST.import_arrays, _BY_SATELLITE)
+register_provider("core_forecast", CORE_FORECAST.export_arrays, CORE_FORECAST.import_arrays, _BY_SATELLITE)
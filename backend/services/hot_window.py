@@ -0,0 +1,147 @@
+# backend/services/hot_window.py
+"""
+In-memory hot window of recent raw telemetry.
+
+Per satellite, incoming samples fill a small uncompressed head buffer;
+when it is full it is sealed into one Gorilla-encoded block
+(backend.utils.gorilla) and blocks older than the window are dropped. A
+block is one bytes object plus its time range, so the per-sample cost is
+the compressed bits rather than a dict of Python floats.
+
+Range reads skip blocks outside the range by their time bounds, decode
+the rest with array operations and append the head.
+
+Channels with a precision (HOT_WINDOW_PRECISION) are quantized to it
+before encoding, so reads return them within precision / 2; the others
+are kept exactly.
+
+Size is bounded by how noisy the channels are, not by the codec. On
+TelemetrySimulator output (white noise on most channels, 1 Hz) a sample
+takes ~105 B lossless and ~19 B at the default precisions (~14 B at ten
+times coarser steps). That is ~8 GB for 5,000 satellites over 24 h, so a
+few-GB window needs smoother channels or coarser precisions.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import HOT_WINDOW_BLOCK_SIZE, HOT_WINDOW_HOURS, HOT_WINDOW_PRECISION
+from backend.services.compression import parse_tolerances
+from backend.services.passes import to_epoch
+from backend.services.preprocess import FEATURE_FIELDS, preprocess_batch
+from backend.utils.gorilla import decode_block, encode_block
+
+
+class _Block:
+    __slots__ = ("start_ms", "end_ms", "count", "data")
+
+    def __init__(self, start_ms: int, end_ms: int, count: int, data: bytes):
+        self.start_ms, self.end_ms, self.count, self.data = start_ms, end_ms, count, data
+
+
+class _Series:
+    __slots__ = ("blocks", "head_ts", "head_values", "head_n", "last_ms")
+
+    def __init__(self, block_size: int, n_channels: int):
+        self.blocks: List[_Block] = []
+        self.head_ts = np.zeros(block_size, dtype=np.int64)
+        self.head_values = np.zeros((block_size, n_channels))
+        self.head_n = 0
+        self.last_ms = 0
+
+
+class HotWindow:
+
+    def __init__(self, channels: Sequence[str], window_s: float, block_size: int = 256,
+                 precision: Optional[Dict[str, float]] = None):
+        self.channels = tuple(channels)
+        self.steps = [float((precision or {}).get(c, 0.0)) for c in self.channels]
+        self.window_ms = int(window_s * 1000)
+        self.block_size = block_size
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def append(self, satellite_ids: Sequence[str], ts_ms: Sequence[int], values: np.ndarray):
+        """
+        Add samples (values (n, len(channels))), in order per satellite.
+        """
+        ts_ms = np.asarray(ts_ms, dtype=np.int64)
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        with self._lock:
+            for i, sat_id in enumerate(satellite_ids):
+                s = self._series.get(sat_id)
+                if s is None:
+                    s = self._series[sat_id] = _Series(self.block_size, len(self.channels))
+                s.head_ts[s.head_n] = ts_ms[i]
+                s.head_values[s.head_n] = values[i]
+                s.head_n += 1
+                s.last_ms = max(s.last_ms, int(ts_ms[i]))
+                if s.head_n == self.block_size:
+                    self._seal(s)
+
+    def append_payloads(self, payloads: Sequence[Dict[str, Any]]):
+        """
+        Add raw ingest payloads (FEATURE_FIELDS plus timestamp); a no-op
+        when the window is disabled.
+        """
+        if not payloads or self.window_ms <= 0:
+            return
+        ts_ms = [int(round(to_epoch(p["timestamp"]) * 1000)) for p in payloads]
+        self.append([p["satellite_id"] for p in payloads], ts_ms, preprocess_batch(payloads))
+
+    def _seal(self, s: _Series):
+        n = s.head_n
+        ts = s.head_ts[:n]
+        s.blocks.append(_Block(int(ts.min()), int(ts.max()), n, encode_block(ts, s.head_values[:n], self.steps)))
+        s.head_n = 0
+        horizon = s.last_ms - self.window_ms
+        drop = 0
+        while drop < len(s.blocks) and s.blocks[drop].end_ms < horizon:
+            drop += 1
+        if drop:
+            del s.blocks[:drop]
+
+    def read(self, satellite_id: str, since_ms: Optional[int] = None, until_ms: Optional[int] = None,
+             channels: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (timestamps_ms (n,), values (n, len(channels))) within [since, until],
+        oldest first. Samples past the window are not returned.
+        """
+        cols = list(range(len(self.channels))) if channels is None else [self.channels.index(c) for c in channels]
+        with self._lock:
+            s = self._series.get(satellite_id)
+            if s is None:
+                return np.zeros(0, dtype=np.int64), np.zeros((0, len(cols)))
+            lo = s.last_ms - self.window_ms if since_ms is None else max(since_ms, s.last_ms - self.window_ms)
+            hi = s.last_ms if until_ms is None else until_ms
+            blocks = [b for b in s.blocks if b.end_ms >= lo and b.start_ms <= hi]
+            head_ts = s.head_ts[:s.head_n].copy()
+            head_values = s.head_values[:s.head_n][:, cols].copy()
+
+        parts = [decode_block(b.data, b.count, len(self.channels), cols) for b in blocks]
+        parts.append((head_ts, head_values))
+        ts = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts])
+        keep = (ts >= lo) & (ts <= hi)
+        return ts[keep], values[keep]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            blocks = [b for s in self._series.values() for b in s.blocks]
+            sealed = sum(b.count for b in blocks)
+            compressed = sum(len(b.data) for b in blocks)
+            head = sum(s.head_n for s in self._series.values())
+        raw = sealed * 8 * (len(self.channels) + 1)
+        return {
+            "satellites": len(self._series),
+            "samples": sealed + head,
+            "blocks": len(blocks),
+            "compressed_bytes": compressed,
+            "bytes_per_sample": compressed / sealed if sealed else None,
+            "ratio": raw / compressed if compressed else None,
+        }
+
+
+HOT_WINDOW = HotWindow(FEATURE_FIELDS, HOT_WINDOW_HOURS * 3600, HOT_WINDOW_BLOCK_SIZE,
+                       parse_tolerances(HOT_WINDOW_PRECISION))
@@ -0,0 +1,205 @@
+# backend/services/liveness.py
+"""
+Timeout-driven satellite online/offline tracking.
+
+Each satellite has at most one entry in a min-heap keyed by its deadline
+(last seen + timeout). seen() is O(1) (O(log n) when the satellite has no
+entry yet); expire() pops only the entries that are due, re-scheduling the
+ones that were seen again in the meantime, so a tick costs O(k log n) for
+k due satellites instead of a scan of the fleet.
+
+Status flips are emitted as events to subscribers and queued for a batched
+UPDATE of the satellites table.
+
+All times are sample timestamps (the telemetry's own clock, capped at now),
+the same base load() seeds from the stored last-telemetry times; a
+satellite is online while its newest sample is younger than the timeout.
+"""
+import heapq
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+
+from backend.core.config import SATELLITE_TIMEOUT_S
+from backend.core.logger import logger
+from backend.services.response_cache import bump_data_version
+
+Event = Dict[str, object]
+
+
+class LivenessTracker:
+
+    def __init__(self, timeout_s: float = 3600.0, max_events: int = 500):
+        self.timeout_s = timeout_s
+        self._last_seen: Dict[str, float] = {}
+        self._online: Dict[str, bool] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled = set()
+        # satellite_id -> is_online waiting to be written to the DB
+        self._dirty: Dict[str, bool] = {}
+        self._subscribers: List[Callable[[Event], None]] = []
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn: Callable[[Event], None]):
+        self._subscribers.append(fn)
+
+    def _emit(self, satellite_id: str, online: bool, at: float):
+        event = {
+            "satellite_id": satellite_id,
+            "online": online,
+            "timestamp": datetime.utcfromtimestamp(at).isoformat(),
+        }
+        self.events.append(event)
+        for fn in self._subscribers:
+            try:
+                fn(event)
+            except Exception as e:
+                logger.error(f"Liveness subscriber failed: {e}")
+
+    def seen(self, satellite_id: str, at: Optional[float] = None):
+        """
+        Record a sample from satellite_id taken at epoch time `at`
+        (default: now). Future timestamps count as now; a sample already
+        older than the timeout updates last_seen but doesn't bring the
+        satellite online.
+        """
+        now = time.time()
+        at = now if at is None else min(at, now)
+        with self._lock:
+            if at < self._last_seen.get(satellite_id, float("-inf")):
+                return
+            self._last_seen[satellite_id] = at
+            if at + self.timeout_s <= now:
+                return
+            came_online = not self._online.get(satellite_id, False)
+            self._online[satellite_id] = True
+            if came_online:
+                self._dirty[satellite_id] = True
+            if satellite_id not in self._scheduled:
+                heapq.heappush(self._heap, (at + self.timeout_s, satellite_id))
+                self._scheduled.add(satellite_id)
+        if came_online:
+            self._emit(satellite_id, True, at)
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """
+        Flip every satellite whose deadline has passed to offline.
+        Returns the satellites that went offline.
+        """
+        now = time.time() if now is None else now
+        went_offline = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, sat_id = heapq.heappop(self._heap)
+                deadline = self._last_seen[sat_id] + self.timeout_s
+                if deadline > now:
+                    # seen again since it was scheduled: push the real deadline
+                    heapq.heappush(self._heap, (deadline, sat_id))
+                    continue
+                self._scheduled.discard(sat_id)
+                if self._online.get(sat_id):
+                    self._online[sat_id] = False
+                    self._dirty[sat_id] = False
+                    went_offline.append(sat_id)
+        for sat_id in went_offline:
+            self._emit(sat_id, False, now)
+        return went_offline
+
+    def load(self, last_seen: Dict[str, Optional[datetime]], now: Optional[float] = None):
+        """
+        Bootstrap from stored last-telemetry times (naive UTC datetimes).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for sat_id, ts in last_seen.items():
+                at = (ts - datetime(1970, 1, 1)).total_seconds() if ts else float("-inf")
+                self._last_seen[sat_id] = at
+                online = at + self.timeout_s > now
+                self._online[sat_id] = online
+                # rewrite the stored flag once; it may be stale from a previous run
+                self._dirty[sat_id] = online
+                if online and sat_id not in self._scheduled:
+                    heapq.heappush(self._heap, (at + self.timeout_s, sat_id))
+                    self._scheduled.add(sat_id)
+
+    # ----- reads -----
+    def is_online(self, satellite_id: str) -> bool:
+        return self._online.get(satellite_id, False)
+
+    def last_seen(self, satellite_id: str) -> Optional[datetime]:
+        at = self._last_seen.get(satellite_id)
+        if at is None or at == float("-inf"):
+            return None
+        return datetime.utcfromtimestamp(at)
+
+    def satellites(self) -> List[str]:
+        return list(self._online)
+
+    def online_count(self) -> int:
+        return sum(1 for v in list(self._online.values()) if v)
+
+    # ----- DB sync -----
+    def flush(self, db, satellite_model) -> int:
+        """
+        Write queued status changes to the satellites table in one batched
+        UPDATE. Returns the number of satellites written.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        params = [{"sid": sat_id, "online": online} for sat_id, online in dirty.items()]
+        stmt = (
+            update(satellite_model)
+            .where(satellite_model.satellite_id == bindparam("sid"))
+            .values(is_online=bindparam("online"))
+        )
+        db.connection().execute(stmt, params)
+        db.commit()
+        return len(params)
+
+
+class LivenessWorker:
+    """
+    Background thread: expire deadlines and flush status every tick_s.
+    """
+
+    def __init__(self, tracker: LivenessTracker, session_factory, satellite_model, tick_s: float = 5.0):
+        self.tracker = tracker
+        self.session_factory = session_factory
+        self.satellite_model = satellite_model
+        self.tick_s = tick_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="liveness", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._tick()
+
+    def _tick(self):
+        try:
+            self.tracker.expire()
+            db = self.session_factory()
+            try:
+                if self.tracker.flush(db, self.satellite_model):
+                    bump_data_version()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Liveness tick failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.tick_s):
+            self._tick()
+
+
+LIVENESS = LivenessTracker(SATELLITE_TIMEOUT_S)
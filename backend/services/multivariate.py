@@ -0,0 +1,225 @@
+# backend/services/multivariate.py
+"""
+Streaming multivariate anomaly detection.
+
+Each satellite keeps an exponentially weighted mean and covariance of its
+full 15-dim feature vector (preprocess.FEATURE_FIELDS). A sample is scored by its
+squared Mahalanobis distance to that model before being folded in, so
+correlated changes (e.g. temperature rising while RSSI drops) stand out
+even when every channel is within its own limits.
+
+Position and velocity rotate with the orbit phase, so the model sees them
+as rotation-invariant quantities instead: radius, speed, radial velocity
+and the angular momentum vector, which are constant for a nominal orbit
+(taken from the feature store, see feature_engineering).
+
+Channels have very different units, so the distance is computed in
+standardized coordinates against the correlation matrix plus a small
+ridge, which keeps near-constant channels from making it singular. All
+satellites in a batch are scored and updated with one batched solve per
+round (see helpers.occurrence_rounds).
+
+threshold is a chi-square quantile, but the model is estimated from a
+finite (effective) number of samples, which makes the distances
+heavier-tailed: with alpha=0.01 the chi-square 99.9% point flagged ~0.7%
+of nominal samples. Each satellite's threshold is therefore moved to the
+same tail probability of the Hotelling T² distribution for its effective
+sample count (Wilson-Hilferty / Paulson approximations, no SciPy needed).
+
+Flagged samples still update the model, at flagged_weight of the normal
+rate, and after rebaseline_after consecutive flags the model is relearned
+from scratch, so a lasting change of operating mode stops alarming.
+"""
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import (
+    MULTIVARIATE_ALPHA, MULTIVARIATE_FLAGGED_WEIGHT, MULTIVARIATE_MIN_SAMPLES, MULTIVARIATE_REBASELINE_AFTER,
+    MULTIVARIATE_THRESHOLD,
+)
+from backend.services.preprocess import FEATURE_FIELDS
+from backend.services.snapshot import register_provider
+from backend.utils.helpers import occurrence_rounds
+
+
+# position/velocity (FEATURE_FIELDS[0:6]) replaced by orbit invariants
+CHANNELS = ("radius", "speed", "radial_velocity", "h_x", "h_y", "h_z") + tuple(FEATURE_FIELDS[6:])
+
+
+def finite_sample_threshold(threshold: float, dims: int, n: np.ndarray) -> np.ndarray:
+    """
+    Squared-distance threshold with the tail probability of the chi-square
+    (dims) quantile `threshold`, for a model estimated from n samples:
+    T² = dims (n-1)(n+1) / (n (n-dims)) F(dims, n-dims). inf where n is too
+    small for the approximation.
+    """
+    n = np.asarray(n, dtype=float)
+    # normal quantile of the chi-square threshold (Wilson-Hilferty)
+    z = ((threshold / dims) ** (1 / 3) - (1 - 2 / (9 * dims))) / np.sqrt(2 / (9 * dims))
+    # F quantile (Paulson): solve for u = F^(1/3)
+    d2 = np.maximum(n - dims, 1.0)
+    a, b = 1 - 2 / (9 * d2), 1 - 2 / (9 * dims)
+    qa = a * a - z * z * 2 / (9 * d2)
+    qb = -2 * a * b
+    qc = b * b - z * z * 2 / (9 * dims)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u = (-qb + np.sqrt(np.maximum(qb * qb - 4 * qa * qc, 0.0))) / (2 * qa)
+        out = dims * u ** 3 * (n - 1) * (n + 1) / (n * (n - dims))
+    return np.where((qa > 0) & (n > dims + 1), out, np.inf)
+
+
+class MultivariateDetector:
+
+    def __init__(self, channels: Sequence[str], alpha: float = 0.01, min_samples: int = 50,
+                 threshold: float = 37.7, ridge: float = 1e-3, top: int = 2,
+                 flagged_weight: float = 0.1, rebaseline_after: int = 100):
+        self.channels = tuple(channels)
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.ridge = ridge
+        self.top = top
+        self.flagged_weight = flagged_weight
+        self.rebaseline_after = rebaseline_after
+
+        d = len(self.channels)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._mean = np.zeros((0, d))
+        self._cov = np.zeros((0, d, d))
+        self._count = np.zeros(0, dtype=np.int64)
+        # consecutive flagged samples
+        self._streak = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _row(self, satellite_id: str) -> int:
+        row = self._rows.get(satellite_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row == len(self._mean):
+            grow = max(16, len(self._mean))
+            self._mean = np.concatenate([self._mean, np.zeros((grow,) + self._mean.shape[1:])])
+            self._cov = np.concatenate([self._cov, np.zeros((grow,) + self._cov.shape[1:])])
+            self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+            self._streak = np.concatenate([self._streak, np.zeros(grow, dtype=np.int64)])
+        self._rows[satellite_id] = row
+        self._ids.append(satellite_id)
+        return row
+
+    def _distance(self, rows: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Squared Mahalanobis distance (m,) and per-channel contributions (m, d)
+        that sum to it.
+        """
+        mean, cov = self._mean[rows], self._cov[rows]
+        var = np.diagonal(cov, axis1=1, axis2=2)
+        scale = np.sqrt(var) + 1e-6 * (np.abs(mean) + 1.0)
+        z = (x - mean) / scale
+        corr = cov / (scale[:, :, None] * scale[:, None, :]) + self.ridge * np.eye(len(self.channels))
+        w = np.linalg.solve(corr, z[..., None])[..., 0]
+        contrib = z * w
+        return contrib.sum(axis=1), contrib
+
+    def _thresholds(self, rows: np.ndarray) -> np.ndarray:
+        # EW weights: equal weights up to 1/alpha samples, then (2 - alpha) / alpha
+        n_eff = np.minimum(self._count[rows], (2 - self.alpha) / self.alpha)
+        return finite_sample_threshold(self.threshold, len(self.channels), n_eff)
+
+    def score_update(self, satellite_ids: Sequence[str], values: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Score each row of values (n, channels) against its satellite's
+        model, then update the model with it (flagged rows at a reduced
+        rate). Returns {"score", "distance", "flagged", "message"} per row.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        n = len(values)
+        distance = np.zeros(n)
+        limit = np.full(n, self.threshold)
+        flagged = np.zeros(n, dtype=bool)
+        contrib = np.zeros_like(values)
+
+        with self._lock:
+            rows = np.array([self._row(s) for s in satellite_ids], dtype=np.int64)
+            for idx in occurrence_rounds(rows):
+                r, x = rows[idx], values[idx]
+                ready = self._count[r] >= self.min_samples
+                if ready.any():
+                    d2, c = self._distance(r[ready], x[ready])
+                    distance[idx[ready]] = d2
+                    contrib[idx[ready]] = c
+                    limit[idx[ready]] = self._thresholds(r[ready])
+                    flagged[idx[ready]] = d2 > limit[idx[ready]]
+
+                # a lasting change of mode: relearn the model from here
+                hit = flagged[idx]
+                self._streak[r] = np.where(hit, self._streak[r] + 1, 0)
+                if self.rebaseline_after:
+                    reset = r[self._streak[r] >= self.rebaseline_after]
+                    self._count[reset] = 0
+                    self._streak[reset] = 0
+
+                learn = np.isfinite(x).all(axis=1)
+                r, x, hit = r[learn], x[learn], hit[learn]
+                a = np.maximum(1.0 / (self._count[r] + 1), self.alpha)
+                # anomalous samples only nudge the model
+                a = np.where(hit & (self._count[r] > 0), a * self.flagged_weight, a)[:, None]
+                delta = x - self._mean[r]
+                self._mean[r] += a * delta
+                self._cov[r] = (1 - a)[:, :, None] * (
+                    self._cov[r] + a[:, :, None] * delta[:, :, None] * delta[:, None, :]
+                )
+                self._count[r] += 1
+
+        results = []
+        for i in range(n):
+            if flagged[i]:
+                top = np.argsort(contrib[i])[::-1][:self.top]
+                message = (f"Correlated deviation (d²={distance[i]:.1f}): "
+                           + ", ".join(self.channels[j] for j in top))
+            else:
+                message = "Multivariate pattern nominal"
+            results.append({
+                "score": float(min(1.0, distance[i] / (2 * limit[i]))),
+                "distance": float(distance[i]),
+                "flagged": bool(flagged[i]),
+                "message": message,
+            })
+        return results
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            s = len(self._ids)
+            return {
+                "satellite_ids": np.array(self._ids, dtype=str),
+                "mean": self._mean[:s].copy(),
+                "cov": self._cov[:s].copy(),
+                "count": self._count[:s].copy(),
+                "streak": self._streak[:s].copy(),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        with self._lock:
+            for i, sat_id in enumerate(arrays["satellite_ids"].tolist()):
+                row = self._row(sat_id)
+                self._mean[row] = arrays["mean"][i]
+                self._cov[row] = arrays["cov"][i]
+                self._count[row] = arrays["count"][i]
+                if "streak" in arrays:
+                    self._streak[row] = arrays["streak"][i]
+
+
+MULTIVARIATE = MultivariateDetector(
+    CHANNELS,
+    alpha=MULTIVARIATE_ALPHA,
+    min_samples=MULTIVARIATE_MIN_SAMPLES,
+    threshold=MULTIVARIATE_THRESHOLD,
+    flagged_weight=MULTIVARIATE_FLAGGED_WEIGHT,
+    rebaseline_after=MULTIVARIATE_REBASELINE_AFTER,
+)
+
+register_provider("multivariate", MULTIVARIATE.export_arrays, MULTIVARIATE.import_arrays,
+                  {"satellite_ids": ("mean", "cov", "count", "streak")})
@@ -0,0 +1,383 @@
+# backend/services/passes.py
+"""
+Ground-station pass prediction.
+
+Each satellite's latest position/velocity is turned into orbital elements
+and propagated, all satellites together, over a coarse time grid. Sign
+changes of (elevation - mask) bracket AOS/LOS for every station; the
+brackets are then refined with vectorized bisection. The resulting pass
+tables are cached per satellite until they age out or the satellite's
+state changes, so "next contact" queries are a binary search.
+
+Passes shorter than the coarse step can be missed; keep coarse_step_s
+well below the shortest pass of interest.
+"""
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import (
+    GROUND_STATIONS, PASS_HORIZON_S, PASS_COARSE_STEP_S, PASS_REFRESH_S,
+)
+from backend.core.logger import logger
+from backend.models.observations import GroundStation, gmst
+from backend.models.propagation import EARTH_RADIUS_KM, j2_rates, propagate, propagate_at, rv_to_elements
+
+
+def parse_stations(spec: str) -> List[GroundStation]:
+    """
+    "name:lat:lon[:alt_km[:min_el_deg]],..." -> stations
+    """
+    stations = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        parts = item.split(":")
+        name, values = parts[0], [float(p) for p in parts[1:]]
+        stations.append(GroundStation(name, *values))
+    return stations
+
+
+def to_epoch(ts) -> float:
+    """
+    datetime (naive = UTC) or ISO string -> UNIX seconds.
+    """
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+@dataclass
+class PassTable:
+    computed_at: float
+    valid_until: float
+    station: np.ndarray   # (k,) station index per pass
+    aos: np.ndarray       # (k,) UNIX seconds, sorted
+    los: np.ndarray
+    # union of all stations' passes: sorted, non-overlapping windows
+    starts: np.ndarray
+    ends: np.ndarray
+    # contact seconds before each window, for O(log n) overlap queries
+    _cum: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._cum = np.r_[0.0, np.cumsum(self.ends - self.starts)]
+
+    def _covered(self, t: np.ndarray) -> np.ndarray:
+        i = np.searchsorted(self.starts, t, side="right") - 1
+        inside = np.clip(t - self.starts[np.maximum(i, 0)], 0.0, (self.ends - self.starts)[np.maximum(i, 0)])
+        return np.where(i >= 0, self._cum[np.maximum(i, 0)] + inside, 0.0)
+
+    def contact_seconds(self, t0, t1):
+        """
+        Predicted contact time within [t0, t1] (scalars or arrays).
+        """
+        if len(self.starts) == 0:
+            return np.zeros(np.shape(t0))
+        return self._covered(np.asarray(t1, dtype=float)) - self._covered(np.asarray(t0, dtype=float))
+
+    def in_contact(self, t: float) -> bool:
+        i = int(np.searchsorted(self.ends, t, side="right"))
+        return i < len(self.starts) and self.starts[i] <= t
+
+    def station_at(self, t: float) -> Optional[int]:
+        """
+        Index of a station with a pass in progress at t (the one acquired
+        first), or None.
+        """
+        i = int(np.searchsorted(self.aos, t, side="right"))
+        in_view = np.flatnonzero(self.los[:i] > t)
+        return int(self.station[in_view[0]]) if len(in_view) else None
+
+    def next_contact(self, t: float) -> Optional[Tuple[float, float]]:
+        """
+        (start, end) of the contact window in progress at t, or of the
+        next one; None if there is none before valid_until.
+        """
+        i = int(np.searchsorted(self.ends, t, side="right"))
+        if i >= len(self.starts):
+            return None
+        return float(self.starts[i]), float(self.ends[i])
+
+
+def _merge_windows(aos: np.ndarray, los: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if len(aos) == 0:
+        return aos, los
+    order = np.argsort(aos)
+    aos, los = aos[order], los[order]
+    # a window starts where aos exceeds every earlier los
+    run_end = np.maximum.accumulate(los)
+    new = np.r_[True, aos[1:] > run_end[:-1]]
+    group = np.cumsum(new) - 1
+    ends = np.full(group[-1] + 1, -np.inf)
+    np.maximum.at(ends, group, los)
+    return aos[new], ends
+
+
+def _refine(elements: np.ndarray, station: GroundStation, sat: np.ndarray,
+            lo: np.ndarray, hi: np.ndarray, rising: np.ndarray, tol_s: float) -> np.ndarray:
+    """
+    Bisect every bracket [lo, hi] (seconds from the grid start) of
+    satellite sat for the elevation mask crossing at once.
+    """
+    el = elements[sat]
+    while len(lo) and np.max(hi - lo) > tol_s:
+        mid = 0.5 * (lo + hi)
+        r, _ = propagate_at(el, mid)
+        above = station.elevation(r, mid) >= station.min_elevation
+        # rising: the crossing is before mid if mid is already above the mask
+        before = above == rising
+        hi = np.where(before, mid, hi)
+        lo = np.where(before, lo, mid)
+    return 0.5 * (lo + hi)
+
+
+def predict_passes(elements: np.ndarray, stations: Sequence[GroundStation], t0: float,
+                   horizon_s: float = 86400.0, coarse_step_s: float = 60.0, tol_s: float = 1.0,
+                   chunk: int = 256) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Passes of n satellites (elements at UNIX time t0) over stations during
+    [t0, t0 + horizon_s]. Returns, per satellite, (station index, AOS, LOS)
+    arrays in UNIX seconds; passes in progress at either end are clipped.
+    """
+    n = len(elements)
+    t = np.arange(0.0, horizon_s + coarse_step_s, coarse_step_s)
+    t[-1] = min(t[-1], horizon_s)
+    stations = [replace(s, theta0=gmst(t0)) for s in stations]
+    found = [[] for _ in range(n)]   # per satellite: (station, aos, los) arrays
+
+    for start in range(0, n, chunk):
+        el = elements[start:start + chunk]
+        r, _ = propagate(el, t)                                   # (c, m, 3)
+        for s_idx, station in enumerate(stations):
+            above = station.elevation(r, t) >= station.min_elevation   # (c, m)
+            step = np.diff(above.astype(np.int8), axis=1)
+            rise_sat, rise_j = np.nonzero(step == 1)
+            set_sat, set_j = np.nonzero(step == -1)
+
+            sats = np.r_[rise_sat, set_sat]
+            lo = t[np.r_[rise_j, set_j]]
+            hi = t[np.r_[rise_j, set_j] + 1]
+            rising = np.r_[np.ones(len(rise_sat), bool), np.zeros(len(set_sat), bool)]
+            cross = _refine(el, station, sats, lo, hi, rising, tol_s)
+
+            # passes in progress at the window edges
+            first_up = np.flatnonzero(above[:, 0])
+            last_up = np.flatnonzero(above[:, -1])
+            aos_sat = np.r_[first_up, rise_sat]
+            aos_t = np.r_[np.zeros(len(first_up)), cross[rising]]
+            los_sat = np.r_[set_sat, last_up]
+            los_t = np.r_[cross[~rising], np.full(len(last_up), t[-1])]
+
+            # rises and sets alternate per satellite, so sorted they pair up
+            a_order = np.lexsort((aos_t, aos_sat))
+            l_order = np.lexsort((los_t, los_sat))
+            aos_sat, aos_t = aos_sat[a_order], aos_t[a_order]
+            los_t = los_t[l_order]
+            bounds = np.searchsorted(aos_sat, np.arange(len(el) + 1))
+            for k in range(len(el)):
+                a, b = bounds[k], bounds[k + 1]
+                if a < b:
+                    found[start + k].append((np.full(b - a, s_idx), aos_t[a:b] + t0, los_t[a:b] + t0))
+
+    result = []
+    for per_station in found:
+        if not per_station:
+            empty = np.empty(0)
+            result.append((empty.astype(int), empty, empty))
+            continue
+        st = np.concatenate([p[0] for p in per_station])
+        aos = np.concatenate([p[1] for p in per_station])
+        los = np.concatenate([p[2] for p in per_station])
+        order = np.argsort(aos)
+        result.append((st[order], aos[order], los[order]))
+    return result
+
+
+class PassPredictor:
+    """
+    Per-satellite pass tables, refreshed in batches.
+
+    update_state() just records the latest state vector; refresh()
+    recomputes tables that are missing, older than refresh_s, or whose
+    state was updated after a table was built and has drifted from it.
+    """
+
+    def __init__(self, stations: Sequence[GroundStation], horizon_s: float = 86400.0,
+                 coarse_step_s: float = 60.0, refresh_s: float = 3600.0, tol_s: float = 1.0,
+                 drift_km: float = 10.0):
+        self.stations = list(stations)
+        self.horizon_s = horizon_s
+        self.coarse_step_s = coarse_step_s
+        self.refresh_s = refresh_s
+        self.tol_s = tol_s
+        self.drift_km = drift_km
+        # satellite_id -> (epoch, r, v)
+        self._states: Dict[str, Tuple[float, np.ndarray, np.ndarray]] = {}
+        # satellite_id -> (elements, epoch) the current table was built from
+        self._built_from: Dict[str, Tuple[np.ndarray, float]] = {}
+        self._tables: Dict[str, PassTable] = {}
+        self._lock = threading.Lock()
+
+    def update_state(self, satellite_id: str, r: Sequence[float], v: Sequence[float], epoch: float):
+        with self._lock:
+            prev = self._states.get(satellite_id)
+            if prev is None or epoch >= prev[0]:
+                self._states[satellite_id] = (epoch, np.asarray(r, dtype=float), np.asarray(v, dtype=float))
+
+    def states(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest state vectors of all satellites: (ids, epochs (n,), r (n, 3), v (n, 3)).
+        """
+        with self._lock:
+            items = list(self._states.items())
+        if not items:
+            return [], np.zeros(0), np.zeros((0, 3)), np.zeros((0, 3))
+        return ([s for s, _ in items], np.array([st[0] for _, st in items]),
+                np.array([st[1] for _, st in items]), np.array([st[2] for _, st in items]))
+
+    def table(self, satellite_id: str) -> Optional[PassTable]:
+        return self._tables.get(satellite_id)
+
+    def next_contact(self, satellite_id: str, now: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        table = self._tables.get(satellite_id)
+        if table is None:
+            return None
+        return table.next_contact(time.time() if now is None else now)
+
+    def _stale(self, now: float) -> List[str]:
+        stale, moved = [], []
+        for sat_id, (epoch, r, v) in self._states.items():
+            table = self._tables.get(sat_id)
+            if table is None or now - table.computed_at > self.refresh_s:
+                stale.append(sat_id)
+            elif epoch > self._built_from[sat_id][1]:
+                moved.append(sat_id)
+        if moved:
+            # compare new states with where the elements behind each table put them
+            built = np.array([self._built_from[s][0] for s in moved])
+            dt = np.array([self._states[s][0] - self._built_from[s][1] for s in moved])
+            predicted, _ = propagate_at(built, dt)
+            observed = np.array([self._states[s][1] for s in moved])
+            drift = np.linalg.norm(predicted - observed, axis=1)
+            stale += [s for s, d in zip(moved, drift) if not d <= self.drift_km]
+        return stale
+
+    def refresh(self, now: Optional[float] = None) -> int:
+        """
+        Rebuild stale tables in one batch. Returns the number rebuilt.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = self._stale(now)
+            states = [self._states[s] for s in stale]
+        if not stale or not self.stations:
+            return 0
+
+        epochs = np.array([s[0] for s in states])
+        elements = rv_to_elements(np.array([s[1] for s in states]), np.array([s[2] for s in states]))
+        # bound elliptic orbits above the surface only
+        ok = ((elements[:, 1] < 1.0) & (elements[:, 0] * (1.0 - elements[:, 1]) > EARTH_RADIUS_KM)
+              & np.isfinite(elements).all(axis=1))
+
+        # move every satellite's elements to the common epoch `now`
+        at_now = elements.copy()
+        raan_dot, argp_dot, m_dot = j2_rates(elements[:, 0], elements[:, 1], elements[:, 2])
+        dt = now - epochs
+        at_now[:, 3] += raan_dot * dt
+        at_now[:, 4] += argp_dot * dt
+        at_now[:, 5] += m_dot * dt
+
+        idx = np.flatnonzero(ok)
+        passes = predict_passes(at_now[idx], self.stations, now, self.horizon_s,
+                                self.coarse_step_s, self.tol_s) if len(idx) else []
+
+        tables = {}
+        for k, (station, aos, los) in zip(idx, passes):
+            starts, ends = _merge_windows(aos, los)
+            tables[stale[k]] = PassTable(now, now + self.horizon_s, station, aos, los, starts, ends)
+
+        with self._lock:
+            for k, sat_id in enumerate(stale):
+                if sat_id in tables:
+                    self._tables[sat_id] = tables[sat_id]
+                    self._built_from[sat_id] = (elements[k], epochs[k])
+                else:
+                    self._tables.pop(sat_id, None)
+                    self._built_from.pop(sat_id, None)
+        return len(tables)
+
+    def station_in_view(self, satellite_id: str, t: float) -> Optional[str]:
+        """
+        Name of the ground station the satellite is predicted to be in
+        contact with at UNIX time t, or None.
+        """
+        table = self._tables.get(satellite_id)
+        if table is None or not table.computed_at <= t <= table.valid_until:
+            return None
+        k = table.station_at(t)
+        return None if k is None else self.stations[k].name
+
+    def contact_info(self, satellite_id: str, now: Optional[float] = None) -> Dict[str, object]:
+        """
+        Fields for API responses: in_contact and the next contact window.
+        """
+        now = time.time() if now is None else now
+        table = self._tables.get(satellite_id)
+        window = table.next_contact(now) if table is not None else None
+        if window is None:
+            return {"in_contact": None, "next_aos": None, "next_los": None}
+        return {
+            "in_contact": window[0] <= now,
+            "next_aos": datetime.utcfromtimestamp(window[0]).isoformat(),
+            "next_los": datetime.utcfromtimestamp(window[1]).isoformat(),
+        }
+
+
+class PassWorker:
+    """
+    Background thread refreshing stale pass tables every interval_s.
+    """
+
+    def __init__(self, predictor: PassPredictor, interval_s: float = 60.0):
+        self.predictor = predictor
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="passes", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                started = time.monotonic()
+                rebuilt = self.predictor.refresh()
+                if rebuilt:
+                    logger.info(f"Rebuilt {rebuilt} pass tables in {time.monotonic() - started:.2f}s")
+            except Exception as e:
+                logger.error(f"Pass prediction failed: {e}")
+
+
+PASSES = PassPredictor(parse_stations(GROUND_STATIONS), PASS_HORIZON_S, PASS_COARSE_STEP_S, PASS_REFRESH_S)
+
+
+def track_orbit(sample) -> bool:
+    """
+    Feed a telemetry dict with position/velocity into PASSES.
+    Returns False when the sample has no complete state vector.
+    """
+    r = [sample.get(k) for k in ("position_x", "position_y", "position_z")]
+    v = [sample.get(k) for k in ("velocity_x", "velocity_y", "velocity_z")]
+    if None in r or None in v or sample.get("timestamp") is None:
+        return False
+    PASSES.update_state(sample["satellite_id"], r, v, to_epoch(sample["timestamp"]))
+    return True
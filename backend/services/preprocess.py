@@ -1,25 +1,46 @@
 import numpy as np
-from backend.core.schemas import Telemetry
+from typing import Any, Iterable
 
-def preprocess_telemetry(data: Telemetry) -> np.ndarray:
+EARTH_RADIUS_KM = 6378.137
+
+# Ordering consistent with anomaly_engine expectations
+FEATURE_FIELDS = (
+    "position_x",
+    "position_y",
+    "position_z",
+    "velocity_x",
+    "velocity_y",
+    "velocity_z",
+    "temp_payload",
+    "temp_battery",
+    "temp_bus",
+    "sensor1_value",
+    "sensor2_value",
+    "sensor3_value",
+    "comms_rssi",
+    "comms_snr",
+    "comms_packet_loss",
+)
+
+
+def _field(data: Any, name: str):
+    if isinstance(data, dict):
+        return data[name]
+    return getattr(data, name)
+
+
+def preprocess_telemetry(data: Any) -> np.ndarray:
     """
-Convert Telemetry object into numeric feature vector.
+Convert a telemetry dict (or object with the same attributes) into a
+numeric feature vector.
 Keep ordering consistent with anomaly_engine expectations.
 """
-    return np.array([
-        data.position_x,
-        data.position_y,
-        data.position_z,
-        data.velocity_x,
-        data.velocity_y,
-        data.velocity_z,
-        data.temp_payload,
-        data.temp_battery,
-        data.temp_bus,
-        data.sensor1_value,
-        data.sensor2_value,
-        data.sensor3_value,
-        data.comms_rssi,
-        data.comms_snr,
-        data.comms_packet_loss,
-    ], dtype=float)
\ No newline at end of file
+    return np.array([_field(data, name) for name in FEATURE_FIELDS], dtype=float)
+
+
+def preprocess_batch(samples: Iterable[Any]) -> np.ndarray:
+    """
+    Stack many telemetry samples into an (n, 15) feature matrix.
+    """
+    rows = [[_field(s, name) for name in FEATURE_FIELDS] for s in samples]
+    return np.array(rows, dtype=float).reshape(-1, len(FEATURE_FIELDS))
@@ -0,0 +1,152 @@
+# backend/services/response_cache.py
+"""
+Response cache for read-heavy dashboard endpoints.
+
+Ingestion bumps a process-wide data version; cached GET responses are
+keyed by (path, query string) and only served while their version is the
+current one, so between ingest events the dashboard's polling never
+reaches the database. Every cached response carries an ETag and
+If-None-Match requests are answered with 304. Memory is bounded by an LRU
+on both entry count and total body bytes.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+_DATA_VERSION = 0
+_VERSION_LOCK = threading.Lock()
+
+
+def bump_data_version() -> int:
+    """
+    Call after any write that can change a cached response.
+    """
+    global _DATA_VERSION
+    with _VERSION_LOCK:
+        _DATA_VERSION += 1
+        return _DATA_VERSION
+
+
+def get_data_version() -> int:
+    return _DATA_VERSION
+
+
+class _Entry:
+    __slots__ = ("version", "etag", "body", "headers", "stored_at")
+
+    def __init__(self, version: int, etag: str, body: bytes, headers: dict):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    LRU of response bodies bounded by max_entries and max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024,
+                 max_age_s: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str], version: int) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            # stale by version, or by age for time-dependent fields (e.g. is_online)
+            if entry.version != version or time.monotonic() - entry.stored_at > self.max_age_s:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple[str, str], entry: _Entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "data_version": get_data_version(),
+        }
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [t.strip() for t in header.split(",")]
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Caches successful GET responses for the given paths.
+    """
+
+    def __init__(self, app, paths: Iterable[str], cache: Optional[ResponseCache] = None):
+        super().__init__(app)
+        self.paths = {p.rstrip("/") for p in paths}
+        self.cache = cache or ResponseCache()
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path.rstrip("/")
+        if request.method != "GET" or path not in self.paths:
+            return await call_next(request)
+
+        key = (path, "&".join(sorted(request.url.query.split("&"))))
+        version = get_data_version()
+        if_none_match = request.headers.get("if-none-match")
+
+        entry = self.cache.get(key, version)
+        if entry is None:
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            etag = f'"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            headers = {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in ("content-length", "etag", "cache-control")
+            }
+            entry = _Entry(version, etag, body, headers)
+            self.cache.put(key, entry)
+
+        cache_headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, entry.etag):
+            return Response(status_code=304, headers=cache_headers)
+        return Response(content=entry.body, status_code=200, headers={**entry.headers, **cache_headers})
@@ -0,0 +1,231 @@
+# backend/services/retention.py
+"""
+Data retention / compaction for the SQLite store.
+
+Rows older than a per-table (and, for anomaly tables, per-severity) TTL are
+deleted in small chunks, each in its own short transaction, so ingestion
+only ever waits for one chunk. Freed pages are then returned to the OS with
+PRAGMA incremental_vacuum and the reclaimed space is reported.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from backend.core.compact import SEVERITY_CODES, to_epoch_ms
+from backend.core.logger import logger
+from backend.services.response_cache import bump_data_version
+
+
+@dataclass
+class RetentionPolicy:
+    table: str
+    ttl_days: float
+    # None = every row of the table; otherwise only rows with one of these severities
+    severities: Optional[Sequence[str]] = None
+    # rows whose severity is NOT in this list (catch-all rule for a table)
+    exclude_severities: Optional[Sequence[str]] = None
+    # anomaly episodes: never delete rows that are still open (ended_at IS NULL)
+    closed_only: bool = False
+
+    @property
+    def name(self) -> str:
+        if self.severities:
+            return f"{self.table}[{','.join(self.severities)}]"
+        if self.exclude_severities:
+            return f"{self.table}[other]"
+        return self.table
+
+
+def default_policies(telemetry_days: float = 7, critical_days: float = 365,
+                     warning_days: float = 90, other_days: float = 30) -> List[RetentionPolicy]:
+    policies = [RetentionPolicy("telemetry", telemetry_days)]
+    for table in ("anomalies", "anomaly_events"):
+        policies += [
+            RetentionPolicy(table, critical_days, severities=["critical"], closed_only=True),
+            RetentionPolicy(table, warning_days, severities=["warning"], closed_only=True),
+            RetentionPolicy(table, other_days, exclude_severities=["critical", "warning"], closed_only=True),
+        ]
+    return policies
+
+
+def _cutoff_param(cutoff: datetime) -> int:
+    # timestamps are stored as epoch milliseconds (see core/compact.py)
+    return to_epoch_ms(cutoff)
+
+
+def _where_clause(policy: RetentionPolicy) -> str:
+    clause = "ts_ms < :cutoff"
+    if policy.severities:
+        names = ", ".join(f":sev{i}" for i in range(len(policy.severities)))
+        clause += f" AND severity_code IN ({names})"
+    elif policy.exclude_severities:
+        names = ", ".join(f":sev{i}" for i in range(len(policy.exclude_severities)))
+        clause += f" AND (severity_code IS NULL OR severity_code NOT IN ({names}))"
+    if policy.closed_only:
+        clause += " AND ended_ms IS NOT NULL"
+    return clause
+
+
+def _table_exists(engine: Engine, table: str) -> bool:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :t"), {"t": table}
+        ).first()
+    return row is not None
+
+
+def purge(engine: Engine, policy: RetentionPolicy, now: Optional[datetime] = None,
+          chunk_size: int = 5000, pause_s: float = 0.01) -> int:
+    """
+    Delete expired rows for one policy in chunks. Returns rows deleted.
+    """
+    now = now or datetime.utcnow()
+    params = {"cutoff": _cutoff_param(now - timedelta(days=policy.ttl_days)), "n": chunk_size}
+    for i, sev in enumerate(policy.severities or policy.exclude_severities or []):
+        params[f"sev{i}"] = SEVERITY_CODES[sev]
+
+    stmt = text(
+        f"DELETE FROM {policy.table} WHERE id IN "
+        f"(SELECT id FROM {policy.table} WHERE {_where_clause(policy)} LIMIT :n)"
+    )
+
+    deleted = 0
+    while True:
+        with engine.begin() as conn:
+            count = conn.execute(stmt, params).rowcount
+        deleted += count
+        if count < chunk_size:
+            return deleted
+        # let queued writers in between chunks
+        time.sleep(pause_s)
+
+
+def _db_pages(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            "page_size": conn.execute(text("PRAGMA page_size")).scalar(),
+            "page_count": conn.execute(text("PRAGMA page_count")).scalar(),
+            "freelist_count": conn.execute(text("PRAGMA freelist_count")).scalar(),
+        }
+
+
+def incremental_vacuum_enabled(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+
+def convert_to_incremental_vacuum(engine: Engine):
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL. This needs a
+    full VACUUM, which rewrites the whole file under an exclusive lock, so
+    it is an offline step (python -m backend.core.vacuum), never run by the
+    servers.
+    """
+    if incremental_vacuum_enabled(engine):
+        return
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.commit()
+        conn.execute(text("VACUUM"))
+
+
+def incremental_vacuum(engine: Engine, max_pages: int = 2000) -> int:
+    """
+    Release up to max_pages free pages per step until none are left.
+    Returns pages released.
+    """
+    released = 0
+    while True:
+        free = _db_pages(engine)["freelist_count"]
+        if not free:
+            return released
+        with engine.begin() as conn:
+            conn.execute(text(f"PRAGMA incremental_vacuum({max_pages})"))
+        after = _db_pages(engine)["freelist_count"]
+        released += free - after
+        if after >= free:
+            # auto_vacuum is not INCREMENTAL; nothing more can be released
+            return released
+
+
+def run_retention(engine: Engine, policies: Sequence[RetentionPolicy],
+                  chunk_size: int = 5000) -> Dict[str, object]:
+    """
+    Apply all policies, vacuum, and return a report of rows deleted and
+    bytes reclaimed.
+    """
+    started = time.monotonic()
+    before = _db_pages(engine)
+
+    deleted = {}
+    for policy in policies:
+        if not _table_exists(engine, policy.table):
+            continue
+        deleted[policy.name] = purge(engine, policy, chunk_size=chunk_size)
+
+    if any(deleted.values()):
+        bump_data_version()
+
+    released = incremental_vacuum(engine)
+    after = _db_pages(engine)
+
+    report = {
+        "deleted_rows": deleted,
+        "pages_released": released,
+        "reclaimed_bytes": (before["page_count"] - after["page_count"]) * after["page_size"],
+        "db_size_bytes": after["page_count"] * after["page_size"],
+        "free_bytes": after["freelist_count"] * after["page_size"],
+        "duration_s": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Retention: deleted {sum(deleted.values())} rows, "
+        f"reclaimed {report['reclaimed_bytes']} bytes in {report['duration_s']}s"
+    )
+    return report
+
+
+class RetentionWorker:
+    """
+    Background thread that runs run_retention every interval_s seconds.
+    The latest report is kept on last_report.
+    """
+
+    def __init__(self, engine: Engine, policies: Sequence[RetentionPolicy],
+                 interval_s: float = 3600.0, chunk_size: int = 5000):
+        self.engine = engine
+        self.policies = list(policies)
+        self.interval_s = interval_s
+        self.chunk_size = chunk_size
+        self.last_report: Optional[Dict[str, object]] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            if not incremental_vacuum_enabled(self.engine):
+                logger.warning(
+                    "Database is not in incremental auto_vacuum mode: freed pages stay in the file. "
+                    "Convert it offline with `python -m backend.core.vacuum`."
+                )
+        except Exception as e:
+            logger.error(f"Could not check auto_vacuum mode: {e}")
+
+        while True:
+            try:
+                self.last_report = run_retention(self.engine, self.policies, self.chunk_size)
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}")
+            if self._stop.wait(self.interval_s):
+                break
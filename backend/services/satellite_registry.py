@@ -0,0 +1,165 @@
+# backend/services/satellite_registry.py
+"""
+In-memory satellite registry for the ingest path.
+
+Loaded from the satellites table at startup, it answers "is this a known
+satellite" and its last telemetry / latest severity without a query.
+Ingest only updates memory; new satellites and changed fields are written
+by a background worker as one bulk INSERT plus one executemany UPDATE per
+tick, however many samples arrived in between. Online status is owned by
+the liveness tracker, which flushes it the same way; new rows are inserted
+with the tracker's current status, since its UPDATE may have run before
+the row existed.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from backend.core.logger import logger
+from backend.services.liveness import LIVENESS
+from backend.services.response_cache import bump_data_version
+
+
+@dataclass
+class SatelliteRecord:
+    satellite_id: str
+    last_telemetry: Optional[datetime] = None
+    latest_severity: str = "normal"
+
+
+class SatelliteRegistry:
+
+    def __init__(self, is_online: Callable[[str], bool] = lambda satellite_id: True):
+        self.is_online = is_online
+        self._records: Dict[str, SatelliteRecord] = {}
+        # not yet in the table / changed since the last flush
+        self._new: set = set()
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, satellite_model):
+        rows = db.query(satellite_model.satellite_id, satellite_model.last_telemetry,
+                        satellite_model.latest_severity).all()
+        with self._lock:
+            for sat_id, last_telemetry, severity in rows:
+                self._records[sat_id] = SatelliteRecord(sat_id, last_telemetry, severity or "normal")
+
+    def seen(self, satellite_id: str, timestamp: datetime, severity: Optional[str] = None) -> bool:
+        """
+        Record a sample (and, if given, the severity it was classified as).
+        A sample older than the satellite's last one changes nothing.
+        Returns True for a satellite not seen before.
+        """
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        with self._lock:
+            record = self._records.get(satellite_id)
+            is_new = record is None
+            if is_new:
+                record = self._records[satellite_id] = SatelliteRecord(satellite_id)
+                self._new.add(satellite_id)
+            elif record.last_telemetry is not None and timestamp < record.last_telemetry:
+                # late sample: last telemetry and latest severity belong to a newer one
+                return False
+            record.last_telemetry = timestamp
+            if severity is not None:
+                record.latest_severity = severity
+            self._dirty.add(satellite_id)
+        return is_new
+
+    # ----- reads -----
+    def exists(self, satellite_id: str) -> bool:
+        return satellite_id in self._records
+
+    def get(self, satellite_id: str) -> Optional[SatelliteRecord]:
+        return self._records.get(satellite_id)
+
+    def records(self) -> List[SatelliteRecord]:
+        with self._lock:
+            return list(self._records.values())
+
+    # ----- DB sync -----
+    def flush(self, db: Session, satellite_model) -> int:
+        """
+        Insert new satellites and write changed fields in one transaction.
+        Returns the number of satellites written.
+        """
+        with self._lock:
+            new, dirty = self._new, self._dirty
+            self._new, self._dirty = set(), set()
+            rows = [
+                {"sid": s, "last": self._records[s].last_telemetry, "severity": self._records[s].latest_severity}
+                for s in dirty | new
+            ]
+        if not rows:
+            return 0
+        inserts = [r for r in rows if r["sid"] in new]
+        updates = [r for r in rows if r["sid"] not in new]
+        try:
+            conn = db.connection()
+            if inserts:
+                conn.execute(insert(satellite_model.__table__), [
+                    {"satellite_id": r["sid"], "is_online": self.is_online(r["sid"]), "last_telemetry": r["last"],
+                     "latest_severity": r["severity"]}
+                    for r in inserts
+                ])
+            if updates:
+                conn.execute(
+                    update(satellite_model.__table__)
+                    .where(satellite_model.__table__.c.satellite_id == bindparam("sid"))
+                    .values(last_telemetry=bindparam("last"), latest_severity=bindparam("severity")),
+                    updates,
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # retried on the next flush
+            with self._lock:
+                self._new |= new
+                self._dirty |= dirty
+            raise
+        return len(rows)
+
+
+class SatelliteRegistryWorker:
+    """
+    Background thread: flush the registry every interval_s (and on stop).
+    """
+
+    def __init__(self, registry: SatelliteRegistry, session_factory, satellite_model, interval_s: float = 5.0):
+        self.registry = registry
+        self.session_factory = session_factory
+        self.satellite_model = satellite_model
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="satellite-registry", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._tick()
+
+    def _tick(self):
+        try:
+            db = self.session_factory()
+            try:
+                if self.registry.flush(db, self.satellite_model):
+                    bump_data_version()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Satellite registry flush failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._tick()
+
+
+SATELLITE_REGISTRY = SatelliteRegistry(LIVENESS.is_online)
@@ -0,0 +1,171 @@
+# backend/services/sensor_health.py
+"""
+Streaming sensor fault classification for the redundant sensors
+(sensor1_value .. sensor3_value).
+
+Per satellite and sensor the state is a handful of numbers, updated in O(1)
+per sample:
+
+- stuck: the value has not changed for `stuck_window` consecutive samples
+  (zero variance over the window), tracked as a run length.
+- drift: two-sided CUSUM on the sensor's residual against the mean of its
+  siblings, standardized by the residual's own EW mean/variance. A slow
+  offset that no single sample reveals accumulates until it crosses h.
+  A sensor already drifting is left out of its siblings' reference.
+- spike: a single standardized residual beyond spike_z.
+
+Residual baselines only learn from samples without a fault. Each mode is
+reported with its own issue code. Batches are processed one round of
+unique satellites at a time, vectorized over satellites and sensors.
+"""
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from backend.core.config import SENSOR_CUSUM_H, SENSOR_CUSUM_K, SENSOR_SPIKE_Z, SENSOR_STUCK_WINDOW
+from backend.services.preprocess import FEATURE_FIELDS
+from backend.services.snapshot import register_provider
+from backend.utils.helpers import occurrence_rounds
+
+SENSOR_FIELDS = ("sensor1_value", "sensor2_value", "sensor3_value")
+SENSOR_COLUMNS = [FEATURE_FIELDS.index(f) for f in SENSOR_FIELDS]
+
+FAULT_CODES = {"stuck": "SENSOR_STUCK", "drift": "SENSOR_DRIFT", "spike": "SENSOR_SPIKE"}
+
+_STATE_KEYS = ("last", "run", "mean", "var", "count", "cusum_pos", "cusum_neg")
+
+
+class SensorHealthMonitor:
+
+    def __init__(self, n_sensors: int = 3, stuck_window: int = 8, cusum_k: float = 0.5,
+                 cusum_h: float = 8.0, spike_z: float = 6.0, alpha: float = 0.02,
+                 min_samples: int = 20):
+        self.n_sensors = n_sensors
+        self.stuck_window = stuck_window
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.spike_z = spike_z
+        self.alpha = alpha
+        self.min_samples = min_samples
+
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._state = {k: np.zeros((0, n_sensors)) for k in _STATE_KEYS}
+        self._lock = threading.Lock()
+
+    def _row(self, satellite_id: str) -> int:
+        row = self._rows.get(satellite_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row == len(self._state["last"]):
+            grow = max(16, row)
+            for k in _STATE_KEYS:
+                self._state[k] = np.concatenate([self._state[k], np.zeros((grow, self.n_sensors))])
+            self._state["last"][row:] = np.nan
+        self._rows[satellite_id] = row
+        self._ids.append(satellite_id)
+        return row
+
+    def _step(self, rows: np.ndarray, x: np.ndarray) -> Dict[str, np.ndarray]:
+        st = {k: v[rows] for k, v in self._state.items()}
+        valid = np.isfinite(x)
+
+        # stuck: run of identical consecutive values
+        same = valid & (x == st["last"])
+        st["run"] = np.where(same, st["run"] + 1, 0)
+        stuck = st["run"] >= self.stuck_window - 1
+        st["last"] = np.where(valid, x, st["last"])
+
+        # residual against the mean of the sibling sensors (stuck ones and
+        # ones already drifting excluded, so a drift doesn't spread to its
+        # siblings' CUSUMs)
+        drifting = np.maximum(st["cusum_pos"], st["cusum_neg"]) > self.cusum_h
+        healthy = valid & ~stuck
+        reference = healthy & ~drifting
+        total = np.sum(np.where(reference, x, 0.0), axis=1, keepdims=True)
+        siblings = np.sum(reference, axis=1, keepdims=True) - reference
+        with np.errstate(invalid="ignore", divide="ignore"):
+            residual = x - (total - np.where(reference, x, 0.0)) / siblings
+        # with a single sibling the two residuals mirror each other and a
+        # fault can't be attributed, so at least two are needed
+        usable = healthy & (siblings >= 2)
+        ready = usable & (st["count"] >= self.min_samples)
+        z = np.where(ready, (residual - st["mean"]) / np.sqrt(st["var"] + 1e-9), 0.0)
+
+        # a sensor already drifting keeps feeding its CUSUM instead
+        spike = ready & ~drifting & (np.abs(z) > self.spike_z)
+        # spikes are not fed to the CUSUM, so one outlier can't look like drift
+        step_z = np.where(spike, 0.0, z)
+        cap = 1.5 * self.cusum_h
+        st["cusum_pos"] = np.where(ready, np.minimum(np.maximum(0.0, st["cusum_pos"] + step_z - self.cusum_k), cap),
+                                   st["cusum_pos"])
+        st["cusum_neg"] = np.where(ready, np.minimum(np.maximum(0.0, st["cusum_neg"] - step_z - self.cusum_k), cap),
+                                   st["cusum_neg"])
+        # a drifting sensor also shifts its siblings' residuals (by half as
+        # much for three sensors), so blame only the largest CUSUM
+        cusum = np.maximum(st["cusum_pos"], st["cusum_neg"])
+        worst = np.arange(self.n_sensors) == np.argmax(cusum, axis=1)[:, None]
+        drift = (cusum > self.cusum_h) & worst
+
+        # residual baseline learns only from healthy samples
+        learn = usable & ~spike & ~drift
+        a = np.maximum(1.0 / (st["count"] + 1), self.alpha)
+        delta = np.where(learn, residual - st["mean"], 0.0)
+        st["mean"] = st["mean"] + a * delta
+        st["var"] = np.where(learn, (1 - a) * (st["var"] + a * delta ** 2), st["var"])
+        st["count"] = st["count"] + learn
+
+        for k, v in st.items():
+            self._state[k][rows] = v
+        return {"stuck": stuck, "drift": drift & ~stuck, "spike": spike & ~stuck}
+
+    def update(self, satellite_ids: Sequence[str], values: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Classify sensor readings (n, n_sensors). Returns, per row, the fault
+        issue codes, a score and a message naming the affected sensors.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        faults = {mode: np.zeros(values.shape, dtype=bool) for mode in FAULT_CODES}
+        with self._lock:
+            rows = np.array([self._row(s) for s in satellite_ids], dtype=np.int64)
+            for idx in occurrence_rounds(rows):
+                for mode, mask in self._step(rows[idx], values[idx]).items():
+                    faults[mode][idx] = mask
+
+        results = []
+        for i in range(len(values)):
+            found = [(mode, SENSOR_FIELDS[j]) for mode in FAULT_CODES for j in np.flatnonzero(faults[mode][i])]
+            results.append({
+                "issues": sorted({FAULT_CODES[mode] for mode, _ in found}),
+                "score": min(1.0, len(found) / self.n_sensors),
+                "message": "; ".join(f"{name} {mode}" for mode, name in found) or "Sensors nominal",
+            })
+        return results
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            s = len(self._ids)
+            return {"satellite_ids": np.array(self._ids, dtype=str),
+                    **{k: v[:s].copy() for k, v in self._state.items()}}
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        with self._lock:
+            for i, sat_id in enumerate(arrays["satellite_ids"].tolist()):
+                row = self._row(sat_id)
+                for k in _STATE_KEYS:
+                    self._state[k][row] = arrays[k][i]
+
+
+SENSOR_HEALTH = SensorHealthMonitor(
+    n_sensors=len(SENSOR_FIELDS),
+    stuck_window=SENSOR_STUCK_WINDOW,
+    cusum_k=SENSOR_CUSUM_K,
+    cusum_h=SENSOR_CUSUM_H,
+    spike_z=SENSOR_SPIKE_Z,
+)
+
+register_provider("sensor_health", SENSOR_HEALTH.export_arrays, SENSOR_HEALTH.import_arrays,
+                  {"satellite_ids": _STATE_KEYS})
@@ -0,0 +1,151 @@
+# backend/services/shard_state.py
+"""
+Reads and writes of detector state, wherever detection runs.
+
+With INGEST_WORKERS > 0 the thresholds, forecasts and feature store live
+in the shard processes, not in the API process. Every operation here is
+a named function that runs in the process owning the state: on_owner()
+sends it to the shard of one satellite, on_all() to every shard (merging
+is up to the caller), and without workers both run it in-process. Shard
+messages go through the same FIFO inbox as ingest batches, so an
+override applies to every batch sent after it.
+"""
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.config import INGEST_TIMEOUT_S
+from backend.services.detection import detect_batch
+from backend.services.feature_engineering import FEATURE_STORE
+from backend.services.forecast import FORECASTERS
+from backend.services.sharding import get_executor, shard_for
+from backend.services.thresholds import LEARNERS
+
+# per-satellite keys of ThresholdLearner.export_json()
+_THRESHOLD_ROWS = ("satellite_ids", "markers", "positions", "desired", "counts", "override_low", "override_high")
+
+# satellites whose state this process keeps (set by shard workers)
+_owns: Callable[[str], bool] = lambda satellite_id: True
+
+
+class ShardUnavailable(RuntimeError):
+    """A shard died or didn't answer within INGEST_TIMEOUT_S."""
+
+
+def set_owner(owns: Callable[[str], bool]):
+    global _owns
+    _owns = owns
+
+
+# ----- operations (run where the state lives) -----
+def _thresholds(satellite_id: str) -> Dict[str, Any]:
+    return {name: learner.describe(satellite_id) for name, learner in LEARNERS.items()}
+
+
+def _export_thresholds() -> Dict[str, Any]:
+    return {name: learner.export_json() for name, learner in LEARNERS.items()}
+
+
+def _import_thresholds(payload: Dict[str, Dict[str, Any]]):
+    for name, data in payload.items():
+        LEARNERS[name].import_json(data, keep=_owns)
+
+
+def _overrides() -> Dict[str, Any]:
+    return {name: learner.overrides() for name, learner in LEARNERS.items()}
+
+
+def _set_override(learner: str, satellite_id: str, channel: str,
+                  low: Optional[float], high: Optional[float]):
+    LEARNERS[learner].set_override(satellite_id, channel, low, high)
+
+
+def _forecast(satellite_id: str) -> Dict[str, Any]:
+    return {name: f.forecast(satellite_id) for name, f in FORECASTERS.items()}
+
+
+def _forecasts(horizon_s: Optional[float], events: int) -> Dict[str, Any]:
+    return {
+        name: {"imminent": f.imminent(horizon_s), "alerts": list(f.events)[::-1][:events]}
+        for name, f in FORECASTERS.items()
+    }
+
+
+def _features(satellite_id: str) -> Optional[Dict[str, Any]]:
+    return FEATURE_STORE.latest(satellite_id)
+
+
+OPERATIONS: Dict[str, Callable[..., Any]] = {
+    "detect": detect_batch,
+    "thresholds": _thresholds,
+    "export_thresholds": _export_thresholds,
+    "import_thresholds": _import_thresholds,
+    "overrides": _overrides,
+    "set_override": _set_override,
+    "forecast": _forecast,
+    "forecasts": _forecasts,
+    "features": _features,
+}
+
+
+# ----- front door -----
+def _wait(fut):
+    try:
+        return fut.result(INGEST_TIMEOUT_S)
+    except FutureTimeout:
+        raise ShardUnavailable("ingest shard did not answer in time")
+    except RuntimeError as e:
+        raise ShardUnavailable(str(e))
+
+
+def on_owner(satellite_id: str, op: str, *args) -> Any:
+    """
+    Run op on the process holding satellite_id's state.
+    """
+    executor = get_executor()
+    if executor is None:
+        return OPERATIONS[op](*args)
+    return _wait(executor.call(shard_for(satellite_id, executor.num_shards), op, *args))
+
+
+def on_all(op: str, *args) -> List[Any]:
+    """
+    Run op on every process holding detector state; one result per shard.
+    """
+    executor = get_executor()
+    if executor is None:
+        return [OPERATIONS[op](*args)]
+    return _wait(executor.broadcast(op, *args))
+
+
+# ----- merging per-shard results -----
+def merge_threshold_exports(exports: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Concatenate the per-satellite rows of each shard's export; the "*"
+    overrides are the same on every shard.
+    """
+    merged = {}
+    for name, first in exports[0].items():
+        merged[name] = dict(first)
+        for key in _THRESHOLD_ROWS:
+            merged[name][key] = [row for export in exports for row in export[name][key]]
+    return merged
+
+
+def merge_overrides(parts: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for part in parts:
+        for name, overrides in part.items():
+            merged.setdefault(name, {}).update(overrides)
+    return merged
+
+
+def merge_forecasts(parts: List[Dict[str, Any]], events: int) -> Dict[str, Any]:
+    merged = {}
+    for name in parts[0]:
+        imminent = [item for part in parts for item in part[name]["imminent"]]
+        alerts = [event for part in parts for event in part[name]["alerts"]]
+        merged[name] = {
+            "imminent": sorted(imminent, key=lambda e: e["breach_at"]),
+            "alerts": sorted(alerts, key=lambda e: e["timestamp"], reverse=True)[:events],
+        }
+    return merged
@@ -0,0 +1,334 @@
+# backend/services/sharding.py
+"""
+Satellite-sharded ingestion workers.
+
+Satellites are mapped onto N worker processes with a jump consistent hash,
+so a satellite always lands on the same worker and its detector state
+(orbit filter state, rolling buffers) lives in exactly one process.
+Each worker has its own FIFO inbox, which keeps per-satellite ordering
+intact, and its own result pipe back to the front door, where results
+resolve the futures it holds. Nothing is shared between workers, so one
+killed mid-write can't leave a lock held that the others need. Besides ingest batches, the front door can run named
+operations on one shard or all of them (see shard_state), which is how the
+API reads and changes detector state that only the workers hold. With a
+snapshot_dir each worker snapshots its own shard under
+<snapshot_dir>/shard-<i>.
+
+The collector also watches the worker processes: when one dies (OOM,
+segfault) the requests it was holding are failed and the shard is
+restarted with a fresh inbox and pipe, restoring from its last snapshot.
+"""
+import itertools
+import multiprocessing as mp
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.logger import logger
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach). Growing num_buckets from N to
+    N+1 only moves ~1/(N+1) of the keys.
+    """
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(satellite_id: str, num_shards: int) -> int:
+    # crc32 is stable across processes, unlike the builtin str hash
+    return jump_hash(zlib.crc32(satellite_id.encode("utf-8")), num_shards)
+
+
+def _restore_shard_state(snapshot_dir: str, shard_id: int, num_shards: int):
+    """
+    Restore detector state from every shard snapshot (the shard count may
+    have changed since they were written), keeping only this shard's
+    satellites. State that isn't per satellite only comes from the shard's
+    own snapshot, which is loaded last so it wins.
+    """
+    from backend.services.snapshot import restore_snapshot
+
+    def own_satellite(satellite_id: str) -> bool:
+        return shard_for(satellite_id, num_shards) == shard_id
+
+    own = Path(snapshot_dir) / f"shard-{shard_id}"
+    for path in sorted(Path(snapshot_dir).glob("shard-*")):
+        if path != own:
+            restore_snapshot(str(path), keep=own_satellite, whole_process=False)
+    restore_snapshot(str(own), keep=own_satellite)
+
+
+def _worker_loop(shard_id: int, num_shards: int, inbox, outbox: Connection,
+                 snapshot_dir: Optional[str] = None, snapshot_interval_s: float = 30.0):
+    # imported here so the spawned process only loads what it needs
+    from backend.services.shard_state import OPERATIONS, set_owner
+
+    set_owner(lambda satellite_id: shard_for(satellite_id, num_shards) == shard_id)
+    writer = None
+    if snapshot_dir:
+        from backend.services.snapshot import SnapshotWriter
+        _restore_shard_state(snapshot_dir, shard_id, num_shards)
+        writer = SnapshotWriter(str(Path(snapshot_dir) / f"shard-{shard_id}"), snapshot_interval_s)
+        writer.start()
+
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        ticket, op, args = item
+        try:
+            result = (ticket, OPERATIONS[op](*args), None)
+        except Exception as e:
+            result = (ticket, None, f"shard {shard_id}: {e!r}")
+        outbox.send(result)
+
+    if writer is not None:
+        writer.stop()
+    outbox.close()
+
+
+class ShardedExecutor:
+    """
+    Front door for the shard workers.
+
+    submit_batch() splits a batch by shard, sends one message per shard and
+    returns a single Future that resolves to the results in input order.
+    call() / broadcast() run a named operation on one / every shard.
+    """
+
+    def __init__(self, num_shards: int, snapshot_dir: Optional[str] = None,
+                 snapshot_interval_s: float = 30.0, check_interval_s: float = 1.0):
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+        self.num_shards = num_shards
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval_s = snapshot_interval_s
+        self.check_interval_s = check_interval_s
+        self._ctx = mp.get_context("spawn")
+        self._inboxes = []
+        self._processes = []
+        # per-shard result pipes; None once a dead worker's pipe hit EOF
+        self._results: List[Optional[Connection]] = []
+        self._wake_r, self._wake_w = None, None
+        self._collector = None
+        # ticket -> (shard, future)
+        self._pending: Dict[int, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        self._tickets = itertools.count()
+        self._stopping = False
+        self.restarts = 0
+
+    def _spawn(self, shard_id: int):
+        inbox = self._ctx.Queue()
+        results, outbox = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_loop,
+            args=(shard_id, self.num_shards, inbox, outbox,
+                  self.snapshot_dir, self.snapshot_interval_s),
+            name=f"ingest-shard-{shard_id}",
+            daemon=True,
+        )
+        proc.start()
+        # only the worker writes; the pipe hits EOF when it exits
+        outbox.close()
+        return inbox, results, proc
+
+    def start(self):
+        self._wake_r, self._wake_w = self._ctx.Pipe(duplex=False)
+        for shard_id in range(self.num_shards):
+            inbox, results, proc = self._spawn(shard_id)
+            self._inboxes.append(inbox)
+            self._results.append(results)
+            self._processes.append(proc)
+
+        self._collector = threading.Thread(target=self._collect, name="ingest-collector", daemon=True)
+        self._collector.start()
+        logger.info(f"Started {self.num_shards} ingest shard workers")
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            self._stopping = True
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for proc in self._processes:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        if self._wake_w is not None:
+            self._wake_w.send(None)
+        if self._collector is not None:
+            self._collector.join(timeout)
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, fut in pending.values():
+            if not fut.done():
+                fut.set_exception(RuntimeError("ingest workers stopped"))
+
+        for conn in self._results:
+            if conn is not None:
+                conn.close()
+        self._inboxes, self._results, self._processes = [], [], []
+        logger.info("Ingest shard workers stopped")
+
+    def _collect(self):
+        next_check = time.monotonic() + self.check_interval_s
+        while True:
+            with self._lock:
+                readers = {conn: shard_id for shard_id, conn in enumerate(self._results) if conn is not None}
+            ready = wait([self._wake_r, *readers], timeout=self.check_interval_s)
+            if self._wake_r in ready:
+                break
+            for conn in ready:
+                try:
+                    self._resolve(conn.recv())
+                except (EOFError, OSError):
+                    # the worker exited; _check_workers restarts it
+                    with self._lock:
+                        if self._results[readers[conn]] is conn:
+                            self._results[readers[conn]] = None
+                    next_check = 0.0
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + self.check_interval_s
+
+    def _resolve(self, item: Tuple[int, Any, Optional[str]]):
+        ticket, results, error = item
+        with self._lock:
+            _, fut = self._pending.pop(ticket, (None, None))
+        if fut is None:
+            return
+        if error is not None:
+            fut.set_exception(RuntimeError(error))
+        else:
+            fut.set_result(results)
+
+    def _check_workers(self):
+        """
+        Fail the requests of dead workers and restart them.
+        """
+        for shard_id, proc in enumerate(list(self._processes)):
+            if proc.is_alive():
+                continue
+            with self._lock:
+                if self._stopping:
+                    return
+                lost = [t for t, (shard, _) in self._pending.items() if shard == shard_id]
+                futures = [self._pending.pop(t)[1] for t in lost]
+                # a fresh inbox: messages queued for the dead worker are dropped with it
+                self._inboxes[shard_id], self._results[shard_id], self._processes[shard_id] = self._spawn(shard_id)
+                self.restarts += 1
+            logger.error(
+                f"Ingest shard {shard_id} died (exit code {proc.exitcode}); "
+                f"failed {len(futures)} pending requests and restarted it"
+            )
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(RuntimeError(f"shard {shard_id} worker died"))
+
+    def _send(self, shard_id: int, op: str, *args) -> Future:
+        fut = Future()
+        ticket = next(self._tickets)
+        with self._lock:
+            self._pending[ticket] = (shard_id, fut)
+            self._inboxes[shard_id].put((ticket, op, args))
+        return fut
+
+    def call(self, shard_id: int, op: str, *args) -> Future:
+        return self._send(shard_id, op, *args)
+
+    def broadcast(self, op: str, *args) -> Future:
+        """
+        Run op on every shard; resolves to the results in shard order, or
+        the first failure.
+        """
+        return self._gather([self._send(shard_id, op, *args) for shard_id in range(self.num_shards)])
+
+    def _gather(self, futures: List[Future]) -> Future:
+        combined = Future()
+        remaining = [len(futures)]
+
+        def _done(_):
+            with self._lock:
+                if combined.done():
+                    return
+                failed = next((f.exception() for f in futures if f.done() and f.exception()), None)
+                if failed is not None:
+                    combined.set_exception(failed)
+                    return
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    combined.set_result([f.result() for f in futures])
+
+        for fut in futures:
+            fut.add_done_callback(_done)
+        return combined
+
+    def submit_batch(self, samples: List[Dict[str, Any]]) -> Future:
+        groups: Dict[int, List[int]] = {}
+        for idx, sample in enumerate(samples):
+            groups.setdefault(shard_for(sample["satellite_id"], self.num_shards), []).append(idx)
+
+        combined = Future()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(samples)
+        remaining = [len(groups)]
+
+        if not groups:
+            combined.set_result([])
+            return combined
+
+        def _done(indexes: List[int], fut: Future):
+            exc = fut.exception()
+            with self._lock:
+                if combined.done():
+                    return
+                if exc is not None:
+                    combined.set_exception(exc)
+                    return
+                for idx, res in zip(indexes, fut.result()):
+                    results[idx] = res
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    combined.set_result(results)
+
+        for shard_id, indexes in groups.items():
+            fut = self._send(shard_id, "detect", [samples[i] for i in indexes])
+            fut.add_done_callback(lambda f, ix=indexes: _done(ix, f))
+
+        return combined
+
+    def submit(self, sample: Dict[str, Any]) -> Future:
+        return self.submit_batch([sample])
+
+
+_EXECUTOR: Optional[ShardedExecutor] = None
+
+
+def start_executor(num_shards: int, snapshot_dir: Optional[str] = None,
+                   snapshot_interval_s: float = 30.0) -> ShardedExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ShardedExecutor(num_shards, snapshot_dir, snapshot_interval_s)
+        _EXECUTOR.start()
+    return _EXECUTOR
+
+
+def get_executor() -> Optional[ShardedExecutor]:
+    return _EXECUTOR
+
+
+def stop_executor():
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.stop()
+        _EXECUTOR = None
@@ -0,0 +1,210 @@
+# backend/services/snapshot.py
+"""
+Detector / state-store snapshots for fast restarts.
+
+Every registered provider exports a dict of NumPy arrays; each array is
+stored as a plain .npy file under <snapshot_dir>/<provider>/v<version>/.
+Restores memory-map the files, so startup cost is proportional to what the
+import function touches, not to a replay of history.
+
+Every save writes a new version directory and only then points
+manifest.json at it (an atomic rename), so a crash mid-save leaves the
+previous snapshot intact. The unit of reuse is a whole array: one that
+is identical to the last version's is hard-linked into the new one, any
+other is rewritten in full, so a change to one satellite's row rewrites
+that provider's array for every satellite. Files are never modified in
+place.
+
+Providers whose arrays are rows per satellite can declare them, so a
+restore can keep only some satellites (see sharding). The others hold
+state of the whole process (e.g. anomaly_stats, owned by the core app
+process) and are only restored from that process's own snapshot.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.logger import logger
+from backend.services.state import export_state, import_state
+
+ExportFn = Callable[[], Dict[str, np.ndarray]]
+ImportFn = Callable[[Dict[str, np.ndarray]], None]
+# id array key -> keys of the arrays whose rows line up with it
+BySatellite = Dict[str, Sequence[str]]
+
+_PROVIDERS: Dict[str, Tuple[ExportFn, ImportFn]] = {}
+_BY_SATELLITE: Dict[str, BySatellite] = {}
+
+
+def register_provider(name: str, export_fn: ExportFn, import_fn: ImportFn,
+                      by_satellite: Optional[BySatellite] = None):
+    """
+    Register a piece of in-memory state to be included in snapshots.
+    by_satellite names the arrays that hold one row per satellite.
+    """
+    _PROVIDERS[name] = (export_fn, import_fn)
+    if by_satellite:
+        _BY_SATELLITE[name] = by_satellite
+
+
+register_provider("state", export_state, import_state, {
+    "orbit_ids": ("orbit_values",),
+    "anomaly_satellites": ("anomaly_timestamps", "anomaly_severities", "anomaly_issues", "anomaly_scores"),
+})
+
+
+def _unchanged(path: Path, arr: np.ndarray) -> bool:
+    try:
+        existing = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return False
+    if existing.shape != arr.shape or existing.dtype != arr.dtype:
+        return False
+    if np.issubdtype(arr.dtype, np.floating):
+        return bool(np.array_equal(existing, arr, equal_nan=True))
+    return bool(np.array_equal(existing, arr))
+
+
+def _write_array(previous: Optional[Path], path: Path, arr: np.ndarray) -> int:
+    """
+    Write arr to path, linking the previous version's file when arr is
+    unchanged. Returns rows written.
+    """
+    if previous is not None and previous.exists() and _unchanged(previous, arr):
+        try:
+            os.link(previous, path)
+        except OSError:
+            shutil.copyfile(previous, path)
+        return 0
+    np.save(path, arr)
+    return int(arr.shape[0]) if arr.ndim else 1
+
+
+def _read_manifest(target: Path) -> Optional[Dict]:
+    try:
+        return json.loads((target / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _version_dir(target: Path, manifest: Dict) -> Path:
+    # snapshots from before versioning kept the arrays next to the manifest
+    version = manifest.get("version")
+    return target if version is None else target / f"v{version}"
+
+
+def save_snapshot(directory: str) -> Dict[str, int]:
+    """
+    Snapshot all registered providers. Returns rows written per provider.
+    """
+    root = Path(directory)
+    written = {}
+    for name, (export_fn, _) in list(_PROVIDERS.items()):
+        target = root / name
+        target.mkdir(parents=True, exist_ok=True)
+        previous = _read_manifest(target)
+        previous_dir = _version_dir(target, previous) if previous else None
+        version = (previous or {}).get("version", 0) + 1
+        version_dir = target / f"v{version}"
+        # leftovers of a save that crashed before its manifest was written
+        shutil.rmtree(version_dir, ignore_errors=True)
+        version_dir.mkdir()
+
+        arrays = export_fn()
+        rows = 0
+        for key, arr in arrays.items():
+            old = previous_dir / f"{key}.npy" if previous_dir is not None else None
+            rows += _write_array(old, version_dir / f"{key}.npy", np.asarray(arr))
+        # the manifest switch is what makes the new version current
+        manifest = {key: list(np.asarray(arr).shape) for key, arr in arrays.items()}
+        tmp = target / "manifest.json.tmp"
+        tmp.write_text(json.dumps({"saved_at": time.time(), "version": version, "arrays": manifest}))
+        os.replace(tmp, target / "manifest.json")
+
+        for path in target.iterdir():
+            if path.is_dir() and path.name.startswith("v") and path != version_dir:
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.suffix == ".npy":
+                path.unlink()
+        written[name] = rows
+    return written
+
+
+def _select(arrays: Dict[str, np.ndarray], by_satellite: BySatellite,
+            keep: Callable[[str], bool]) -> Dict[str, np.ndarray]:
+    arrays = dict(arrays)
+    for id_key, keys in by_satellite.items():
+        mask = np.array([keep(s) for s in arrays[id_key].tolist()], dtype=bool)
+        for key in (id_key, *keys):
+            arrays[key] = arrays[key][mask]
+    return arrays
+
+
+def restore_snapshot(directory: str, keep: Optional[Callable[[str], bool]] = None,
+                     whole_process: bool = True) -> bool:
+    """
+    Load every provider found under directory. Returns True if anything
+    was restored. With keep, per-satellite rows are only restored for the
+    satellite ids it accepts. whole_process=False skips providers that
+    aren't split by satellite, for snapshots written by another process.
+    """
+    root = Path(directory)
+    restored = False
+    for name, (_, import_fn) in list(_PROVIDERS.items()):
+        if not whole_process and name not in _BY_SATELLITE:
+            continue
+        manifest = _read_manifest(root / name)
+        if manifest is None:
+            continue
+        try:
+            source = _version_dir(root / name, manifest)
+            arrays = {}
+            for key, shape in manifest["arrays"].items():
+                arr = np.load(source / f"{key}.npy", mmap_mode="r")
+                if list(arr.shape) != shape:
+                    raise ValueError(f"{key}: shape {arr.shape} != manifest {shape}")
+                arrays[key] = arr
+            if keep is not None and name in _BY_SATELLITE:
+                arrays = _select(arrays, _BY_SATELLITE[name], keep)
+            import_fn(arrays)
+            restored = True
+        except Exception as e:
+            logger.error(f"Snapshot restore failed for {name}: {e}")
+    return restored
+
+
+class SnapshotWriter:
+    """
+    Background thread that snapshots state every interval_s seconds and
+    once more on stop().
+    """
+
+    def __init__(self, directory: str, interval_s: float = 30.0):
+        self.directory = directory
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._save()
+
+    def _save(self):
+        try:
+            save_snapshot(self.directory)
+        except Exception as e:
+            logger.error(f"Snapshot failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._save()
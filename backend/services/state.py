@@ -1,11 +1,78 @@
 # backend/services/state.py
 from collections import deque
+from typing import Dict
+
+import numpy as np
 
 LATEST_ANOMALIES = deque(maxlen=200)
 
+# per-satellite orbit filter state (prev_state for orbit_kalman.detect)
+ORBIT_STATES: Dict[str, Dict[str, float]] = {}
+
 def add_anomaly_record(record: dict):
     LATEST_ANOMALIES.append(record)
 
 def get_latest_anomalies():
     # newest first
     return list(LATEST_ANOMALIES)[::-1]
+
+def get_orbit_state(satellite_id: str) -> Dict[str, float]:
+    return ORBIT_STATES.get(satellite_id, {})
+
+def set_orbit_state(satellite_id: str, state: Dict[str, float]):
+    ORBIT_STATES[satellite_id] = state
+
+
+# ----- snapshot export / import -----
+ORBIT_KEYS = ("orbit_altitude_km", "orbit_inclination_deg")
+
+def export_state() -> Dict[str, np.ndarray]:
+    """
+    Flatten the in-memory state into fixed-width NumPy arrays so it can be
+    written as (and memory-mapped back from) .npy files.
+    """
+    orbit_items = list(ORBIT_STATES.items())
+    orbit_values = np.full((len(orbit_items), len(ORBIT_KEYS)), np.nan)
+    for i, (_, st) in enumerate(orbit_items):
+        for j, key in enumerate(ORBIT_KEYS):
+            if st.get(key) is not None:
+                orbit_values[i, j] = st[key]
+
+    records = list(LATEST_ANOMALIES)
+    anomalies = [r.get("anomaly", {}) for r in records]
+    return {
+        "orbit_ids": np.array([sat_id for sat_id, _ in orbit_items], dtype=str),
+        "orbit_values": orbit_values,
+        "anomaly_timestamps": np.array([str(r.get("timestamp")) for r in records], dtype=str),
+        "anomaly_satellites": np.array([r.get("satellite_id") for r in records], dtype=str),
+        "anomaly_severities": np.array([a.get("severity", "normal") for a in anomalies], dtype=str),
+        "anomaly_issues": np.array([",".join(a.get("issues", [])) for a in anomalies], dtype=str),
+        "anomaly_scores": np.array([float(a.get("score", 0.0)) for a in anomalies], dtype=float),
+    }
+
+def import_state(arrays: Dict[str, np.ndarray]):
+    """
+    Merge arrays produced by export_state back into the in-memory state.
+    """
+    values = arrays["orbit_values"]
+    for sat_id, row in zip(arrays["orbit_ids"].tolist(), values):
+        ORBIT_STATES[sat_id] = {
+            key: float(v) for key, v in zip(ORBIT_KEYS, row.tolist()) if not np.isnan(v)
+        }
+
+    for ts, sat_id, sev, issues, score in zip(
+        arrays["anomaly_timestamps"].tolist(),
+        arrays["anomaly_satellites"].tolist(),
+        arrays["anomaly_severities"].tolist(),
+        arrays["anomaly_issues"].tolist(),
+        arrays["anomaly_scores"].tolist(),
+    ):
+        LATEST_ANOMALIES.append({
+            "timestamp": ts,
+            "satellite_id": sat_id,
+            "anomaly": {
+                "severity": sev,
+                "issues": issues.split(",") if issues else [],
+                "score": score,
+            },
+        })
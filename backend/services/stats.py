@@ -0,0 +1,219 @@
+# backend/services/stats.py
+"""
+Incrementally maintained anomaly statistics.
+
+Ingestion calls record_anomaly() / set_online(), both O(1), and the stats
+endpoint reads summary() instead of running COUNT/AVG queries.
+
+Anomaly rows are episodes (see episodes.py) whose severity and score rise
+to the episode's peak while it is open, so the counters hold every row's
+current values, the same thing a GROUP BY over the table returns: ingest
+records each episode when it opens, again when its peak changes (replacing
+its earlier contribution) and when it closes. The contributions of open
+episodes are kept by id.
+
+Counters are included in state snapshots together with the highest anomaly
+id they have seen and the open episodes, so on startup only rows newer than
+that id, and the episodes that were still open, are read from the DB (or
+everything, if there is no usable snapshot). Owned by the core app process;
+the counters aren't per satellite, so shard restores don't touch them.
+"""
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, func, or_, type_coerce
+from sqlalchemy.orm import Session
+
+from backend.services.snapshot import register_provider
+
+KEEP_DAYS = 31
+
+# (day, severity, score) an anomaly row adds to the counters
+Contribution = Tuple[date, str, float]
+
+
+class AnomalyStats:
+
+    def __init__(self, keep_days: int = KEEP_DAYS):
+        self.keep_days = keep_days
+        # day -> severity -> count, day -> score sum
+        self._counts: Dict[date, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._score_sums: Dict[date, float] = defaultdict(float)
+        self._online = set()
+        # anomaly id -> contribution, for episodes that may still change
+        self._open: Dict[int, Contribution] = {}
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    # ----- ingest side -----
+    def record_anomaly(self, timestamp: Optional[datetime], severity: str, score: float,
+                       anomaly_id: Optional[int] = None, ended: bool = True):
+        """
+        Record a new anomaly row, or the current severity / score of one
+        recorded before (an episode whose peak changed). ended=False keeps
+        it replaceable.
+        """
+        contribution = ((timestamp or datetime.utcnow()).date(), severity, float(score or 0.0))
+        with self._lock:
+            if contribution[0] not in self._counts:
+                # first anomaly of a new day: drop days past keep_days
+                self._prune_locked(contribution[0])
+            previous = self._open.pop(anomaly_id, None) if anomaly_id is not None else None
+            if previous is not None:
+                self._add_locked(previous, -1)
+            elif anomaly_id is not None and anomaly_id <= self.last_id:
+                # already counted and closed, or pruned
+                return
+            self._add_locked(contribution, 1)
+            if anomaly_id is not None:
+                if not ended:
+                    self._open[anomaly_id] = contribution
+                self.last_id = max(self.last_id, anomaly_id)
+
+    def set_online(self, satellite_id: str, online: bool = True):
+        with self._lock:
+            if online:
+                self._online.add(satellite_id)
+            else:
+                self._online.discard(satellite_id)
+
+    # ----- read side -----
+    def summary(self, day: Optional[date] = None) -> Dict[str, object]:
+        day = day or datetime.utcnow().date()
+        with self._lock:
+            counts = self._counts.get(day, {})
+            total = sum(counts.values())
+            score_sum = self._score_sums.get(day, 0.0)
+            online = len(self._online)
+        return {
+            "total_anomalies_today": total,
+            "critical_anomalies": counts.get("critical", 0),
+            "average_score": round(score_sum / total, 2) if total else 0.0,
+            "online_satellites": online,
+        }
+
+    def _add_locked(self, contribution: Contribution, sign: int):
+        day, severity, score = contribution
+        self._counts[day][severity] += sign
+        self._score_sums[day] += sign * score
+
+    def _prune_locked(self, today: date):
+        cutoff = today - timedelta(days=self.keep_days)
+        for day in [d for d in self._counts if d < cutoff]:
+            del self._counts[day]
+            self._score_sums.pop(day, None)
+        self._open = {k: c for k, c in self._open.items() if c[0] >= cutoff}
+
+    # ----- rebuild from DB -----
+    def catch_up(self, db: Session, anomaly_model, satellite_model):
+        """
+        Aggregate anomaly rows newer than last_id (one GROUP BY query),
+        replace the contributions of episodes that were open with their
+        current values, and reload the online set. Falls back to a full
+        rebuild when the table has fewer ids than the counters have seen
+        (e.g. the DB was reset).
+        """
+        max_id = db.query(func.max(anomaly_model.id)).scalar() or 0
+        if max_id < self.last_id:
+            self.reset()
+        with self._lock:
+            last_id, stale = self.last_id, dict(self._open)
+
+        since = datetime.combine(datetime.utcnow().date() - timedelta(days=self.keep_days), datetime.min.time())
+        # timestamps are stored as epoch milliseconds
+        day_of = func.date(type_coerce(anomaly_model.timestamp, BigInteger) / 1000, "unixepoch")
+        rows = (
+            db.query(
+                day_of,
+                anomaly_model.severity,
+                func.count(anomaly_model.id),
+                func.sum(anomaly_model.score),
+            )
+            .filter(anomaly_model.id > last_id, anomaly_model.timestamp >= since)
+            .group_by(day_of, anomaly_model.severity)
+            .all()
+        )
+        # episodes open now, and the ones open at the snapshot (they may have changed since)
+        current = (
+            db.query(anomaly_model.id, anomaly_model.timestamp, anomaly_model.severity,
+                     anomaly_model.score, anomaly_model.ended_at)
+            .filter(anomaly_model.timestamp >= since,
+                    or_(anomaly_model.ended_at.is_(None), anomaly_model.id.in_(list(stale))))
+            .all()
+        )
+        online = [
+            r[0] for r in db.query(satellite_model.satellite_id)
+            .filter(satellite_model.is_online == True)
+            .all()
+        ]
+
+        with self._lock:
+            for contribution in stale.values():
+                self._add_locked(contribution, -1)
+            for day, severity, count, score_sum in rows:
+                day = day if isinstance(day, date) else date.fromisoformat(str(day))
+                self._counts[day][severity] += int(count)
+                self._score_sums[day] += float(score_sum or 0.0)
+            self._open = {}
+            for anomaly_id, timestamp, severity, score, ended_at in current:
+                contribution = (timestamp.date(), severity, float(score or 0.0))
+                if anomaly_id in stale:
+                    self._add_locked(contribution, 1)
+                if ended_at is None:
+                    self._open[anomaly_id] = contribution
+            self._online = set(online)
+            self.last_id = max(self.last_id, max_id)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._score_sums.clear()
+            self._online = set()
+            self._open = {}
+            self.last_id = 0
+
+    # ----- snapshot provider -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            keys = [(d, sev, n) for d, per_sev in self._counts.items() for sev, n in per_sev.items()]
+            days = sorted(self._score_sums)
+            open_ids = sorted(self._open)
+            return {
+                "count_days": np.array([d.isoformat() for d, _, _ in keys], dtype=str),
+                "count_severities": np.array([sev for _, sev, _ in keys], dtype=str),
+                "counts": np.array([n for _, _, n in keys], dtype=np.int64),
+                "sum_days": np.array([d.isoformat() for d in days], dtype=str),
+                "score_sums": np.array([self._score_sums[d] for d in days], dtype=float),
+                "last_id": np.array([self.last_id], dtype=np.int64),
+                "open_ids": np.array(open_ids, dtype=np.int64),
+                "open_days": np.array([self._open[i][0].isoformat() for i in open_ids], dtype=str),
+                "open_severities": np.array([self._open[i][1] for i in open_ids], dtype=str),
+                "open_scores": np.array([self._open[i][2] for i in open_ids], dtype=float),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        # older snapshots don't list open episodes: rebuild everything instead
+        if "open_ids" not in arrays:
+            return
+        with self._lock:
+            self._counts.clear()
+            self._score_sums.clear()
+            for d, sev, n in zip(arrays["count_days"].tolist(), arrays["count_severities"].tolist(),
+                                 arrays["counts"].tolist()):
+                self._counts[date.fromisoformat(d)][sev] = int(n)
+            for d, s in zip(arrays["sum_days"].tolist(), arrays["score_sums"].tolist()):
+                self._score_sums[date.fromisoformat(d)] = float(s)
+            self._open = {
+                int(i): (date.fromisoformat(d), sev, float(score))
+                for i, d, sev, score in zip(arrays["open_ids"].tolist(), arrays["open_days"].tolist(),
+                                            arrays["open_severities"].tolist(), arrays["open_scores"].tolist())
+            }
+            self.last_id = int(arrays["last_id"][0])
+
+
+ANOMALY_STATS = AnomalyStats()
+
+register_provider("anomaly_stats", ANOMALY_STATS.export_arrays, ANOMALY_STATS.import_arrays)
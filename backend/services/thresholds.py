@@ -0,0 +1,295 @@
+# backend/services/thresholds.py
+"""
+Per-satellite adaptive thresholds.
+
+For every satellite and channel, P² sketches track the 1st, 50th and 99th
+percentile of the satellite's own history in constant memory. Limits are
+derived from them as q99 + margin * (q99 - q50) and q01 - margin * (q50 - q01),
+so looking up a limit is O(1) and never touches the history. Until a
+channel has min_samples observations its static default is used.
+
+Overrides (per satellite, or "*" for every satellite) take precedence over
+learned limits. Learned state and overrides can be exported/imported as
+JSON and are included in state snapshots.
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.config import THRESHOLD_MARGIN, THRESHOLD_MIN_SAMPLES
+from backend.services.preprocess import FEATURE_FIELDS
+from backend.services.snapshot import register_provider
+from backend.utils.helpers import occurrence_rounds
+from backend.utils.thresholds import p2_increments, p2_initial_positions, p2_update
+
+QUANTILES = (0.01, 0.5, 0.99)
+ALL_SATELLITES = "*"
+
+
+class ThresholdLearner:
+
+    def __init__(self, channels: Sequence[str], default_low: Optional[Dict[str, float]] = None,
+                 default_high: Optional[Dict[str, float]] = None, margin: float = 1.0,
+                 min_samples: int = 200):
+        self.channels = tuple(channels)
+        self._col = {c: j for j, c in enumerate(self.channels)}
+        self.margin = margin
+        self.min_samples = min_samples
+        self.default_low = self._vector(default_low or {}, -np.inf)
+        self.default_high = self._vector(default_high or {}, np.inf)
+        self._dn = p2_increments(QUANTILES)
+        self._np0 = p2_initial_positions(QUANTILES)
+
+        c, k = len(self.channels), len(QUANTILES)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._q = np.zeros((0, c, k, 5))
+        self._n = np.zeros((0, c, k, 5))
+        self._np = np.zeros((0, c, k, 5))
+        self._count = np.zeros((0, c), dtype=np.int64)
+        # NaN = no override
+        self._ov_low = np.zeros((0, c))
+        self._ov_high = np.zeros((0, c))
+        self._global_low = np.full(c, np.nan)
+        self._global_high = np.full(c, np.nan)
+        self._lock = threading.Lock()
+
+    def _vector(self, values: Dict[str, float], fill: float) -> np.ndarray:
+        out = np.full(len(self.channels), fill)
+        for name, value in values.items():
+            out[self._col[name]] = value
+        return out
+
+    def _row(self, satellite_id: str) -> int:
+        row = self._rows.get(satellite_id)
+        if row is not None:
+            return row
+        row = len(self._ids)
+        if row == len(self._q):
+            grow = max(16, len(self._q))
+            self._q = np.concatenate([self._q, np.zeros((grow,) + self._q.shape[1:])])
+            self._n = np.concatenate([self._n, np.zeros((grow,) + self._n.shape[1:])])
+            self._np = np.concatenate([self._np, np.zeros((grow,) + self._np.shape[1:])])
+            self._count = np.concatenate([self._count, np.zeros((grow,) + self._count.shape[1:], dtype=np.int64)])
+            self._ov_low = np.concatenate([self._ov_low, np.full((grow,) + self._ov_low.shape[1:], np.nan)])
+            self._ov_high = np.concatenate([self._ov_high, np.full((grow,) + self._ov_high.shape[1:], np.nan)])
+        self._rows[satellite_id] = row
+        self._ids.append(satellite_id)
+        return row
+
+    # ----- learning -----
+    def update(self, satellite_ids: Sequence[str], values: np.ndarray):
+        """
+        Feed observations (n, channels); NaN entries are skipped. Values
+        outside the limits are learned too: the tracked quantiles only move
+        once a percent or so of samples lie beyond them, so isolated
+        anomalies barely widen the limits while a lasting shift in level is
+        picked up. Repeated satellites in one batch are applied in order.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        with self._lock:
+            rows = np.array([self._row(s) for s in satellite_ids], dtype=np.int64)
+            for idx in occurrence_rounds(rows):
+                self._update_round(rows[idx], values[idx])
+
+    def _update_round(self, rows: np.ndarray, x: np.ndarray):
+        count = self._count[rows]
+        valid = ~np.isnan(x)
+
+        # first 5 observations fill the markers directly
+        warm_r, warm_c = np.nonzero(valid & (count < 5))
+        if len(warm_r):
+            r, c = rows[warm_r], warm_c
+            self._q[r, c, :, self._count[r, c]] = x[warm_r, warm_c][:, None]
+            self._count[r, c] += 1
+            done = self._count[r, c] == 5
+            r, c = r[done], c[done]
+            self._q[r, c] = np.sort(self._q[r, c], axis=-1)
+            self._n[r, c] = np.arange(5.0)
+            self._np[r, c] = self._np0
+
+        live_r, live_c = np.nonzero(valid & (count >= 5))
+        if len(live_r):
+            r, c = rows[live_r], live_c
+            q, n, np_ = self._q[r, c], self._n[r, c], self._np[r, c]
+            p2_update(q, n, np_, self._dn, x[live_r, live_c])
+            self._q[r, c], self._n[r, c], self._np[r, c] = q, n, np_
+            self._count[r, c] += 1
+
+    # ----- queries -----
+    def limits(self, satellite_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (low, high) limits, each (n, channels), for a batch of satellites.
+        """
+        n = len(satellite_ids)
+        low = np.tile(self.default_low, (n, 1))
+        high = np.tile(self.default_high, (n, 1))
+        with self._lock:
+            known = [(i, self._rows[s]) for i, s in enumerate(satellite_ids) if s in self._rows]
+            if known:
+                idx, rows = (np.array(v) for v in zip(*known))
+                q = self._q[rows, :, :, 2]                                   # (m, C, K)
+                ready = self._count[rows] >= self.min_samples
+                learned_low = q[..., 0] - self.margin * (q[..., 1] - q[..., 0])
+                learned_high = q[..., 2] + self.margin * (q[..., 2] - q[..., 1])
+                low[idx] = np.where(ready, learned_low, low[idx])
+                high[idx] = np.where(ready, learned_high, high[idx])
+            low = np.where(np.isnan(self._global_low), low, self._global_low)
+            high = np.where(np.isnan(self._global_high), high, self._global_high)
+            if known:
+                ov_low, ov_high = self._ov_low[rows], self._ov_high[rows]
+                low[idx] = np.where(np.isnan(ov_low), low[idx], ov_low)
+                high[idx] = np.where(np.isnan(ov_high), high[idx], ov_high)
+        return low, high
+
+    def threshold(self, satellite_id: str, channel: str) -> Tuple[float, float]:
+        low, high = self.limits([satellite_id])
+        j = self._col[channel]
+        return float(low[0, j]), float(high[0, j])
+
+    def describe(self, satellite_id: str) -> Dict[str, Dict[str, Any]]:
+        low, high = self.limits([satellite_id])
+        with self._lock:
+            row = self._rows.get(satellite_id)
+            counts = self._count[row] if row is not None else np.zeros(len(self.channels), dtype=np.int64)
+        return {
+            c: {
+                "low": None if np.isinf(low[0, j]) else float(low[0, j]),
+                "high": None if np.isinf(high[0, j]) else float(high[0, j]),
+                "samples": int(counts[j]),
+                "learned": bool(counts[j] >= self.min_samples),
+            }
+            for j, c in enumerate(self.channels)
+        }
+
+    # ----- overrides -----
+    def set_override(self, satellite_id: str, channel: str,
+                     low: Optional[float] = None, high: Optional[float] = None):
+        """
+        Pin a channel's limits (None clears that side). satellite_id "*"
+        applies to every satellite without its own override.
+        """
+        j = self._col[channel]
+        low = np.nan if low is None else float(low)
+        high = np.nan if high is None else float(high)
+        with self._lock:
+            if satellite_id == ALL_SATELLITES:
+                self._global_low[j], self._global_high[j] = low, high
+            else:
+                row = self._row(satellite_id)
+                self._ov_low[row, j], self._ov_high[row, j] = low, high
+
+    def overrides(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        def pack(low, high):
+            return {
+                c: {"low": None if np.isnan(low[j]) else float(low[j]),
+                    "high": None if np.isnan(high[j]) else float(high[j])}
+                for j, c in enumerate(self.channels)
+                if not (np.isnan(low[j]) and np.isnan(high[j]))
+            }
+        with self._lock:
+            out = {ALL_SATELLITES: pack(self._global_low, self._global_high)}
+            for sat_id, row in self._rows.items():
+                out[sat_id] = pack(self._ov_low[row], self._ov_high[row])
+        return {k: v for k, v in out.items() if v}
+
+    # ----- export / import -----
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            s = len(self._ids)
+            return {
+                "satellite_ids": np.array(self._ids, dtype=str),
+                "markers": self._q[:s].copy(),
+                "positions": self._n[:s].copy(),
+                "desired": self._np[:s].copy(),
+                "counts": self._count[:s].copy(),
+                "override_low": self._ov_low[:s].copy(),
+                "override_high": self._ov_high[:s].copy(),
+                "global_low": self._global_low.copy(),
+                "global_high": self._global_high.copy(),
+            }
+
+    def import_arrays(self, arrays: Dict[str, np.ndarray]):
+        with self._lock:
+            for i, sat_id in enumerate(arrays["satellite_ids"].tolist()):
+                row = self._row(sat_id)
+                self._q[row] = arrays["markers"][i]
+                self._n[row] = arrays["positions"][i]
+                self._np[row] = arrays["desired"][i]
+                self._count[row] = arrays["counts"][i]
+                self._ov_low[row] = arrays["override_low"][i]
+                self._ov_high[row] = arrays["override_high"][i]
+            self._global_low = np.array(arrays["global_low"], dtype=float)
+            self._global_high = np.array(arrays["global_high"], dtype=float)
+
+    def export_json(self) -> Dict[str, Any]:
+        arrays = self.export_arrays()
+        return {
+            "channels": list(self.channels),
+            "quantiles": list(QUANTILES),
+            # NaN (unset overrides) is not valid JSON; import_json reads None back as NaN
+            **{k: (v.tolist() if v.dtype.kind != "f" else np.where(np.isnan(v), None, v).tolist())
+               for k, v in arrays.items()},
+        }
+
+    def import_json(self, data: Dict[str, Any], keep: Optional[Callable[[str], bool]] = None):
+        """
+        Load an export_json() payload; with keep, only the satellites it
+        accepts (the "*" overrides always).
+        """
+        if list(data.get("channels", [])) != list(self.channels):
+            raise ValueError("threshold export has different channels")
+        arrays = {k: np.array(v, dtype=float) for k, v in data.items()
+                  if k not in ("channels", "quantiles", "satellite_ids")}
+        arrays["satellite_ids"] = np.array(data["satellite_ids"], dtype=str)
+        arrays["counts"] = arrays["counts"].astype(np.int64)
+        s, c, k = len(arrays["satellite_ids"]), len(self.channels), len(QUANTILES)
+        for name in ("markers", "positions", "desired"):
+            arrays[name] = arrays[name].reshape(s, c, k, 5)
+        for name in ("counts", "override_low", "override_high"):
+            arrays[name] = arrays[name].reshape(s, c)
+        if keep is not None:
+            mask = np.array([keep(sat_id) for sat_id in arrays["satellite_ids"].tolist()], dtype=bool)
+            for name in _BY_SATELLITE["satellite_ids"] + ("satellite_ids",):
+                arrays[name] = arrays[name][mask]
+        self.import_arrays(arrays)
+
+
+# Checked feature columns of the telemetry pipeline; defaults are the old fixed limits
+FEATURE_CHANNELS = ("temp_payload", "temp_battery", "comms_packet_loss")
+FEATURE_COLUMNS = [FEATURE_FIELDS.index(c) for c in FEATURE_CHANNELS]
+
+FEATURE_THRESHOLDS = ThresholdLearner(
+    FEATURE_CHANNELS,
+    default_high={"temp_payload": 70.0, "temp_battery": 60.0, "comms_packet_loss": 0.2},
+    min_samples=THRESHOLD_MIN_SAMPLES,
+    margin=THRESHOLD_MARGIN,
+)
+
+# Channels of the core ingest API (core/schemas.TelemetrySchema)
+CORE_THRESHOLDS = ThresholdLearner(
+    ("temperature", "packet_loss", "battery_voltage", "rssi"),
+    default_low={"temperature": -20.0, "battery_voltage": 20.0, "rssi": -100.0},
+    default_high={"temperature": 70.0, "packet_loss": 10.0},
+    min_samples=THRESHOLD_MIN_SAMPLES,
+    margin=THRESHOLD_MARGIN,
+)
+
+LEARNERS = {"features": FEATURE_THRESHOLDS, "core": CORE_THRESHOLDS}
+
+
+def feature_limits(satellite_ids: Sequence[str]) -> np.ndarray:
+    """
+    Upper limits (n, len(FEATURE_FIELDS)) for compute_anomaly_batch;
+    unchecked columns are +inf.
+    """
+    _, high = FEATURE_THRESHOLDS.limits(satellite_ids)
+    upper = np.full((len(satellite_ids), len(FEATURE_FIELDS)), np.inf)
+    upper[:, FEATURE_COLUMNS] = high
+    return upper
+
+
+_BY_SATELLITE = {"satellite_ids": ("markers", "positions", "desired", "counts", "override_low", "override_high")}
+register_provider("thresholds", FEATURE_THRESHOLDS.export_arrays, FEATURE_THRESHOLDS.import_arrays, _BY_SATELLITE)
+register_provider("core_thresholds", CORE_THRESHOLDS.export_arrays, CORE_THRESHOLDS.import_arrays, _BY_SATELLITE)
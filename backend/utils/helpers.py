@@ -0,0 +1,68 @@
+# backend/utils/helpers.py
+import base64
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    Opaque page cursor for keyset pagination on (timestamp, id).
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_list(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Comma separated filter values; None when not given.
+    """
+    if not value:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()] or None
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    Parse a comma separated fields= projection. No value means all fields.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return requested
+
+
+
+def occurrence_rounds(keys: np.ndarray) -> List[np.ndarray]:
+    """
+    Split a batch into rounds with unique keys: round k holds the indices of
+    the k-th occurrence of every key, in batch order. Lets per-key state be
+    advanced with one vectorized step per round.
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return []
+    order = np.argsort(keys, kind="stable")
+    first = np.r_[0, np.flatnonzero(np.diff(keys[order])) + 1]
+    occurrence = np.empty(len(keys), dtype=np.int64)
+    occurrence[order] = np.arange(len(keys)) - np.repeat(first, np.diff(np.r_[first, len(keys)]))
+    return [np.flatnonzero(occurrence == k) for k in range(int(occurrence.max()) + 1)]
@@ -0,0 +1,67 @@
+# backend/utils/spatial.py
+"""
+Fixed-radius neighbour search by uniform grid hashing, vectorized.
+
+Points are binned into cubic cells of side `radius` and the cells are
+sorted by key, so every pair closer than radius lies in the same or an
+adjacent cell. Each point looks up its own cell and the 13 "forward"
+neighbour cells (half of the 26, so each unordered pair is found once)
+with binary searches over the sorted keys. The cost is O(n log n) plus
+the number of candidate pairs, instead of n² distance checks.
+"""
+import itertools
+from typing import Tuple
+
+import numpy as np
+
+# offsets (dx, dy, dz) > (0, 0, 0) lexicographically: one of each +-pair
+_FORWARD = np.array([d for d in itertools.product((-1, 0, 1), repeat=3) if d > (0, 0, 0)], dtype=np.int64)
+
+
+def _expand(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (owner, position) for every position in the ranges [lo[k], hi[k]).
+    """
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(lo)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, lo[owner] + np.arange(counts.sum()) - starts[owner]
+
+
+def grid_pairs(points: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (i, j), i != j, each unordered pair once, of points
+    (n, d <= 3) closer than radius.
+    """
+    points = np.asarray(points, dtype=float)
+    empty = np.zeros(0, dtype=np.int64)
+    if len(points) < 2 or radius <= 0:
+        return empty, empty
+    points = np.pad(points, ((0, 0), (0, 3 - points.shape[1])))
+
+    # +1 so that neighbour offsets never wrap into another row of cells
+    cells = np.floor(points / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    size = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * size[1] + cells[:, 1]) * size[2] + cells[:, 2]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    first, second = [], []
+    for offset in np.vstack([np.zeros((1, 3), dtype=np.int64), _FORWARD]):
+        # searched in key order: sorted needles make the binary searches cheap
+        target = sorted_keys + (offset[0] * size[1] + offset[1]) * size[2] + offset[2]
+        lo = np.searchsorted(sorted_keys, target, side="left")
+        hi = np.searchsorted(sorted_keys, target, side="right")
+        k, pos = _expand(lo, hi)
+        i, j = order[k], order[pos]
+        if not offset.any():
+            # same cell: both orders come up, and the point itself
+            keep = i < j
+            i, j = i[keep], j[keep]
+        first.append(i)
+        second.append(j)
+
+    i, j = np.concatenate(first), np.concatenate(second)
+    close = np.einsum("ij,ij->i", points[i] - points[j], points[i] - points[j]) < radius * radius
+    return i[close], j[close]
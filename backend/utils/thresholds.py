@@ -0,0 +1,62 @@
+# backend/utils/thresholds.py
+"""
+P² streaming quantile estimation (Jain & Chlamtac), vectorized.
+
+Each estimator keeps 5 markers (heights q, positions n, desired positions
+np_), so memory is constant per stream. p2_update advances M independent
+streams, each tracking K quantiles, by one observation each.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def p2_increments(quantiles: Sequence[float]) -> np.ndarray:
+    """
+    (K, 5) desired-position increments per observation.
+    """
+    p = np.asarray(quantiles, dtype=float)[:, None]
+    return np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+
+
+def p2_initial_positions(quantiles: Sequence[float]) -> np.ndarray:
+    """
+    (K, 5) desired marker positions after the first 5 observations.
+    """
+    p = np.asarray(quantiles, dtype=float)[:, None]
+    return np.hstack([np.zeros_like(p), 2 * p, 4 * p, 2 + 2 * p, np.full_like(p, 4.0)])
+
+
+def p2_update(q: np.ndarray, n: np.ndarray, np_: np.ndarray, dn: np.ndarray, x: np.ndarray):
+    """
+    In-place update of initialized estimators q, n, np_ (M, K, 5) with
+    observations x (M,).
+    """
+    x = x[:, None]
+    # cell of x; extend the extreme markers when it falls outside
+    k = np.clip(np.sum(x[..., None] >= q[..., 1:4], axis=-1), 0, 3)
+    q[..., 0] = np.minimum(q[..., 0], x)
+    q[..., 4] = np.maximum(q[..., 4], x)
+    n += np.arange(5) > k[..., None]
+    np_ += dn
+
+    for i in (1, 2, 3):
+        d = np_[..., i] - n[..., i]
+        gap_up = n[..., i + 1] - n[..., i]
+        gap_down = n[..., i - 1] - n[..., i]
+        move = ((d >= 1) & (gap_up > 1)) | ((d <= -1) & (gap_down < -1))
+        if not move.any():
+            continue
+        s = np.sign(d)
+        neighbour_q = np.where(s > 0, q[..., i + 1], q[..., i - 1])
+        neighbour_n = np.where(s > 0, n[..., i + 1], n[..., i - 1])
+        # rows that don't move may divide by zero; their results are discarded
+        with np.errstate(invalid="ignore", divide="ignore"):
+            parabolic = q[..., i] + s / (n[..., i + 1] - n[..., i - 1]) * (
+                (n[..., i] - n[..., i - 1] + s) * (q[..., i + 1] - q[..., i]) / gap_up
+                + (n[..., i + 1] - n[..., i] - s) * (q[..., i] - q[..., i - 1]) / -gap_down
+            )
+            linear = q[..., i] + s * (neighbour_q - q[..., i]) / (neighbour_n - n[..., i])
+        ok = (q[..., i - 1] < parabolic) & (parabolic < q[..., i + 1])
+        q[..., i] = np.where(move, np.where(ok, parabolic, linear), q[..., i])
+        n[..., i] += np.where(move, s, 0.0)
@@ -0,0 +1 @@
+# Lets the tests import the `backend` package from the repository root.
@@ -1,9 +1,20 @@
 # simulator/orbit_sim.py
 import math
+import sys
 from dataclasses import dataclass
-from typing import Dict
+from pathlib import Path
+from typing import Dict, List, Sequence
 from datetime import datetime, timezone
 
+import numpy as np
+
+# Add project root to path to allow backend.* imports
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from backend.models.propagation import circular_elements, propagate
+
 
 @dataclass
 class OrbitParams:
@@ -11,6 +22,8 @@ class OrbitParams:
     radius_km: float = 7000.0
     inclination_deg: float = 0.0
     period_minutes: float = 90.0
+    raan_deg: float = 0.0
+    phase_deg: float = 0.0
 
 
 class OrbitSimulator:
@@ -44,3 +57,47 @@ class OrbitSimulator:
             "position_y": y,
             "position_z": z,
         }
+
+
+class FleetOrbitSimulator:
+    """
+    Orbit simulator for many satellites at once, backed by the vectorized
+    two-body + J2 propagator. radius_km is used as the orbit radius and the
+    period follows from it (period_minutes is ignored).
+    """
+
+    def __init__(self, params: Sequence[OrbitParams], j2: bool = True):
+        self.params = list(params)
+        self.j2 = j2
+        self.elements = circular_elements(
+            [p.radius_km for p in self.params],
+            [p.inclination_deg for p in self.params],
+            [p.raan_deg for p in self.params],
+            [p.phase_deg for p in self.params],
+        )
+        self.t = 0.0
+
+    def trajectory(self, times: np.ndarray):
+        """
+        Positions and velocities (n_sats, len(times), 3) at the given
+        seconds since the simulator started.
+        """
+        return propagate(self.elements, times, self.j2)
+
+    def step(self, dt_seconds: float = 10.0) -> List[Dict]:
+        self.t += dt_seconds
+        r, v = self.trajectory([self.t])
+        now = datetime.now(timezone.utc).isoformat()
+        return [
+            {
+                "timestamp": now,
+                "satellite_id": p.satellite_id,
+                "position_x": float(r[k, 0, 0]),
+                "position_y": float(r[k, 0, 1]),
+                "position_z": float(r[k, 0, 2]),
+                "velocity_x": float(v[k, 0, 0]),
+                "velocity_y": float(v[k, 0, 1]),
+                "velocity_z": float(v[k, 0, 2]),
+            }
+            for k, p in enumerate(self.params)
+        ]
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """
+    Scratch SQLite engine that the compact dictionaries and the issue index
+    use instead of the demo database, with empty dictionary caches.
+    """
+    from sqlalchemy import create_engine
+
+    from backend.core import compact, issue_index
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(compact, "engine", engine)
+    monkeypatch.setattr(issue_index, "engine", engine)
+    for dictionary in (compact.SATELLITES, compact.ISSUES):
+        monkeypatch.setattr(dictionary, "_keys", {})
+        monkeypatch.setattr(dictionary, "_names", {})
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """
+    Session on the scratch database with the compact schema.
+    """
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.core import issue_index
+    from backend.core.database import Base
+    from backend.core import models  # noqa: F401  registers the tables
+
+    Base.metadata.create_all(bind=engine)
+    issue_index.ensure_issue_indexes()
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
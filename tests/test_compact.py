@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+
+def test_legacy_rows_migrate_with_one_code_per_issue(engine):
+    from sqlalchemy.orm import Session
+
+    from backend.core import issue_index
+    from backend.core.compact import ISSUES, migrate_legacy_tables
+    from backend.core.database import Base
+    from backend.core.models import Anomaly, AnomalyIssue
+    from backend.core.pagination import keyset_page
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE anomalies (id INTEGER PRIMARY KEY, satellite_id VARCHAR, severity VARCHAR, "
+            "issue VARCHAR, score FLOAT, timestamp DATETIME)"
+        ))
+        # the pre-compact ingest joined issues with ", "
+        conn.execute(text("INSERT INTO anomalies VALUES (1, 'SAT-01', 'critical', "
+                          "'High Temperature, Low Battery', 0.9, '2026-01-01 00:00:00')"))
+        conn.execute(text("INSERT INTO anomalies VALUES (2, 'SAT-02', 'warning', "
+                          "'Low Battery', 0.4, '2026-01-01 00:01:00')"))
+
+    Base.metadata.create_all(bind=engine)
+    migrate_legacy_tables(Base.metadata)
+    issue_index.ensure_issue_indexes()
+
+    with engine.connect() as conn:
+        codes = conn.execute(text("SELECT issue FROM issue_codes ORDER BY id")).scalars().all()
+    assert codes == ["High Temperature", "Low Battery"]
+
+    with Session(engine) as db:
+        first = db.get(Anomaly, 1)
+        assert first.issue == "High Temperature,Low Battery"
+        assert first.satellite_id == "SAT-01" and first.timestamp == datetime(2026, 1, 1)
+        rows, _ = keyset_page(db, Anomaly, ["id"], 10, issues=["Low Battery"], issue_index=AnomalyIssue)
+        assert [r["id"] for r in rows] == [2, 1]
+    assert ISSUES.lookup(" Low Battery") is None
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.services.compression import SwingingDoorCompressor, parse_tolerances, reconstruct
+
+
+def test_reconstruct_without_stored_samples_is_all_missing():
+    since = datetime(2020, 1, 1)
+    query = [since + timedelta(seconds=60 * i) for i in range(5)]
+    out = reconstruct([], [], query, channels=3)
+    assert out.shape == (5, 3)
+    assert np.isnan(out).all()
+
+
+def test_swinging_door_reconstructs_within_tolerance():
+    rng = np.random.default_rng(0)
+    tolerance = {"a": 0.5, "b": 0.05}
+    compressor = SwingingDoorCompressor(("a", "b"), tolerance)
+    t0 = datetime(2026, 1, 1)
+    times = [t0 + timedelta(seconds=10 * i) for i in range(2000)]
+    values = np.column_stack([np.cumsum(rng.normal(0, 0.3, 2000)), np.sin(np.arange(2000) / 50)])
+
+    stored = []
+    for ts, (a, b) in zip(times, values):
+        stored += compressor.offer("sat", {"timestamp": ts, "a": a, "b": b})
+    stored += compressor.flush_all()
+
+    assert len(stored) < len(times) / 3
+    out = reconstruct([s["timestamp"] for s in stored], [[s["a"], s["b"]] for s in stored], times)
+    assert (np.abs(out - values) <= np.array([0.5, 0.05]) + 1e-9).all()
+
+
+def test_gaps_and_missing_channels_close_the_door():
+    compressor = SwingingDoorCompressor(("a", "b"), parse_tolerances("a:1.0, b:1.0"), max_gap_s=60.0)
+    t0 = datetime(2026, 1, 1)
+
+    def offer(seconds, a, b=0.0):
+        return [s["timestamp"] for s in compressor.offer("sat", {"timestamp": t0 + timedelta(seconds=seconds),
+                                                                "a": a, "b": b})]
+
+    assert offer(0, 0.0) == [t0]
+    assert offer(10, 0.1) == offer(20, 0.2) == []
+    assert compressor.pending("sat")["a"] == 0.2
+    # a channel going missing stores the held sample and the gap edge
+    assert offer(30, 0.3, None) == [t0 + timedelta(seconds=20), t0 + timedelta(seconds=30)]
+    assert offer(40, 0.4, None) == []
+    # so does a silence longer than max_gap_s
+    assert offer(200, 0.5, None) == [t0 + timedelta(seconds=40), t0 + timedelta(seconds=200)]
+    # out of order samples are stored as they come
+    assert offer(100, 9.0) == [t0 + timedelta(seconds=100)]
+    assert compressor.flush_all() == []
+    assert compressor.stats() == {"received": 7, "stored": 6, "ratio": 7 / 6}
+
+    out = reconstruct([t0, t0 + timedelta(seconds=20)], [[0.0, 1.0], [2.0, np.nan]],
+                      [t0 - timedelta(seconds=1), t0 + timedelta(seconds=5), t0 + timedelta(seconds=20)])
+    assert np.isnan(out[0]).all()
+    assert out[1, 0] == 0.5 and np.isnan(out[1, 1])
+    assert out[2, 0] == 2.0
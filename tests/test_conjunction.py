@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import numpy as np
+
+from backend.models.propagation import EARTH_RADIUS_KM, circular_elements, propagate_at
+
+
+def test_grid_pairs_matches_brute_force():
+    from backend.utils.spatial import grid_pairs
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-50, 50, (600, 3))
+    i, j = grid_pairs(points, 6.0)
+
+    d = np.linalg.norm(points[:, None] - points[None, :], axis=-1)
+    expected = {(a, b) for a, b in zip(*np.nonzero(d < 6.0)) if a < b}
+    found = [(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+def test_screening_finds_a_node_crossing():
+    from backend.services.conjunction import ConjunctionScreener
+    from backend.services.passes import PassPredictor
+
+    t0 = 1_767_225_600.0
+    passes = PassPredictor([])
+    # A and B reach the same ascending node 300 s after t0; C is 400 km higher
+    for sat_id, radius, inclination in (("A", 550.0, 50.0), ("B", 550.0, 60.0), ("C", 950.0, 55.0)):
+        r, v = propagate_at(circular_elements(EARTH_RADIUS_KM + radius, inclination), [-300.0])
+        passes.update_state(sat_id, r[0], v[0], t0)
+    # suborbital state: left out
+    passes.update_state("D", [EARTH_RADIUS_KM - 10.0, 0.0, 0.0], [0.0, 1.0, 0.0], t0)
+
+    screener = ConjunctionScreener(passes, threshold_km=5.0, lookahead_s=600.0, step_s=10.0)
+    found = screener.screen(now=t0)
+    assert len(found) == 1
+    hit = found[0]
+    assert {hit["satellite_a"], hit["satellite_b"]} == {"A", "B"}
+    assert hit["miss_distance_km"] < 1.0
+    assert abs((datetime.fromisoformat(hit["tca"]) - datetime.utcfromtimestamp(t0 + 300.0)).total_seconds()) < 2.0
+    # the planes cross at 10 deg: about 2 * 7.6 * sin(5 deg) km/s apart
+    assert abs(hit["relative_speed_km_s"] - 2 * 7.59 * np.sin(np.radians(5.0))) < 0.05
+
+    latest = screener.latest("C")
+    assert latest["data"] == [] and latest["objects"] == 3 and latest["skipped"] == 1
+    assert screener.latest("A")["data"] == found
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+T0 = datetime(2026, 1, 1)
+
+
+class _Passes:
+    """Stand-in for PassPredictor with fixed pass tables."""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, satellite_id):
+        return self.tables.get(satellite_id)
+
+
+@pytest.fixture
+def scorer():
+    from backend.services.contact import ContactScorer
+    from backend.services.passes import PassTable, to_epoch
+
+    # in contact for the first hour, then below the horizon for two
+    start = to_epoch(T0)
+    window = (np.array([start]), np.array([start + 3600.0]))
+    table = PassTable(start, start + 86400.0, np.array([0]), *window, *window)
+    return ContactScorer(_Passes({"S1": table}))
+
+
+def _samples(scorer, satellite_id, minutes):
+    return [scorer.score(satellite_id, T0 + timedelta(minutes=m)) for m in minutes]
+
+
+def test_gaps_below_the_horizon_are_not_outages(scorer):
+    # every minute in the window, then silent until two hours after it closed
+    scores = _samples(scorer, "S1", [*range(0, 60), 180])
+    assert max(score for score, _ in scores) == 0.0
+
+
+def test_gaps_inside_a_window_are_flagged(scorer):
+    score, message = _samples(scorer, "S1", [*range(0, 20), 40])[-1]
+    assert score > 0 and "outage" in message.lower()
+
+
+def test_satellites_without_passes_are_scored_on_the_raw_gap(scorer):
+    scores = _samples(scorer, "S2", [*range(0, 20), 40])
+    assert scores[-1][0] > 0
+    # out of order samples are skipped
+    assert scorer.features("S2", 0.0) is None
+
+
+def test_contact_state_round_trips_through_a_snapshot(scorer):
+    from backend.services.contact import ContactScorer
+
+    _samples(scorer, "S1", range(0, 10))
+    restored = ContactScorer(scorer.passes)
+    restored.import_arrays(scorer.export_arrays())
+    at = T0 + timedelta(minutes=11)
+    assert restored.score("S1", at) == scorer.score("S1", at)
@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def tracker():
+    from backend.core.models import AnomalyEvent
+    from backend.services.episodes import EpisodeTracker
+
+    return EpisodeTracker(AnomalyEvent, "issues", max_gap_s=600)
+
+
+def _observe(tracker, db, *samples):
+    opened = tracker.observe(db, samples)
+    db.commit()
+    tracker.commit(db)
+    return opened
+
+
+def test_episodes_open_update_and_close(db, tracker):
+    from backend.core.models import AnomalyEvent
+    from backend.services.episodes import EpisodeTracker
+
+    opened = _observe(tracker, db, ("S1", T0, ["TEMP_HIGH"], "warning", 0.4))
+    assert len(opened) == 1
+
+    _observe(tracker, db,
+             ("S1", T0 + timedelta(seconds=60), ["TEMP_HIGH", "COMMS_LOSS"], "critical", 0.9),
+             ("S1", T0 + timedelta(seconds=120), ["COMMS_LOSS"], "warning", 0.5))
+    rows = {r.issues: r for r in db.query(AnomalyEvent).all()}
+    temp = rows["TEMP_HIGH"]
+    assert (temp.sample_count, temp.severity, temp.score) == (2, "critical", 0.9)
+    assert temp.ended_at == T0 + timedelta(seconds=120)
+    assert rows["COMMS_LOSS"].ended_at is None
+    assert tracker.open_count() == 1
+    assert tracker.current_severity("S1") == "warning"
+
+    # silent for longer than max_gap_s: closed at its last sample, a new one opens
+    _observe(tracker, db, ("S1", T0 + timedelta(hours=2), ["COMMS_LOSS"], "warning", 0.5))
+    comms = db.query(AnomalyEvent).filter(AnomalyEvent.issues == "COMMS_LOSS").order_by(AnomalyEvent.id).all()
+    assert [r.ended_at for r in comms] == [T0 + timedelta(seconds=120), None]
+
+    # a restart resumes the open episode instead of opening another
+    resumed = EpisodeTracker(AnomalyEvent, "issues", max_gap_s=600)
+    resumed.load(db)
+    assert resumed.episode_id("S1", "COMMS_LOSS") == comms[1].id
+
+
+def test_rolled_back_episodes_leave_memory_unchanged(db, tracker):
+    from backend.core.models import AnomalyEvent
+
+    _observe(tracker, db, ("S1", T0, ["TEMP_HIGH"], "warning", 0.4))
+    row_id = tracker.episode_id("S1", "TEMP_HIGH")
+
+    tracker.observe(db, [
+        ("S1", T0 + timedelta(seconds=60), ["COMMS_LOSS"], "critical", 0.9),
+        ("S2", T0 + timedelta(seconds=60), ["TEMP_HIGH"], "critical", 0.9),
+    ])
+    # staged only: reads still see the committed state, without waiting
+    assert tracker.episode_id("S1", "TEMP_HIGH") == row_id
+    assert tracker.episode_id("S1", "COMMS_LOSS") is None
+    db.rollback()
+    tracker.rollback(db)
+
+    assert tracker.open_count() == 1
+    assert tracker.current_severity("S1") == "warning"
+    assert db.query(AnomalyEvent).count() == 1
+
+    # the tracker is usable again and continues the original episode
+    _observe(tracker, db, ("S1", T0 + timedelta(seconds=120), ["TEMP_HIGH"], "warning", 0.4))
+    assert tracker.episode_id("S1", "TEMP_HIGH") == row_id
+    assert db.get(AnomalyEvent, row_id).sample_count == 2
+
+
+def test_concurrent_transactions_stage_one_at_a_time(db, tracker, engine):
+    from sqlalchemy.orm import Session
+
+    first = tracker.observe(db, [("S1", T0, ["TEMP_HIGH"], "warning", 0.4)])
+    result = {}
+
+    def other():
+        with Session(engine) as other_db:
+            result["opened"] = _observe(tracker, other_db, ("S1", T0 + timedelta(seconds=1),
+                                                             ["TEMP_HIGH"], "warning", 0.4))
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    thread.join(0.2)
+    # waits for the first transaction instead of opening a second episode
+    assert thread.is_alive()
+    db.commit()
+    tracker.commit(db)
+    thread.join(5)
+    assert len(first) == 1 and result["opened"] == []
+    assert tracker.open_count() == 1
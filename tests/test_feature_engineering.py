@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from backend.services.feature_engineering import FeatureRegistry, FeatureStore
+
+
+@pytest.fixture
+def registry():
+    registry = FeatureRegistry(("x", "y"))
+    registry.derived("total", lambda c: c["x"] + c["y"])
+    registry.derived(("double", "half"), lambda c: np.column_stack([2 * c["total"], c["total"] / 2]))
+    registry.lag("x_lag2", "x", 2)
+    registry.rate("x_rate", "x")
+    registry.mean("total_mean", "total", 3)
+    return registry
+
+
+def test_registry_rejects_unknown_sources_and_duplicates(registry):
+    with pytest.raises(ValueError):
+        registry.lag("z_lag", "z")
+    with pytest.raises(ValueError):
+        registry.derived("total", lambda c: c["x"])
+    assert registry.sources == ("x", "total")
+    assert registry.history() == 2
+
+
+def test_stateful_features_per_satellite(registry):
+    store = FeatureStore(registry)
+    x = np.array([1.0, 2.0, 4.0, np.nan, 8.0])
+    frame = None
+    for k, v in enumerate(x):
+        frame = store.update(["A", "B"], [10.0 * k, 10.0 * k], [[v, 1.0], [-v, 0.0]])
+
+    assert frame.row(0, ("total", "double", "half")) == {"total": 9.0, "double": 18.0, "half": 4.5}
+    # lags count samples, missing ones included
+    assert np.isnan(store.update(["A"], [50.0], [[16.0, 1.0]]).column("x_lag2")[0])
+    latest = store.latest("A")
+    assert latest["x_lag2"] is None and latest["x_rate"] == pytest.approx((16.0 - 8.0) / 10.0)
+    # NaN values are left out of the mean
+    assert latest["total_mean"] == pytest.approx((9.0 + 17.0) / 2)
+    # B's previous sample was missing: no rate
+    assert np.isnan(frame.column("x_rate")[1])
+    assert store.latest("C") is None
+
+
+def test_batches_match_sample_by_sample_updates(registry):
+    rng = np.random.default_rng(0)
+    ids = rng.choice(["A", "B", "C"], 60).tolist()
+    t = np.arange(60.0)
+    x = rng.normal(0.0, 1.0, (60, 2))
+
+    one = FeatureStore(registry)
+    expected = np.vstack([one.update([s], [ts], row[None]).values for s, ts, row in zip(ids, t, x)])
+    batched = FeatureStore(registry)
+    got = np.vstack([batched.update(ids[k:k + 20], t[k:k + 20], x[k:k + 20]).values for k in range(0, 60, 20)])
+    assert np.array_equal(got, expected, equal_nan=True)
+
+    restored = FeatureStore(registry)
+    restored.import_arrays(batched.export_arrays())
+    assert restored.latest("A") == batched.latest("A")
+    step = [[1.0, 2.0]]
+    assert np.array_equal(restored.update(["A"], [61.0], step).values, batched.update(["A"], [61.0], step).values)
+
+    # a snapshot of other feature definitions is ignored
+    other = FeatureRegistry(("x", "y"))
+    other.rate("x_rate", "x")
+    stale = FeatureStore(other)
+    stale.import_arrays(batched.export_arrays())
+    assert stale.latest("A") is None
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from backend.services.fleet import FleetCorrelator
+
+T0 = datetime(2026, 1, 1)
+
+
+def test_fleet_emits_one_incident_per_cluster():
+    stations = {"A": "GS1", "B": "GS1", "C": "GS1", "D": "GS1"}
+    fleet = FleetCorrelator(300, 3, 100, lambda sat, t: stations.get(sat))
+    # three satellites over one station with the same issue: both keys match
+    opened = fleet.observe([(s, T0 + timedelta(seconds=i), "TEMP_HIGH") for i, s in enumerate("ABC")])
+    assert len(opened) == 1
+    assert opened[0]["issues"] == ["TEMP_HIGH"] and opened[0]["stations"] == ["GS1"]
+
+    # later satellites join it instead of opening another
+    assert fleet.observe([("D", T0 + timedelta(seconds=10), "COMMS_LOSS")]) == []
+    incidents = fleet.recent()
+    assert len(incidents) == 1
+    assert incidents[0]["satellites"] == ["A", "B", "C", "D"]
+    assert fleet.recent(kind="station") == incidents
+
+
+def test_windows_duplicates_and_late_onsets():
+    fleet = FleetCorrelator(300, 3, 100)
+    received = []
+    fleet.subscribe(received.append)
+
+    # the same satellite twice doesn't make a cluster
+    assert fleet.observe([("A", T0, "TEMP_HIGH"), ("A", T0 + timedelta(seconds=5), "TEMP_HIGH"),
+                          ("B", T0, "TEMP_HIGH")]) == []
+    # different issues are separate keys
+    assert fleet.observe([("C", T0, "COMMS_LOSS")]) == []
+    first = fleet.observe([("C", T0 + timedelta(seconds=6), "TEMP_HIGH")])
+    assert [i["satellites"] for i in first] == [["A", "B", "C"]]
+    assert first[0]["first_onset"] == T0.isoformat() and received == first
+
+    # the next window starts counting afresh
+    later = T0 + timedelta(seconds=300)
+    assert fleet.observe([(s, later, "TEMP_HIGH") for s in "AB"]) == []
+    second = fleet.observe([("D", later, "TEMP_HIGH")])
+    assert len(second) == 1 and second[0]["id"] != first[0]["id"]
+
+    # two windows on, the first one is dropped and its onsets are late
+    fleet.observe([("E", T0 + timedelta(seconds=600), "TEMP_HIGH")])
+    assert fleet.observe([("F", T0 + timedelta(seconds=10), "TEMP_HIGH")]) == []
+    assert fleet.late == 1
+    assert [i["id"] for i in fleet.recent()] == [second[0]["id"], first[0]["id"]]
+    assert fleet.recent(kind="station") == []
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.services.forecast import BreachForecaster
+from backend.services.thresholds import ThresholdLearner
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def learner():
+    learner = ThresholdLearner(("a", "b"))
+    learner.set_override("sat", "a", low=-100.0, high=100.0)
+    learner.set_override("sat", "b", low=-100.0, high=100.0)
+    return learner
+
+
+def test_forecaster_eta_of_a_linear_trend(learner):
+    forecaster = BreachForecaster(learner, order=1, horizon_s=1800.0, min_samples=20)
+
+    rng = np.random.default_rng(4)
+    # a climbs one unit per minute, b is flat noise
+    for k in range(30):
+        result = forecaster.update(["sat"], [T0 + timedelta(minutes=k)],
+                                   [[float(k), 0.1 * rng.standard_normal()]])[0]
+
+    assert result["channel"] == "a"
+    # 29 -> 100 at 1/min
+    assert abs(result["eta_s"] - 71 * 60) < 1.0
+    assert not result["flagged"]
+    assert forecaster.forecast("sat")["b"]["eta_s"] is None
+
+    result = forecaster.update(["sat"], [T0 + timedelta(minutes=80)], [[80.0, 0.0]])[0]
+    assert result["flagged"] and abs(result["eta_s"] - 20 * 60) < 1.0
+    assert forecaster.update(["sat"], [T0 + timedelta(minutes=101)], [[101.0, 0.0]])[0]["eta_s"] == 0.0
+
+
+def test_forecaster_snapshot_round_trip_keeps_fits_and_alerts(learner):
+    source = BreachForecaster(learner, order=1, horizon_s=1800.0, min_samples=20)
+    for k in range(30):
+        source.update(["sat"], [T0 + timedelta(minutes=k)], [[float(k), 0.0]])
+    # inside the horizon: alerted once
+    source.update(["sat"], [T0 + timedelta(minutes=80)], [[80.0, 0.0]])
+    assert len(source.events) == 1
+
+    target = BreachForecaster(learner, order=1, horizon_s=1800.0, min_samples=20)
+    target.import_arrays(source.export_arrays())
+    assert target.forecast("sat") == source.forecast("sat")
+    assert target.imminent() == source.imminent()
+
+    # still inside the horizon: the restored forecaster doesn't alert again
+    target.update(["sat"], [T0 + timedelta(minutes=81)], [[81.0, 0.0]])
+    assert len(target.events) == 0
+
+    # snapshots without fits restore the moments only
+    arrays = {k: v for k, v in source.export_arrays().items() if k not in ("fits", "etas", "warned")}
+    legacy = BreachForecaster(learner, order=1, horizon_s=1800.0, min_samples=20)
+    legacy.import_arrays(arrays)
+    assert legacy.forecast("sat")["a"]["eta_s"] is None
+    legacy.update(["sat"], [T0 + timedelta(minutes=81)], [[81.0, 0.0]])
+    assert legacy.forecast("sat")["a"]["eta_s"] == target.forecast("sat")["a"]["eta_s"]
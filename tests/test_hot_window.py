@@ -0,0 +1,57 @@
+import numpy as np
+
+from backend.services.hot_window import HotWindow
+
+
+def test_gorilla_block_round_trip():
+    from backend.utils.gorilla import decode_block, encode_block
+
+    rng = np.random.default_rng(0)
+    n = 300
+    ts = 1_700_000_000_000 + np.cumsum(rng.integers(990, 1010, n))
+    values = np.column_stack([
+        rng.normal(35, 1.5, n),                      # white noise
+        np.cumsum(rng.normal(0, 1, n)),              # random walk
+        7000 * np.cos(np.arange(n) * 1e-3),          # smooth
+        np.full(n, 3.25),                            # constant
+        np.where(np.arange(n) % 7 == 0, np.nan, 1.0),
+    ])
+    lossless = encode_block(ts, values)
+    out_ts, out = decode_block(lossless, n, values.shape[1])
+    assert np.array_equal(out_ts, ts)
+    assert np.array_equal(out, values, equal_nan=True)
+
+    steps = [0.01, 0.01, 0.001, 0.01, 0.01]
+    lossy = encode_block(ts, values, steps)
+    assert len(lossy) < len(lossless)
+    _, out = decode_block(lossy, n, values.shape[1], channels=[0, 1, 2, 3])
+    assert (np.abs(out - values[:, :4]) <= np.array(steps[:4]) / 2 + 1e-9).all()
+    # columns with NaN stay lossless
+    _, nan_column = decode_block(lossy, n, values.shape[1], channels=[4])
+    assert np.array_equal(nan_column[:, 0], values[:, 4], equal_nan=True)
+
+
+def test_reads_span_sealed_blocks_and_the_head_within_the_window():
+    rng = np.random.default_rng(1)
+    window = HotWindow(("a", "b"), window_s=100.0, block_size=16, precision={"a": 0.01})
+    ts = 1_700_000_000_000 + 1000 * np.arange(300)
+    values = np.column_stack([rng.normal(0, 1, 300), np.cumsum(rng.normal(0, 1, 300))])
+    # two satellites interleaved in each batch
+    for k in range(0, 300, 50):
+        window.append(["S1"] * 50 + ["S2"] * 50, np.r_[ts[k:k + 50], ts[k:k + 50]],
+                      np.vstack([values[k:k + 50], values[k:k + 50] + 1.0]))
+
+    out_ts, out = window.read("S1")
+    # the last 100 s, from sealed blocks and the unsealed head
+    assert out_ts.tolist() == ts[-101:].tolist()
+    assert (np.abs(out[:, 0] - values[-101:, 0]) <= 0.005 + 1e-9).all()
+    assert np.array_equal(out[:, 1], values[-101:, 1])
+
+    out_ts, out = window.read("S2", since_ms=int(ts[250]), until_ms=int(ts[260]), channels=["b"])
+    assert out_ts.tolist() == ts[250:261].tolist()
+    assert np.array_equal(out[:, 0], values[250:261, 1] + 1.0)
+    assert window.read("S3")[0].size == 0
+
+    stats = window.stats()
+    assert stats["satellites"] == 2 and stats["blocks"] < 2 * 300 / 16
+    assert stats["samples"] < 2 * 300 and stats["ratio"] > 1.0
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+T0 = datetime(2026, 1, 1)
+ISSUES = ["TEMP_HIGH", "COMMS_LOSS", "TEMP_HIGH,COMMS_LOSS"]
+
+
+def _seed(db, n=50):
+    from backend.core.models import AnomalyEvent
+
+    # equal timestamps in pairs, so the id breaks ties
+    db.add_all(
+        AnomalyEvent(satellite_id=f"S{k % 3}", severity="warning", issues=ISSUES[k % 3], score=0.5,
+                     timestamp=T0 + timedelta(seconds=k // 2))
+        for k in range(n)
+    )
+    db.commit()
+
+
+def _index(db):
+    rows = db.execute(text(
+        "SELECT c.issue, i.anomaly_id FROM anomaly_event_issues AS i JOIN issue_codes AS c ON c.id = i.issue_code"
+    ))
+    return sorted(rows.all())
+
+
+def _ids(db, limit=7, **filters):
+    from backend.core.models import AnomalyEvent, AnomalyEventIssue
+    from backend.core.pagination import keyset_page
+
+    ids, cursor = [], None
+    while True:
+        page, cursor = keyset_page(db, AnomalyEvent, ["id"], limit, cursor=cursor,
+                                   issue_index=AnomalyEventIssue, **filters)
+        ids += [r["id"] for r in page]
+        if cursor is None:
+            return ids
+
+
+def test_issue_filters_page_off_the_index(db):
+    _seed(db)
+    assert _ids(db, issues=["COMMS_LOSS"]) == [k + 1 for k in range(49, -1, -1) if k % 3]
+    # several issues: merged, a row with both comes up once
+    assert _ids(db, issues=["TEMP_HIGH", "COMMS_LOSS"]) == list(range(50, 0, -1))
+    assert _ids(db, issues=["TEMP_HIGH"], satellite_id="S2") == [k + 1 for k in range(49, -1, -1) if k % 3 == 2]
+    assert _ids(db, issues=["NOPE"]) == []
+
+
+def test_triggers_follow_deletes_and_updates(db):
+    from backend.core.compact import intern_names
+    from backend.core.models import AnomalyEvent
+
+    _seed(db, 3)
+    # new names are interned before the write transaction, as ingestion does
+    intern_names(issues=["LOW_BATTERY"])
+    assert _index(db) == [("COMMS_LOSS", 2), ("COMMS_LOSS", 3), ("TEMP_HIGH", 1), ("TEMP_HIGH", 3)]
+
+    db.delete(db.get(AnomalyEvent, 3))
+    row = db.get(AnomalyEvent, 1)
+    row.issues = "COMMS_LOSS,LOW_BATTERY"
+    db.commit()
+    assert _index(db) == [("COMMS_LOSS", 1), ("COMMS_LOSS", 2), ("LOW_BATTERY", 1)]
+    # moving a row in time moves its index entries
+    row.timestamp = T0 + timedelta(hours=1)
+    db.commit()
+    assert _ids(db, issues=["COMMS_LOSS"], since=T0 + timedelta(minutes=30)) == [1]
+
+
+def test_empty_indexes_are_backfilled_at_startup(db):
+    from backend.core import issue_index
+
+    _seed(db, 6)
+    expected = _index(db)
+    with db.bind.begin() as conn:
+        conn.execute(text("DELETE FROM anomaly_event_issues"))
+    db.commit()
+    assert _index(db) == []
+
+    issue_index.ensure_issue_indexes()
+    assert _index(db) == expected
+    # triggers are created once; a second startup changes nothing
+    issue_index.ensure_issue_indexes()
+    assert _index(db) == expected
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime
+
+
+def test_satellites_go_offline_one_timeout_after_their_last_sample():
+    from backend.services.liveness import LivenessTracker
+
+    tracker = LivenessTracker(timeout_s=60.0)
+    events = []
+    tracker.subscribe(lambda event: events.append((event["satellite_id"], event["online"])))
+    now = time.time()
+
+    tracker.seen("S1", now - 30)
+    tracker.seen("S2", now - 50)
+    # S1 again: the heap entry is re-scheduled on expiry, not duplicated
+    tracker.seen("S1", now - 10)
+    assert events == [("S1", True), ("S2", True)]
+
+    assert tracker.expire(now + 5) == []
+    assert tracker.expire(now + 20) == ["S2"]
+    assert tracker.expire(now + 40) == []
+    assert tracker.expire(now + 55) == ["S1"]
+    assert events[2:] == [("S2", False), ("S1", False)]
+    assert tracker.online_count() == 0
+
+
+def test_old_and_late_samples_do_not_bring_a_satellite_online():
+    from backend.services.liveness import LivenessTracker
+
+    tracker = LivenessTracker(timeout_s=60.0)
+    now = time.time()
+    tracker.seen("S1", now - 600)
+    assert not tracker.is_online("S1")
+    assert tracker.last_seen("S1") == datetime.utcfromtimestamp(now - 600)
+
+    # a sample from the future counts as now
+    tracker.seen("S2", now + 3600)
+    assert tracker.is_online("S2") and tracker.last_seen("S2") <= datetime.utcnow()
+    # out of order: last_seen doesn't move back
+    tracker.seen("S2", now - 30)
+    assert tracker.last_seen("S2") > datetime.utcfromtimestamp(now - 30)
+
+
+def test_load_seeds_status_from_stored_times_and_flushes_it(db):
+    from backend.core.models import Satellite
+    from backend.services.liveness import LivenessTracker
+
+    db.add_all([Satellite(satellite_id=s, is_online=online) for s, online in (("S1", False), ("S2", True), ("S3", True))])
+    db.commit()
+    tracker = LivenessTracker(timeout_s=60.0)
+    now = time.time()
+    tracker.load({
+        "S1": datetime.utcfromtimestamp(now - 10),
+        "S2": datetime.utcfromtimestamp(now - 600),
+        "S3": None,
+    }, now=now)
+    assert [tracker.is_online(s) for s in ("S1", "S2", "S3")] == [True, False, False]
+
+    assert tracker.flush(db, Satellite) == 3
+    assert {s.satellite_id: s.is_online for s in db.query(Satellite).all()} == {"S1": True, "S2": False, "S3": False}
+    assert tracker.expire(now + 61) == ["S1"]
+    assert tracker.flush(db, Satellite) == 1
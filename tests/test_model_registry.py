@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from backend.inference.registry import TELEMETRY_FEATURES, ModelRegistry, telemetry_matrix
+
+
+@pytest.fixture
+def training():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((2000, len(TELEMETRY_FEATURES)))
+
+
+def test_forest_scores_outliers_above_nominal_samples(training):
+    from backend.models.isolation_forest import fit
+
+    model = fit(training, TELEMETRY_FEATURES, n_trees=50, seed=1)
+    scores = model.score(np.vstack([np.zeros(len(TELEMETRY_FEATURES)), np.full(len(TELEMETRY_FEATURES), 8.0)]))
+    assert scores[1] > 0.6 > scores[0]
+    # nothing loaded yet: no scores
+    assert ModelRegistry("unused").score(training[:1]) is None
+
+
+def test_refresh_hot_swaps_to_new_versions_only(tmp_path, training):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.refresh() is None
+
+    v1 = registry.train(training, n_trees=20, seed=1)
+    assert registry.refresh() == v1 and registry.active_version == v1
+    registry.score(training[:10])
+    v2 = registry.train(training, n_trees=30, seed=2)
+    # training alone doesn't activate; the next poll does
+    assert registry.active_version == v1
+    assert registry.refresh() == v2 and registry.active_version == v2
+    assert not list(tmp_path.glob("*.tmp*"))
+
+    # a manual rollback sticks and keeps its latency history
+    registry.activate(v1)
+    assert registry.refresh() is None and registry.active_version == v1
+    status = registry.status()
+    assert status["versions"] == [v1, v2]
+    assert status["loaded"][v1]["batches"] == 1 and status["loaded"][v1]["n_trees"] == 20
+
+
+def test_telemetry_matrix_derives_radius_and_speed():
+    X = telemetry_matrix([
+        {"temperature": 20.0, "position_x": 3.0, "position_y": 4.0, "position_z": 0.0,
+         "velocity_x": 0.0, "velocity_y": 0.0, "velocity_z": 7.5},
+        {"rssi": -90.0},
+    ])
+    assert X.shape == (2, len(TELEMETRY_FEATURES))
+    assert X[0, 0] == 20.0 and X[0, -2:].tolist() == [5.0, 7.5]
+    assert np.isnan(X[1, -2:]).all() and X[1, 1] == -90.0
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def test_multivariate_false_alarm_rate_matches_threshold():
+    from backend.services.multivariate import MultivariateDetector
+
+    rng = np.random.default_rng(0)
+    detector = MultivariateDetector([f"c{i}" for i in range(15)], threshold=37.7, rebaseline_after=0)
+    flags = [[r["flagged"] for r in detector.score_update(["a", "b", "c", "d"], rng.standard_normal((4, 15)))]
+             for _ in range(5000)]
+    # chi-square(15) 99.9% point: ~0.1% of nominal samples, also while the model is young
+    rate = np.mean(flags[50:])
+    assert rate < 0.0025
+
+
+def test_multivariate_stops_flagging_after_a_step_change():
+    from backend.services.multivariate import MultivariateDetector
+
+    rng = np.random.default_rng(1)
+    detector = MultivariateDetector([f"c{i}" for i in range(4)], rebaseline_after=50)
+    for _ in range(500):
+        detector.score_update(["a"], rng.standard_normal((1, 4)))
+    shifted = [detector.score_update(["a"], 20.0 + rng.standard_normal((1, 4)))[0]["flagged"]
+               for _ in range(1000)]
+    assert shifted[0]
+    assert not any(shifted[-500:])
+
+
+def test_multivariate_model_is_the_sample_mean_and_covariance_while_young():
+    from backend.services.multivariate import MultivariateDetector
+
+    rng = np.random.default_rng(3)
+    x = rng.standard_normal((500, 3)) @ np.array([[1.0, 0.5, 0.0], [0.0, 2.0, 0.3], [0.0, 0.0, 0.1]])
+    # 1/alpha above the sample count: every sample weighs the same
+    detector = MultivariateDetector(("a", "b", "c"), alpha=0.001, threshold=np.inf)
+    for row in x:
+        detector.score_update(["sat"], row[None, :])
+
+    state = detector.export_arrays()
+    assert state["count"][0] == len(x)
+    assert np.allclose(state["mean"][0], x.mean(axis=0))
+    assert np.allclose(state["cov"][0], np.cov(x, rowvar=False, bias=True))
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+
+def test_station_measures_a_satellite_overhead():
+    from backend.models.observations import GroundStation
+
+    station = GroundStation("equator", 0.0, 0.0)
+    y = station.measure(np.array([[7000.0, 0.0, 0.0]]), np.array([[0.0, 7.5, 0.0]]), np.array([0.0]))[0]
+    assert y[0] == pytest.approx(7000.0 - 6378.137)
+    assert y[2] == pytest.approx(np.pi / 2)
+    # moving across the line of sight
+    assert y[3] == pytest.approx(0.0, abs=1e-9)
+
+
+@pytest.mark.parametrize("filter_name", ["EKF", "UKF"])
+def test_filters_converge_and_stay_consistent(filter_name):
+    from backend.models.filter import run_monte_carlo
+
+    result = run_monte_carlo(runs=8, filter_name=filter_name, duration_s=3 * 3600, seed=1)
+    summary = result.summary()
+    assert summary["converged"] == 8
+    assert summary["final_position_rmse_km"] < 1.0
+    assert summary["final_velocity_rmse_km_s"] < 1e-3
+    # 6 state and 4 measurement dimensions: NEES ~ 6 and NIS ~ 4 when the covariance is honest
+    assert summary["mean_nees"] < 12.0
+    assert summary["mean_nis"] < 8.0
+    assert result.errors_rsw.shape == result.errors.shape[:2] + (3,)
@@ -0,0 +1,71 @@
+from dataclasses import replace
+
+import numpy as np
+
+from backend.models.observations import GroundStation, gmst
+from backend.models.propagation import EARTH_RADIUS_KM, circular_elements, propagate, propagate_at
+
+T0 = 1_767_225_600.0   # 2026-01-01T00:00:00Z
+STATIONS = [GroundStation("Lisbon", 38.7, -9.1, 0.0, 5.0), GroundStation("Svalbard", 78.2, 15.4, 0.0, 5.0)]
+
+
+def test_bisected_aos_los_match_a_fine_grid():
+    from backend.services.passes import predict_passes
+
+    el = circular_elements(EARTH_RADIUS_KM + 550.0, 97.6, raan_deg=20.0)
+    horizon = 12 * 3600.0
+    station, aos, los = predict_passes(el, STATIONS, T0, horizon, coarse_step_s=60.0, tol_s=0.5)[0]
+    assert set(station.tolist()) == {0, 1} and (los > aos).all()
+
+    # reference: every second of the horizon
+    t = np.arange(0.0, horizon + 1.0)
+    r, _ = propagate(el, t)
+    for k, s in enumerate(STATIONS):
+        s = replace(s, theta0=gmst(T0))
+        above = s.elevation(r[0], t) >= s.min_elevation
+        edges = np.flatnonzero(np.diff(above.astype(np.int8)))
+        expected = t[edges] + 0.5 + T0
+        got = np.sort(np.r_[aos[station == k], los[station == k]])
+        assert len(got) == len(expected)
+        assert np.abs(got - expected).max(initial=0.0) <= 1.0
+
+
+def test_pass_table_queries():
+    from backend.services.passes import PassTable, _merge_windows
+
+    # two stations overlapping on the first window
+    aos, los = np.array([100.0, 150.0, 500.0]), np.array([200.0, 260.0, 560.0])
+    starts, ends = _merge_windows(aos, los)
+    assert starts.tolist() == [100.0, 500.0] and ends.tolist() == [260.0, 560.0]
+    table = PassTable(0.0, 1000.0, np.array([0, 1, 0]), aos, los, starts, ends)
+
+    assert table.contact_seconds(0.0, 1000.0) == 160.0 + 60.0
+    assert np.allclose(table.contact_seconds([0.0, 120.0], [150.0, 520.0]), [50.0, 140.0 + 20.0])
+    assert table.in_contact(210.0) and not table.in_contact(300.0)
+    assert table.station_at(180.0) == 0 and table.station_at(220.0) == 1
+    assert table.next_contact(300.0) == (500.0, 560.0)
+    assert table.next_contact(600.0) is None
+
+
+def test_predictor_rebuilds_only_when_the_orbit_drifts():
+    from backend.services.passes import PassPredictor
+
+    predictor = PassPredictor(STATIONS, horizon_s=6 * 3600.0, refresh_s=3600.0, drift_km=10.0)
+    el = circular_elements(EARTH_RADIUS_KM + 550.0, 97.6)
+    r, v = propagate_at(el, [0.0])
+    predictor.update_state("S1", r[0], v[0], T0)
+    # suborbital: no table
+    predictor.update_state("S2", [EARTH_RADIUS_KM - 10.0, 0.0, 0.0], [0.0, 1.0, 0.0], T0)
+    assert predictor.refresh(T0) == 1
+    assert predictor.table("S2") is None
+    window = predictor.next_contact("S1", T0)
+    assert window is not None and window[0] < window[1]
+
+    # on the predicted track: the table is kept
+    r, v = propagate_at(el, [600.0])
+    predictor.update_state("S1", r[0], v[0], T0 + 600.0)
+    assert predictor.refresh(T0 + 600.0) == 0
+
+    # moved by a manoeuvre: rebuilt
+    predictor.update_state("S1", r[0] * 1.01, v[0], T0 + 660.0)
+    assert predictor.refresh(T0 + 660.0) == 1
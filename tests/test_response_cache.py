@@ -0,0 +1,68 @@
+import pytest
+
+
+@pytest.fixture
+def client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.services.response_cache import ResponseCache, ResponseCacheMiddleware
+
+    app = FastAPI()
+    calls = []
+
+    @app.get("/items")
+    def items(n: int = 1):
+        calls.append(n)
+        return {"n": n, "calls": len(calls)}
+
+    @app.get("/uncached")
+    def uncached():
+        calls.append(0)
+        return {"calls": len(calls)}
+
+    app.add_middleware(ResponseCacheMiddleware, paths=["/items"], cache=ResponseCache(max_age_s=3600.0))
+    with TestClient(app) as client:
+        client.calls = calls
+        yield client
+
+
+def test_etag_revalidation_until_the_next_write(client):
+    from backend.services.response_cache import bump_data_version
+
+    first = client.get("/items?n=2&x=1")
+    etag = first.headers["etag"]
+    assert first.json() == {"n": 2, "calls": 1}
+
+    # same query in another order: served from the cache, 304 on a matching ETag
+    again = client.get("/items?x=1&n=2")
+    assert again.json() == first.json() and again.headers["etag"] == etag
+    assert client.get("/items?n=2&x=1", headers={"If-None-Match": etag}).status_code == 304
+    assert client.calls == [2]
+
+    # a write invalidates: new body, new ETag, the old one no longer matches
+    bump_data_version()
+    fresh = client.get("/items?n=2&x=1", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert fresh.json()["calls"] == 2
+
+
+def test_only_listed_paths_are_cached(client):
+    assert client.get("/uncached").json() != client.get("/uncached").json()
+    assert "etag" not in client.get("/uncached").headers
+
+
+def test_cache_is_bounded_by_entries_and_bytes():
+    from backend.services.response_cache import ResponseCache, _Entry
+
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    for i, size in enumerate((4, 4, 4)):
+        cache.put(("/p", str(i)), _Entry(0, f'"{i}"', b"x" * size, {}))
+    # oldest evicted by count
+    assert cache.get(("/p", "0"), 0) is None and cache.get(("/p", "2"), 0) is not None
+    cache.put(("/p", "big"), _Entry(0, '"big"', b"x" * 8, {}))
+    assert cache.stats()["bytes"] <= 10 and cache.get(("/p", "big"), 0) is not None
+    # bodies over max_bytes aren't stored; stale versions are misses
+    cache.put(("/p", "huge"), _Entry(0, '"huge"', b"x" * 11, {}))
+    assert cache.get(("/p", "huge"), 0) is None
+    assert cache.get(("/p", "big"), 1) is None
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+NOW = datetime(2026, 6, 1)
+
+
+def test_purge_deletes_expired_rows_in_chunks(db, engine):
+    from backend.core.compact import intern_names
+    from backend.core.models import Anomaly, Telemetry
+    from backend.services.retention import RetentionPolicy, default_policies, purge
+
+    intern_names(["S1"], ["High Temperature"])
+    old, recent = NOW - timedelta(days=40), NOW - timedelta(days=1)
+    db.add_all([Telemetry(satellite_id="S1", temperature=20.0, timestamp=ts)
+                for ts in [old] * 7 + [recent] * 3])
+    for severity, ended in (("critical", True), ("warning", True), ("normal", True), ("normal", False)):
+        db.add(Anomaly(satellite_id="S1", severity=severity, issue="High Temperature", score=0.5,
+                       timestamp=old, last_seen=old, ended_at=old if ended else None))
+    db.commit()
+
+    # 7 rows, 3 per chunk: three DELETEs
+    assert purge(engine, RetentionPolicy("telemetry", 7), now=NOW, chunk_size=3, pause_s=0) == 7
+    assert [t.timestamp for t in db.query(Telemetry).all()] == [recent] * 3
+
+    # 40 days old: past the "other" TTL only, and open episodes stay
+    deleted = {
+        p.name: purge(engine, p, now=NOW, chunk_size=3, pause_s=0)
+        for p in default_policies(critical_days=365, warning_days=90, other_days=30)
+        if p.table == "anomalies"
+    }
+    assert deleted == {"anomalies[critical]": 0, "anomalies[warning]": 0, "anomalies[other]": 1}
+    left = {(a.severity, a.ended_at is None) for a in db.query(Anomaly).all()}
+    assert left == {("critical", False), ("warning", False), ("normal", True)}
+
+
+def test_run_retention_reports_deleted_rows_and_reclaims_pages(engine):
+    from sqlalchemy import text
+
+    from backend.services.retention import (
+        RetentionPolicy, convert_to_incremental_vacuum, incremental_vacuum_enabled, run_retention,
+    )
+
+    convert_to_incremental_vacuum(engine)
+    assert incremental_vacuum_enabled(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE telemetry (id INTEGER PRIMARY KEY, ts_ms INTEGER, blob TEXT)"))
+        conn.execute(text("INSERT INTO telemetry (ts_ms, blob) VALUES (0, :b)"),
+                     [{"b": "x" * 2000} for _ in range(200)])
+
+    report = run_retention(engine, [RetentionPolicy("telemetry", 1), RetentionPolicy("missing_table", 1)],
+                           chunk_size=50)
+    assert report["deleted_rows"] == {"telemetry": 200}
+    assert report["pages_released"] > 0 and report["reclaimed_bytes"] > 0
+    assert report["free_bytes"] == 0
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+T0 = datetime(2026, 1, 1)
+
+
+def test_registry_flushes_new_and_changed_satellites(db):
+    from backend.core.models import Satellite
+    from backend.services.satellite_registry import SatelliteRegistry
+
+    registry = SatelliteRegistry(is_online=lambda satellite_id: satellite_id == "S1")
+    assert registry.seen("S1", T0, "warning")
+    assert registry.seen("S2", T0)
+    assert not registry.seen("S1", T0 + timedelta(seconds=10), "critical")
+    assert registry.flush(db, Satellite) == 2
+    assert registry.flush(db, Satellite) == 0
+
+    rows = {r.satellite_id: r for r in db.query(Satellite).all()}
+    assert (rows["S1"].is_online, rows["S1"].latest_severity) == (True, "critical")
+    assert rows["S1"].last_telemetry == T0 + timedelta(seconds=10)
+    assert (rows["S2"].is_online, rows["S2"].latest_severity) == (False, "normal")
+
+    # aware timestamps are stored as naive UTC
+    registry.seen("S2", datetime(2026, 1, 1, 2, tzinfo=timezone(timedelta(hours=1))), "warning")
+    assert registry.flush(db, Satellite) == 1
+    reloaded = SatelliteRegistry()
+    reloaded.load(db, Satellite)
+    assert reloaded.get("S2").last_telemetry == T0 + timedelta(hours=1)
+    assert reloaded.get("S2").latest_severity == "warning"
+
+
+def test_late_samples_do_not_move_last_telemetry_back():
+    from backend.services.satellite_registry import SatelliteRegistry
+
+    registry = SatelliteRegistry()
+    registry.seen("S1", T0 + timedelta(minutes=5), "normal")
+    registry.seen("S1", T0, "critical")
+    record = registry.get("S1")
+    assert (record.last_telemetry, record.latest_severity) == (T0 + timedelta(minutes=5), "normal")
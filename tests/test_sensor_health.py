@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from backend.services.sensor_health import SensorHealthMonitor
+
+
+def _readings(n, seed=0):
+    # three redundant sensors on a shared slowly varying signal
+    rng = np.random.default_rng(seed)
+    signal = 20.0 + np.cumsum(rng.normal(0.0, 0.2, n))
+    return signal[:, None] + rng.normal(0.0, 0.1, (n, 3))
+
+
+def _run(monitor, x, satellite_id="S1"):
+    return [monitor.update([satellite_id], row)[0] for row in x]
+
+
+@pytest.fixture
+def monitor():
+    return SensorHealthMonitor(stuck_window=8, cusum_k=0.5, cusum_h=8.0, spike_z=6.0)
+
+
+def test_nominal_sensors_raise_nothing(monitor):
+    results = _run(monitor, _readings(2000))
+    assert not any(r["issues"] for r in results)
+    assert results[-1]["message"] == "Sensors nominal"
+
+
+def test_a_stuck_sensor_is_flagged_from_the_window_on(monitor):
+    x = _readings(300)
+    x[200:, 1] = x[200, 1]
+    results = _run(monitor, x)
+    # until the window fills it can only look like sensor2 wandering off
+    assert all("sensor2_value" in r["message"] for r in results[200:] if r["issues"])
+    assert [r["issues"] for r in results[207:]] == [["SENSOR_STUCK"]] * 93
+    assert results[206]["issues"] != ["SENSOR_STUCK"]
+    assert results[-1]["message"] == "sensor2_value stuck"
+
+
+def test_a_spike_is_one_sample_and_not_drift(monitor):
+    x = _readings(300)
+    x[250, 0] += 5.0
+    results = _run(monitor, x)
+    assert [i for i, r in enumerate(results) if r["issues"]] == [250]
+    assert results[250]["issues"] == ["SENSOR_SPIKE"] and "sensor1_value" in results[250]["message"]
+
+
+def test_a_drift_stays_blamed_on_the_drifting_sensor(monitor):
+    x = _readings(800, seed=1)
+    # 0.04 sigma of the residual per sample: no single sample stands out
+    x[300:, 2] += np.arange(500) * 0.005
+    results = _run(monitor, x)
+    flagged = [i for i, r in enumerate(results) if r["issues"]]
+    assert 300 < flagged[0] < 400
+    # the siblings' residuals move too, but only sensor3 is reported
+    assert all(results[i]["message"] == "sensor3_value drift" for i in flagged)
+    assert len(flagged) > 400
+
+
+def test_batches_match_sample_by_sample_updates(monitor):
+    a, b = _readings(200, seed=1), _readings(200, seed=2)
+    a[150:, 0] = a[150, 0]
+    b[120, 2] += 5.0
+    expected = [r["issues"] for r in _run(monitor, a, "A")] + [r["issues"] for r in _run(monitor, b, "B")]
+
+    batched = SensorHealthMonitor(stuck_window=8, cusum_k=0.5, cusum_h=8.0, spike_z=6.0)
+    results = []
+    for k in range(0, 200, 50):
+        # interleaved satellites, several samples per satellite per batch
+        ids = ["A"] * 50 + ["B"] * 50
+        results.append(batched.update(ids, np.vstack([a[k:k + 50], b[k:k + 50]])))
+    got = [r["issues"] for chunk in results for r in chunk[:50]] + [r["issues"] for chunk in results for r in chunk[50:]]
+    assert got == expected
+
+    restored = SensorHealthMonitor()
+    restored.import_arrays(batched.export_arrays())
+    assert restored.update(["A"], a[-1])[0]["issues"] == ["SENSOR_STUCK"]
@@ -0,0 +1,94 @@
+import os
+import signal
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+
+def _sample(satellite_id, ts, temp_payload=20.0):
+    return {
+        "timestamp": ts.isoformat(), "satellite_id": satellite_id,
+        "position_x": 7000.0, "position_y": 0.0, "position_z": 0.0,
+        "velocity_x": 0.0, "velocity_y": 7.5, "velocity_z": 0.0,
+        "temp_payload": temp_payload, "temp_battery": 20.0, "temp_bus": 20.0,
+        "sensor1_value": 1.0, "sensor2_value": 1.0, "sensor3_value": 1.0,
+        "comms_rssi": -80.0, "comms_snr": 10.0, "comms_packet_loss": 0.01,
+    }
+
+
+@pytest.fixture
+def executor():
+    from backend.services.sharding import start_executor, stop_executor
+
+    yield start_executor(2)
+    stop_executor()
+
+
+def test_state_reads_and_overrides_reach_the_owning_shard(executor):
+    from backend.services.shard_state import merge_overrides, on_all, on_owner
+    from backend.services.sharding import shard_for
+
+    sats = [f"S{i}" for i in range(8)]
+    assert {shard_for(s, 2) for s in sats} == {0, 1}
+    t0 = datetime(2026, 1, 1)
+    executor.submit_batch([_sample(s, t0) for s in sats]).result(60)
+
+    on_owner("S3", "set_override", "features", "S3", "temp_payload", None, 25.0)
+    on_all("set_override", "features", "*", "temp_battery", None, 55.0)
+    overrides = merge_overrides(on_all("overrides"))["features"]
+    assert overrides["S3"] == {"temp_payload": {"low": None, "high": 25.0}}
+    assert overrides["*"] == {"temp_battery": {"low": None, "high": 55.0}}
+
+    # detection in the worker uses the override
+    result = executor.submit(_sample("S3", t0 + timedelta(seconds=1), temp_payload=30.0)).result(60)[0]
+    assert "HIGH_PAYLOAD_TEMPERATURE" in result["issues"]
+    assert on_owner("S3", "thresholds", "S3")["features"]["temp_payload"]["high"] == 25.0
+    assert on_owner("S5", "features", "S5") is not None
+    # each shard holds only its own satellites
+    exports = on_all("export_thresholds")
+    assert sorted(s for e in exports for s in e["features"]["satellite_ids"]) == sats
+
+
+def test_jump_hash_moves_only_keys_for_the_new_bucket():
+    from backend.services.sharding import jump_hash
+
+    keys = range(20000)
+    before = np.array([jump_hash(k, 10) for k in keys])
+    after = np.array([jump_hash(k, 11) for k in keys])
+    assert before.min() == 0 and before.max() == 9
+    assert np.array_equal(before, [jump_hash(k, 10) for k in keys])
+
+    moved = before != after
+    assert (after[moved] == 10).all()
+    assert abs(moved.mean() - 1 / 11) < 0.01
+
+
+def test_dead_worker_fails_its_requests_and_is_restarted():
+    from backend.services.sharding import ShardedExecutor, shard_for
+
+    executor = ShardedExecutor(2, check_interval_s=0.2)
+    executor.start()
+    try:
+        t0 = datetime(2026, 1, 1)
+        sats = [f"S{i}" for i in range(8)]
+        victim = next(s for s in sats if shard_for(s, 2) == 1)
+        assert len(executor.submit_batch([_sample(s, t0) for s in sats]).result(60)) == 8
+
+        # frozen, so the batch is still queued when the worker is killed
+        pid = executor._processes[1].pid
+        os.kill(pid, signal.SIGSTOP)
+        while open(f"/proc/{pid}/stat").read().split(")")[1].split()[0] != "T":
+            time.sleep(0.01)
+        lost = executor.submit(_sample(victim, t0 + timedelta(seconds=1)))
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(RuntimeError, match="worker died"):
+            lost.result(30)
+        assert executor.restarts == 1
+
+        # the restarted worker and the other shard both answer
+        results = executor.submit_batch([_sample(s, t0 + timedelta(seconds=2)) for s in sats]).result(60)
+        assert all("issues" in r for r in results)
+    finally:
+        executor.stop()
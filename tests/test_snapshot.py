@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """
+    Empty provider registry, so snapshots only hold what a test registers.
+    """
+    from backend.services import snapshot
+
+    monkeypatch.setattr(snapshot, "_PROVIDERS", {})
+    monkeypatch.setattr(snapshot, "_BY_SATELLITE", {})
+
+
+def test_snapshot_restore_keeps_only_selected_satellites(tmp_path, providers):
+    from backend.services.snapshot import register_provider, restore_snapshot, save_snapshot
+    from backend.services.thresholds import ThresholdLearner
+
+    def learner():
+        return ThresholdLearner(("a", "b"), min_samples=1)
+
+    source, target = learner(), learner()
+    register_provider("test_thresholds", source.export_arrays, target.import_arrays,
+                      {"satellite_ids": ("markers", "positions", "desired", "counts",
+                                         "override_low", "override_high")})
+    source.update(["S1", "S2", "S3"], np.arange(6.0).reshape(3, 2))
+    save_snapshot(str(tmp_path))
+    source.update(["S1"], [[10.0, 11.0]])
+    save_snapshot(str(tmp_path))
+
+    # each save is a new version; the manifest points at the latest
+    assert [p.name for p in (tmp_path / "test_thresholds").iterdir() if p.is_dir()] == ["v2"]
+    assert restore_snapshot(str(tmp_path), keep=lambda s: s != "S2")
+    assert target.describe("S1")["a"]["samples"] == 2
+    assert target.describe("S3")["a"]["samples"] == 1
+    assert target.describe("S2")["a"]["samples"] == 0
+
+
+def test_unchanged_arrays_are_linked_and_changed_ones_rewritten(tmp_path, providers):
+    from backend.services.snapshot import register_provider, save_snapshot
+
+    arrays = {"ids": np.array(["S1", "S2"]), "values": np.array([1.0, 2.0])}
+    register_provider("rows", lambda: dict(arrays), lambda a: None, {"ids": ("values",)})
+    assert save_snapshot(str(tmp_path)) == {"rows": 4}
+
+    # one satellite changed: all of "values" is rewritten, "ids" is linked
+    arrays["values"] = np.array([1.0, 5.0])
+    assert save_snapshot(str(tmp_path)) == {"rows": 2}
+
+
+def test_shard_restore_takes_whole_process_state_only_from_its_own_snapshot(tmp_path, providers):
+    from backend.services.sharding import _restore_shard_state, shard_for
+    from backend.services.snapshot import register_provider, save_snapshot
+
+    satellites = [f"S{i}" for i in range(20)]
+    rows, totals = {}, []
+
+    def import_rows(arrays):
+        rows.update(zip(arrays["ids"].tolist(), arrays["values"].tolist()))
+
+    def save(shard, ids, total):
+        register_provider("rows", lambda: {"ids": np.array(ids), "values": np.arange(len(ids), dtype=float)},
+                          import_rows, {"ids": ("values",)})
+        register_provider("totals", lambda: {"total": np.array([total])},
+                          lambda arrays: totals.append(int(arrays["total"][0])))
+        save_snapshot(str(tmp_path / f"shard-{shard}"))
+
+    # written with one shard; now there are two
+    save(0, satellites, 20)
+    save(1, [], 7)
+    _restore_shard_state(str(tmp_path), 1, 2)
+
+    assert sorted(rows) == sorted(s for s in satellites if shard_for(s, 2) == 1)
+    assert totals == [7]
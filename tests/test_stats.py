@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+
+def _totals(stats, day):
+    with stats._lock:
+        return dict(stats._counts.get(day, {})), round(stats._score_sums.get(day, 0.0), 6)
+
+
+def test_live_totals_match_a_rebuild_from_the_table(db):
+    from backend.core.compact import intern_names
+    from backend.core.models import Anomaly, Satellite
+    from backend.services.episodes import EpisodeTracker
+    from backend.services.stats import AnomalyStats
+
+    t0 = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    tracker = EpisodeTracker(Anomaly, "issue", max_gap_s=600)
+    live = AnomalyStats()
+    followers = [live]
+    intern_names(["S1", "S2"], ["High Temperature", "Low Battery"])
+
+    def ingest(*samples):
+        tracker.observe(db, samples)
+        db.commit()
+        for change in tracker.commit(db):
+            for stats in followers:
+                stats.record_anomaly(change.started, change.severity, change.score,
+                                     change.row_id, ended=change.ended)
+
+    ingest(("S1", t0, ["High Temperature"], "warning", 0.4),
+           ("S2", t0, ["Low Battery"], "warning", 0.3))
+    # the S1 episode rises to critical, S2's closes
+    ingest(("S1", t0 + timedelta(seconds=60), ["High Temperature", "Low Battery"], "critical", 0.9),
+           ("S2", t0 + timedelta(seconds=60), [], "normal", 0.0))
+
+    # snapshot while episodes are open, then they keep changing
+    snapshot = live.export_arrays()
+    ingest(("S1", t0 + timedelta(seconds=120), ["Low Battery"], "critical", 1.2))
+
+    day = t0.date()
+    expected = ({"critical": 2, "warning": 1}, 2.4)
+    assert _totals(live, day) == expected
+
+    rebuilt = AnomalyStats()
+    rebuilt.catch_up(db, Anomaly, Satellite)
+    assert _totals(rebuilt, day) == expected
+
+    restored = AnomalyStats()
+    restored.import_arrays(snapshot)
+    restored.catch_up(db, Anomaly, Satellite)
+    assert _totals(restored, day) == expected
+
+    # the restored counters keep following the open episode
+    followers.append(restored)
+    ingest(("S1", t0 + timedelta(seconds=180), [], "normal", 0.0))
+    assert _totals(live, day) == _totals(restored, day) == expected
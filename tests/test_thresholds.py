@@ -0,0 +1,65 @@
+import numpy as np
+
+from backend.services.thresholds import ThresholdLearner
+
+
+def test_thresholds_converge_to_quantiles_at_zero_margin():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(5000)
+    learner = ThresholdLearner(("a",), margin=0.0, min_samples=200)
+    for v in x:
+        learner.update(["sat"], [[v]])
+
+    low, high = learner.threshold("sat", "a")
+    q01, q99 = np.quantile(x, [0.01, 0.99])
+    assert abs(low - q01) < 0.15
+    assert abs(high - q99) < 0.15
+    assert learner.describe("sat")["a"]["samples"] == len(x)
+
+
+def test_thresholds_follow_a_level_shift():
+    rng = np.random.default_rng(1)
+    learner = ThresholdLearner(("a",), margin=1.0, min_samples=200)
+    learner.update(["sat"] * 2000, rng.standard_normal((2000, 1)))
+    learner.update(["sat"] * 4000, 10.0 + rng.standard_normal((4000, 1)))
+
+    # the new level is inside the limits instead of being flagged forever
+    low, high = learner.threshold("sat", "a")
+    assert low < 10.0 < high
+    assert high > 11.0
+
+
+def test_p2_tracks_quantiles_of_many_streams():
+    from backend.utils.thresholds import p2_increments, p2_initial_positions, p2_update
+
+    rng = np.random.default_rng(2)
+    quantiles = (0.05, 0.5, 0.95)
+    x = rng.standard_normal((3, 20000)) * np.array([[1.0], [5.0], [0.1]])
+    q = np.sort(x[:, :5], axis=1)[:, None, :].repeat(len(quantiles), axis=1)
+    n = np.tile(np.arange(5.0), (3, len(quantiles), 1))
+    np_ = np.tile(p2_initial_positions(quantiles), (3, 1, 1))
+    dn = p2_increments(quantiles)
+    for column in x[:, 5:].T:
+        p2_update(q, n, np_, dn, column)
+
+    expected = np.quantile(x, quantiles, axis=1).T
+    assert np.allclose(q[..., 2], expected, atol=0.05 * x.std(axis=1, keepdims=True))
+    assert (q[..., 0] == x.min(axis=1, keepdims=True)).all()
+    assert (q[..., 4] == x.max(axis=1, keepdims=True)).all()
+
+
+def test_overrides_win_over_learned_limits_and_survive_an_export():
+    learner = ThresholdLearner(("a", "b"), default_low={"a": -5.0}, default_high={"a": 5.0}, min_samples=10)
+    learner.update(["s1"] * 100, np.random.default_rng(4).standard_normal((100, 2)))
+    learner.set_override("*", "b", high=3.0)
+    learner.set_override("s1", "a", low=-1.0)
+    # unseen satellites fall back to the defaults, "*" applies to everyone
+    assert learner.threshold("s2", "a") == (-5.0, 5.0)
+    assert learner.threshold("s2", "b")[1] == learner.threshold("s1", "b")[1] == 3.0
+    assert learner.threshold("s1", "a")[0] == -1.0
+    assert learner.overrides() == {"*": {"b": {"low": None, "high": 3.0}}, "s1": {"a": {"low": -1.0, "high": None}}}
+
+    restored = ThresholdLearner(("a", "b"), min_samples=10)
+    restored.import_json(learner.export_json(), keep=lambda s: s != "s1")
+    assert restored.overrides() == {"*": {"b": {"low": None, "high": 3.0}}}
+    assert restored.describe("s1")["a"]["samples"] == 0